@@ -0,0 +1,21 @@
+-- Bulk candidate name updates for POST /fix-candidate-names/{job_id}
+-- Run this in your Supabase SQL Editor or via the dashboard
+--
+-- Writes a whole batch of re-extracted names in one statement. Without this
+-- function the backend falls back to one UPDATE per distinct name.
+
+CREATE OR REPLACE FUNCTION update_candidate_names(p_updates JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH updated AS (
+        UPDATE resume_results r
+        SET candidate_name = u.candidate_name
+        FROM jsonb_to_recordset(p_updates) AS u(id UUID, candidate_name TEXT)
+        WHERE r.id = u.id
+        RETURNING r.id
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$;
+
+GRANT EXECUTE ON FUNCTION update_candidate_names(JSONB) TO authenticated, service_role;
@@ -0,0 +1,88 @@
+-- Evaluation statistics aggregate for GET /evaluation-stats
+-- Run this in your Supabase SQL Editor or via the dashboard
+--
+-- Aggregates resume_results inside Postgres so the API receives one small
+-- JSON rollup (counts, sums, min/max, histograms) instead of every row. The
+-- backend seeds its incrementally maintained per-job statistics from this
+-- rollup, counting rows created up to p_created_through (its high-water
+-- mark). Without this function it falls back to a column-projected scan.
+
+CREATE INDEX IF NOT EXISTS idx_resume_results_job_posting_id ON resume_results(job_posting_id);
+
+-- Replaces the earlier single-argument version
+DROP FUNCTION IF EXISTS get_evaluation_statistics(UUID);
+
+CREATE OR REPLACE FUNCTION get_evaluation_statistics(
+    p_job_posting_id UUID DEFAULT NULL,
+    p_created_through TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH scoped AS (
+        SELECT overall_score, recommendation, processing_time_ms, evaluated_at, skills_matched
+        FROM resume_results
+        WHERE (p_job_posting_id IS NULL OR job_posting_id = p_job_posting_id)
+          AND (p_created_through IS NULL OR created_at <= p_created_through)
+    ),
+    totals AS (
+        SELECT
+            COUNT(*) AS total,
+            COUNT(overall_score) AS score_count,
+            COALESCE(SUM(overall_score), 0) AS score_sum,
+            COUNT(*) FILTER (WHERE overall_score >= 0 AND overall_score < 20) AS bucket_0_20,
+            COUNT(*) FILTER (WHERE overall_score >= 20 AND overall_score < 40) AS bucket_20_40,
+            COUNT(*) FILTER (WHERE overall_score >= 40 AND overall_score < 60) AS bucket_40_60,
+            COUNT(*) FILTER (WHERE overall_score >= 60 AND overall_score < 80) AS bucket_60_80,
+            COUNT(*) FILTER (WHERE overall_score >= 80 AND overall_score <= 100) AS bucket_80_100,
+            COUNT(NULLIF(processing_time_ms, 0)) AS processing_count,
+            COALESCE(SUM(NULLIF(processing_time_ms, 0)), 0) AS processing_sum,
+            MIN(NULLIF(processing_time_ms, 0)) AS processing_min,
+            MAX(NULLIF(processing_time_ms, 0)) AS processing_max,
+            MIN(evaluated_at) AS period_start,
+            MAX(evaluated_at) AS period_end
+        FROM scoped
+    ),
+    recommendations AS (
+        SELECT COALESCE(jsonb_object_agg(recommendation, count), '{}'::jsonb) AS counts
+        FROM (
+            SELECT COALESCE(recommendation, 'UNKNOWN') AS recommendation, COUNT(*) AS count
+            FROM scoped
+            GROUP BY 1
+        ) r
+    ),
+    skills AS (
+        SELECT COALESCE(jsonb_object_agg(skill, count), '{}'::jsonb) AS counts
+        FROM (
+            SELECT skill, COUNT(*) AS count
+            FROM scoped, jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(skills_matched) = 'array' THEN skills_matched ELSE '[]'::jsonb END
+            ) AS skill
+            GROUP BY skill
+        ) s
+    )
+    SELECT jsonb_build_object(
+        'total', t.total,
+        'score_count', t.score_count,
+        'score_sum', t.score_sum,
+        'score_buckets', jsonb_build_object(
+            '0-20', t.bucket_0_20,
+            '20-40', t.bucket_20_40,
+            '40-60', t.bucket_40_60,
+            '60-80', t.bucket_60_80,
+            '80-100', t.bucket_80_100
+        ),
+        'recommendations', r.counts,
+        'processing_count', t.processing_count,
+        'processing_sum', t.processing_sum,
+        'processing_min', t.processing_min,
+        'processing_max', t.processing_max,
+        'period_start', t.period_start,
+        'period_end', t.period_end,
+        'skills', s.counts
+    )
+    FROM totals t, recommendations r, skills s;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_evaluation_statistics(UUID, TIMESTAMPTZ) TO authenticated, service_role;
@@ -16,6 +16,127 @@ class Settings(BaseSettings):
     azure_openai_deployment_name: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
     azure_openai_api_version: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
     
+    # Azure OpenAI connection pool (shared by all services in a process)
+    azure_openai_max_connections: int = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "200"))
+    azure_openai_max_keepalive_connections: int = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50"))
+    azure_openai_timeout_seconds: float = float(os.getenv("AZURE_OPENAI_TIMEOUT_SECONDS", "120"))
+    azure_openai_max_retries: int = int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "2"))
+    
+    # Adaptive rate governor for Azure OpenAI calls (deployment quota; 0 = not enforced locally)
+    azure_openai_tokens_per_minute: int = int(os.getenv("AZURE_OPENAI_TOKENS_PER_MINUTE", "0"))
+    azure_openai_requests_per_minute: int = int(os.getenv("AZURE_OPENAI_REQUESTS_PER_MINUTE", "0"))
+    azure_openai_rate_limit_retries: int = int(os.getenv("AZURE_OPENAI_RATE_LIMIT_RETRIES", "8"))
+    llm_min_concurrency: int = int(os.getenv("LLM_MIN_CONCURRENCY", "2"))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    llm_latency_backoff_factor: float = float(os.getenv("LLM_LATENCY_BACKOFF_FACTOR", "3.0"))
+    # Fraction of the quota the API process uses; worker processes split the rest
+    llm_api_quota_share: float = float(os.getenv("LLM_API_QUOTA_SHARE", "0.25"))
+    
+    # Several deployments to spread calls over (JSON list, see services/deployment_pool.py;
+    # empty = only the deployment above) and when to take one out of rotation
+    azure_openai_deployments: str = os.getenv("AZURE_OPENAI_DEPLOYMENTS", "")
+    azure_openai_eject_after_errors: int = int(os.getenv("AZURE_OPENAI_EJECT_AFTER_ERRORS", "3"))
+    azure_openai_eject_seconds: float = float(os.getenv("AZURE_OPENAI_EJECT_SECONDS", "30"))
+    azure_openai_slow_factor: float = float(os.getenv("AZURE_OPENAI_SLOW_FACTOR", "2.0"))
+    
+    # Model tiering: a small, fast deployment for cheap tasks, and the task class -> tier
+    # table (JSON object, see services/model_router.py; empty = built-in defaults)
+    azure_openai_small_deployment_name: str = os.getenv("AZURE_OPENAI_SMALL_DEPLOYMENT_NAME", "")
+    llm_task_tiers: str = os.getenv("LLM_TASK_TIERS", "")
+    
+    # Structured output: how JSON replies are requested (json_object | json_schema | off,
+    # see services/structured_output.py) and whether invalid ones get a repair call
+    llm_response_format: str = os.getenv("LLM_RESPONSE_FORMAT", "json_object")
+    llm_json_repair_enabled: bool = os.getenv("LLM_JSON_REPAIR_ENABLED", "true").lower() == "true"
+    
+    # LLM response cache (opt-in)
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    llm_cache_backend: str = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | sqlite | redis
+    llm_cache_ttl_seconds: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    llm_cache_db_path: str = os.getenv("LLM_CACHE_DB_PATH", "data/llm_cache.db")
+    llm_cache_redis_url: str = os.getenv("LLM_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    
+    # Interview analysis
+    interview_analysis_max_concurrent: int = int(os.getenv("INTERVIEW_ANALYSIS_MAX_CONCURRENT", "8"))
+    interview_analysis_batch_scoring: bool = os.getenv("INTERVIEW_ANALYSIS_BATCH_SCORING", "false").lower() == "true"
+    interview_analysis_batch_size: int = int(os.getenv("INTERVIEW_ANALYSIS_BATCH_SIZE", "10"))
+    
+    # Multi-level question generation
+    question_generation_max_concurrent: int = int(os.getenv("QUESTION_GENERATION_MAX_CONCURRENT", "8"))
+    question_generation_combined: bool = os.getenv("QUESTION_GENERATION_COMBINED", "false").lower() == "true"
+    
+    # Durable job queue / batch workers
+    job_queue_db_path: str = os.getenv("JOB_QUEUE_DB_PATH", "data/jobs.db")
+    job_spool_dir: str = os.getenv("JOB_SPOOL_DIR", "data/spool")
+    job_worker_processes: int = int(os.getenv("JOB_WORKER_PROCESSES", str(os.cpu_count() or 1)))
+    job_worker_concurrency: int = int(os.getenv("JOB_WORKER_CONCURRENCY", "10"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    job_lease_seconds: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # Spool directories of finished jobs that still have failed items are kept this long for retries
+    job_spool_retention_hours: float = float(os.getenv("JOB_SPOOL_RETENTION_HOURS", "168"))
+    
+    # Streaming batch uploads (/evaluate-batch/upload)
+    batch_upload_max_files: int = int(os.getenv("BATCH_UPLOAD_MAX_FILES", "20000"))
+    batch_upload_max_file_bytes: int = int(os.getenv("BATCH_UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+    
+    # Resume URL downloads (shared connection pool)
+    download_max_concurrent: int = int(os.getenv("DOWNLOAD_MAX_CONCURRENT", "20"))
+    download_timeout_seconds: int = int(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "60"))
+    download_max_bytes: int = int(os.getenv("DOWNLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+    
+    # Process pool for CPU-bound resume parsing (0 = run in a thread instead)
+    parse_executor_workers: int = int(os.getenv("PARSE_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+    
+    # Skill / certification taxonomies for resume extraction (JSON; empty = built-in)
+    skill_taxonomy_path: str = os.getenv("SKILL_TAXONOMY_PATH", "")
+    certification_taxonomy_path: str = os.getenv("CERTIFICATION_TAXONOMY_PATH", "")
+    
+    # Resume parse cache
+    parse_cache_enabled: bool = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+    parse_cache_db_path: str = os.getenv("PARSE_CACHE_DB_PATH", "data/parse_cache.db")
+    parse_cache_max_bytes: int = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    
+    # Job Context Cache Settings
+    job_context_cache_ttl_seconds: int = int(os.getenv("JOB_CONTEXT_CACHE_TTL_SECONDS", "300"))
+    # Other processes (e.g. workers) see a rewritten job analysis within this many seconds
+    job_context_revalidate_seconds: float = float(os.getenv("JOB_CONTEXT_REVALIDATE_SECONDS", "10"))
+    
+    # Local pre-scoring (opt-in): resumes scoring below the threshold skip the LLM as NO_MATCH
+    prescore_enabled: bool = os.getenv("PRESCORE_ENABLED", "false").lower() == "true"
+    prescore_no_match_threshold: int = int(os.getenv("PRESCORE_NO_MATCH_THRESHOLD", "30"))
+    prescore_min_required_skills: int = int(os.getenv("PRESCORE_MIN_REQUIRED_SKILLS", "3"))
+    
+    # Cascade evaluation: the small tier scores first and only resumes within the band
+    # (in points) of a recommendation threshold are re-evaluated on the evaluation tier
+    cascade_evaluation_enabled: bool = os.getenv("CASCADE_EVALUATION_ENABLED", "false").lower() == "true"
+    cascade_uncertainty_band: int = int(os.getenv("CASCADE_UNCERTAINTY_BAND", "8"))
+    
+    # Write-behind buffer for resume_results inserts
+    result_writer_batch_size: int = int(os.getenv("RESULT_WRITER_BATCH_SIZE", "100"))
+    result_writer_flush_interval_seconds: float = float(os.getenv("RESULT_WRITER_FLUSH_INTERVAL_SECONDS", "1.0"))
+    result_writer_max_pending: int = int(os.getenv("RESULT_WRITER_MAX_PENDING", "2000"))
+    result_writer_max_retries: int = int(os.getenv("RESULT_WRITER_MAX_RETRIES", "3"))
+    
+    # Incrementally maintained /evaluation-stats rollups
+    evaluation_stats_db_path: str = os.getenv("EVALUATION_STATS_DB_PATH", "data/evaluation_stats.db")
+    
+    # Two-stage shortlisting: embedding retrieval, then LLM evaluation of the top-K
+    shortlist_top_k: int = int(os.getenv("SHORTLIST_TOP_K", "200"))
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "")  # sentence-transformers model; empty = hashed TF-IDF
+    embedding_hash_dim: int = int(os.getenv("EMBEDDING_HASH_DIM", "1024"))
+    vector_store_db_path: str = os.getenv("VECTOR_STORE_DB_PATH", "data/vectors.db")
+    
+    # Semantic resume search index (IVF over memory-mapped vectors)
+    resume_index_enabled: bool = os.getenv("RESUME_INDEX_ENABLED", "true").lower() == "true"
+    resume_index_dir: str = os.getenv("RESUME_INDEX_DIR", "data/resume_index")
+    resume_index_nprobe: int = int(os.getenv("RESUME_INDEX_NPROBE", "8"))
+    resume_index_min_train_rows: int = int(os.getenv("RESUME_INDEX_MIN_TRAIN_ROWS", "5000"))
+    
+    # /fix-candidate-names sweeps (run as 'candidate_name_fix' jobs)
+    name_fix_batch_size: int = int(os.getenv("NAME_FIX_BATCH_SIZE", "50"))
+    name_fix_max_concurrent: int = int(os.getenv("NAME_FIX_MAX_CONCURRENT", "5"))
+    
     # Supabase Settings
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_anon_key: str = os.getenv("SUPABASE_ANON_KEY", "")
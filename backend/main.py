@@ -3,28 +3,36 @@ FastAPI Backend for Recruitment Dashboard
 Handles job description analysis using Azure OpenAI GPT-4
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
 import logging
+import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-import asyncio
 import tempfile
+import shutil
 from pathlib import Path
-import base64
+from contextlib import asynccontextmanager
 import aiofiles
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from config import get_settings
-from services.openai_service import OpenAIService
+from services.openai_service import OpenAIService, close_http_client
+from services.model_router import get_model_router
 from services.supabase_service import SupabaseService
 from services.resume_evaluation_service import ResumeEvaluationService
 from services.interview_analysis_service import InterviewAnalysisService
+from services.job_queue_service import JobQueueService
+from services.result_writer_service import close_result_writer
+from services.resume_index_service import get_resume_index, entry_key
+from services.evaluation_stats_service import EvaluationStatsService
+from services.candidate_name_service import CandidateNameService
+from services.resume_extractor import warm_parse_executor, shutdown_parse_executor
 from models.job_analysis import JobAnalysisRequest, JobAnalysisResponse, AnalysisResult
 from models.resume_evaluation import (
     ResumeUploadRequest,
@@ -33,8 +41,12 @@ from models.resume_evaluation import (
     ResumeEvaluationResponse,
     BatchEvaluationResponse,
     ResumeSearchRequest,
+    SemanticSearchRequest,
+    SemanticSearchResponse,
     ResumeRankingResponse,
-    EvaluationStatistics
+    EvaluationStatistics,
+    RESULT_DETAIL_COLUMNS,
+    RESULT_LIST_COLUMNS
 )
 from models.interview_questions import (
     InterviewQuestionGenerationRequest,
@@ -48,7 +60,11 @@ from models.interview_analysis import (
     InterviewAnalysisRequest,
     InterviewAnalysisResponse
 )
+from models.job_queue import JobStatusResponse, JobRetryResponse
 from utils.logger import setup_logging
+from utils.file_utils import cleanup_temp_file, save_base64_to_temp, close_download_client
+from utils.multipart_upload import MultipartResumeSpooler
+from utils.pagination import apply_keyset, decode_cursor, next_cursor
 
 # Load environment variables
 load_dotenv()
@@ -94,9 +110,9 @@ supabase_service = None
 resume_evaluation_service = None
 interview_analysis_service = None
 multi_level_question_service = None
-
-# Processing queue for batch operations
-processing_queue = asyncio.Queue(maxsize=1000)
+job_queue_service = None
+evaluation_stats_service = None
+candidate_name_service = None
 
 def get_openai_service():
     global openai_service
@@ -116,6 +132,24 @@ def get_resume_evaluation_service():
         resume_evaluation_service = ResumeEvaluationService()
     return resume_evaluation_service
 
+def get_job_queue_service():
+    global job_queue_service
+    if job_queue_service is None:
+        job_queue_service = JobQueueService()
+    return job_queue_service
+
+def get_evaluation_stats_service():
+    global evaluation_stats_service
+    if evaluation_stats_service is None:
+        evaluation_stats_service = EvaluationStatsService(get_supabase_service())
+    return evaluation_stats_service
+
+def get_candidate_name_service():
+    global candidate_name_service
+    if candidate_name_service is None:
+        candidate_name_service = CandidateNameService(get_supabase_service(), get_openai_service())
+    return candidate_name_service
+
 def get_interview_analysis_service():
     global interview_analysis_service
     if interview_analysis_service is None:
@@ -132,6 +166,22 @@ def get_multi_level_question_service():
         multi_level_question_service = MultiLevelQuestionService(openai_svc, supabase_svc)
     return multi_level_question_service
 
+@app.on_event("startup")
+async def startup_event():
+    """Limit this process to its LLM quota share and start the resume parse pool"""
+    if not 0 < settings.llm_api_quota_share < 1:
+        raise ValueError("LLM_API_QUOTA_SHARE must be between 0 and 1")
+    get_model_router().set_share(settings.llm_api_quota_share)
+    await warm_parse_executor()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered results and release shared connection pools on shutdown"""
+    await close_result_writer()
+    await close_http_client()
+    await close_download_client()
+    shutdown_parse_executor()
+
 @app.get("/")
 async def root():
     """Root endpoint for health check"""
@@ -161,6 +211,12 @@ async def health_check():
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """LLM usage statistics (routing, latency, JSON parse outcomes, response cache)"""
+    openai_svc = get_openai_service()
+    return openai_svc.get_stats()
+
 @app.post("/analyze-job", response_model=JobAnalysisResponse)
 async def analyze_job_description(
     request: JobAnalysisRequest,
@@ -300,16 +356,13 @@ async def evaluate_batch_resumes(
         logger.info(f"Batch evaluation requested for {len(resumes)} resumes for job {job_posting_id}")
         
         if len(resumes) > 100:
-            # For large batches, queue for processing
-            background_tasks.add_task(
-                process_batch_in_background,
-                job_posting_id,
-                resumes
-            )
+            # For large batches, spool files to disk and hand off to the durable job queue
+            job_id = await enqueue_resume_batch(job_posting_id, resumes)
             
             return BatchEvaluationResponse(
                 success=True,
                 message=f"Batch of {len(resumes)} resumes queued for processing",
+                job_id=job_id,
                 total_processed=0,
                 successful=0,
                 failed=0,
@@ -331,10 +384,8 @@ async def evaluate_batch_resumes(
                         'url': resume.get('url')
                     })
                 elif 'url' in resume:
-                    # Download from URL
-                    temp_file = await download_resume_from_url(resume['url'], resume['name'])
+                    # Downloaded concurrently by evaluate_batch, overlapping with evaluation
                     resume_files.append({
-                        'path': str(temp_file),
                         'name': resume['name'],
                         'url': resume['url']
                     })
@@ -342,13 +393,13 @@ async def evaluate_batch_resumes(
             # Evaluate batch
             results = await eval_service.evaluate_batch(
                 job_posting_id=job_posting_id,
-                resume_files=resume_files,
-                max_concurrent=5
+                resume_files=resume_files
             )
             
             # Clean up temp files
             for rf in resume_files:
-                background_tasks.add_task(cleanup_temp_file, Path(rf['path']))
+                if 'path' in rf:
+                    background_tasks.add_task(cleanup_temp_file, Path(rf['path']))
             
             # Count successes and failures
             successful = sum(1 for r in results if r.get('processing_status') == 'completed')
@@ -375,20 +426,167 @@ async def evaluate_batch_resumes(
             errors=[{"error": str(e)}]
         )
 
+@app.post("/evaluate-batch/upload", response_model=BatchEvaluationResponse)
+@limiter.limit("10 per minute")
+async def evaluate_batch_upload(request: Request, job_posting_id: Optional[str] = None):
+    """
+    Evaluate a batch of resumes uploaded as multipart/form-data
+    
+    Send a `job_posting_id` field (or query parameter) and any number of file
+    parts; .zip/.tar archives of resumes are unpacked. Each part is streamed
+    straight to the spool directory, so memory use does not grow with the
+    batch. Batches over 100 resumes are queued like /evaluate-batch.
+    """
+    try:
+        async with spooled_resume_upload(request) as spooler:
+            job_posting_id = spooler.fields.get('job_posting_id') or job_posting_id
+            if not job_posting_id:
+                raise HTTPException(status_code=400, detail="job_posting_id is required")
+            if not spooler.files:
+                raise HTTPException(status_code=400, detail="No resume files found in upload")
+            
+            resume_files = spooler.files
+            logger.info(f"Streamed upload of {len(resume_files)} resumes for job {job_posting_id}")
+            
+            if len(resume_files) > 100:
+                job_id = await enqueue_spooled_batch(job_posting_id, resume_files, spooler.directory)
+                spooler.keep_files = True
+                
+                return BatchEvaluationResponse(
+                    success=True,
+                    message=f"Batch of {len(resume_files)} resumes queued for processing",
+                    job_id=job_id,
+                    total_processed=0,
+                    successful=0,
+                    failed=0,
+                    results=[]
+                )
+            
+            eval_service = get_resume_evaluation_service()
+            results = await eval_service.evaluate_batch(
+                job_posting_id=job_posting_id,
+                resume_files=resume_files
+            )
+            
+            successful = sum(1 for r in results if r.get('processing_status') == 'completed')
+            
+            return BatchEvaluationResponse(
+                success=True,
+                message=f"Processed {len(results)} resumes",
+                total_processed=len(results),
+                successful=successful,
+                failed=len(results) - successful,
+                results=[ResumeEvaluationResult(**r) for r in results if r.get('processing_status') == 'completed']
+            )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in streamed batch evaluation: {str(e)}")
+        return BatchEvaluationResponse(
+            success=False,
+            message="Failed to process batch",
+            total_processed=0,
+            successful=0,
+            failed=0,
+            results=[],
+            errors=[{"error": str(e)}]
+        )
+
+@app.post("/job/{job_id}/shortlist", response_model=BatchEvaluationResponse)
+@limiter.limit("10 per minute")
+async def shortlist_resumes_for_job(request: Request, job_id: str, top_k: Optional[int] = None):
+    """
+    Two-stage ranking of a large resume pool for a job posting
+    
+    Upload resumes as for /evaluate-batch/upload. Workers first embed every
+    resume locally (no LLM calls) and rank them by cosine similarity to the
+    job's analysis; only the `top_k` best matches (SHORTLIST_TOP_K by default)
+    then go through the full LLM evaluation and show up in /job/{job_id}/rankings.
+    
+    GET /jobs/{returned job_id} reports stage 1 progress; once it completes its
+    metadata holds the `evaluation_job_id` of stage 2.
+    """
+    try:
+        async with spooled_resume_upload(request) as spooler:
+            if not spooler.files:
+                raise HTTPException(status_code=400, detail="No resume files found in upload")
+            
+            try:
+                top_k = int(spooler.fields.get('top_k') or top_k or settings.shortlist_top_k)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="top_k must be an integer")
+            if top_k <= 0:
+                raise HTTPException(status_code=400, detail="top_k must be positive")
+            
+            queue_svc = get_job_queue_service()
+            shortlist_job_id = await queue_svc.enqueue_job(
+                job_type='resume_shortlist',
+                items=spooler.files,
+                job_posting_id=job_id,
+                metadata={'spool_dir': str(spooler.directory), 'top_k': top_k}
+            )
+            spooler.keep_files = True
+            
+            logger.info(f"Queued shortlist {shortlist_job_id} of {len(spooler.files)} resumes (top {top_k}) for job {job_id}")
+            
+            return BatchEvaluationResponse(
+                success=True,
+                message=f"Shortlisting top {top_k} of {len(spooler.files)} resumes",
+                job_id=shortlist_job_id,
+                total_processed=0,
+                successful=0,
+                failed=0,
+                results=[]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queuing shortlist: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue shortlist: {str(e)}")
+
+# Columns /search-resumes can sort by (keyset pagination needs a plain column)
+SORTABLE_RESULT_COLUMNS = {
+    'overall_score', 'skills_score', 'experience_score', 'education_score',
+    'processing_time_ms', 'evaluated_at', 'created_at'
+}
+
 @app.post("/search-resumes", response_model=List[ResumeEvaluationResult])
 @limiter.limit("200 per minute")
 async def search_evaluated_resumes(
     request: Request,
+    response: Response,
     search_request: ResumeSearchRequest,
 ):
     """
     Search and filter evaluated resumes
+    
+    Returns a lightweight projection (full details via /resume-results/{id}).
+    When more results exist, the `X-Next-Cursor` response header holds the
+    `cursor` for the next page.
     """
+    if search_request.sort_by not in SORTABLE_RESULT_COLUMNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort_by must be one of: {', '.join(sorted(SORTABLE_RESULT_COLUMNS))}"
+        )
+    descending = search_request.sort_order != 'asc'
+    
+    cursor = None
+    if search_request.cursor:
+        try:
+            cursor = decode_cursor(search_request.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if cursor.get('k') != search_request.sort_by or cursor.get('d') != descending:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort_by/sort_order")
+    
     try:
         supabase_svc = get_supabase_service()
         
         # Build query
-        query = supabase_svc.client.table('resume_results').select('*')
+        query = supabase_svc.client.table('resume_results').select(RESULT_LIST_COLUMNS)
         
         if search_request.job_posting_id:
             query = query.eq('job_posting_id', search_request.job_posting_id)
@@ -402,29 +600,129 @@ async def search_evaluated_resumes(
         if search_request.recommendation:
             query = query.eq('recommendation', search_request.recommendation)
         
-        # Apply sorting
-        if search_request.sort_order == 'asc':
-            query = query.order(search_request.sort_by, desc=False)
-        else:
-            query = query.order(search_request.sort_by, desc=True)
-        
-        # Apply pagination
-        query = query.limit(search_request.limit).offset(search_request.offset)
+        # Apply sorting and keyset pagination
+        query = apply_keyset(query, search_request.sort_by, descending, cursor)
+        query = query.limit(search_request.limit)
+        if search_request.offset and not cursor:
+            query = query.offset(search_request.offset)
         
         # Execute query
-        response = query.execute()
+        rows = query.execute().data
+        
+        cursor_header = next_cursor(
+            rows, search_request.sort_by, search_request.limit,
+            k=search_request.sort_by, d=descending
+        )
+        if cursor_header:
+            response.headers['X-Next-Cursor'] = cursor_header
         
-        return [ResumeEvaluationResult(**r) for r in response.data]
+        return [ResumeEvaluationResult(**r) for r in rows]
         
     except Exception as e:
         logger.error(f"Error searching resumes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to search resumes: {str(e)}")
 
+@app.get("/resume-results/{result_id}", response_model=ResumeEvaluationResult)
+async def get_resume_result(result_id: str):
+    """
+    Get the full evaluation details of one resume
+    """
+    try:
+        supabase_svc = get_supabase_service()
+        rows = supabase_svc.client.table('resume_results')\
+            .select(RESULT_DETAIL_COLUMNS)\
+            .eq('id', result_id)\
+            .limit(1)\
+            .execute()\
+            .data
+    except Exception as e:
+        logger.error(f"Error fetching resume result: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch resume result: {str(e)}")
+    
+    if not rows:
+        raise HTTPException(status_code=404, detail="Resume result not found")
+    return ResumeEvaluationResult(**rows[0])
+
+@app.post("/search-resumes/semantic", response_model=SemanticSearchResponse)
+@limiter.limit("200 per minute")
+async def semantic_search_resumes(
+    request: Request,
+    search_request: SemanticSearchRequest,
+):
+    """
+    Find resumes by similarity across every job
+    
+    Send a free-text `query` (skills, a job description, ...) or point at an
+    evaluated resume with `like_job_posting_id` + `like_resume_file_name` to
+    find candidates like it.
+    """
+    if not settings.resume_index_enabled:
+        raise HTTPException(status_code=503, detail="Semantic resume search is disabled")
+    
+    like_key = None
+    if search_request.like_job_posting_id or search_request.like_resume_file_name:
+        if not (search_request.like_job_posting_id and search_request.like_resume_file_name):
+            raise HTTPException(status_code=400, detail="like_job_posting_id and like_resume_file_name go together")
+        like_key = entry_key(search_request.like_job_posting_id, search_request.like_resume_file_name)
+    elif not (search_request.query or '').strip():
+        raise HTTPException(status_code=400, detail="Provide a query or a resume to match")
+    
+    try:
+        start_time = datetime.utcnow()
+        index = get_resume_index()
+        results = await index.search(
+            query=search_request.query,
+            like_key=like_key,
+            job_posting_id=search_request.job_posting_id,
+            min_score=search_request.min_score,
+            limit=search_request.limit
+        )
+        stats = await index.get_stats()
+        
+        return SemanticSearchResponse(
+            results=results,
+            indexed_resumes=stats['indexed_resumes'],
+            search_time_ms=round((datetime.utcnow() - start_time).total_seconds() * 1000, 2)
+        )
+    
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        logger.error(f"Error in semantic resume search: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search resumes: {str(e)}")
+
+@app.post("/search-resumes/semantic/reindex")
+@limiter.limit("2 per hour")
+async def reindex_resumes(request: Request, background_tasks: BackgroundTasks):
+    """
+    Rebuild the semantic search index from every completed evaluation
+    
+    Only needed for results stored before the index existed or after changing
+    EMBEDDING_MODEL; new evaluations are indexed as they complete.
+    """
+    if not settings.resume_index_enabled:
+        raise HTTPException(status_code=503, detail="Semantic resume search is disabled")
+    
+    background_tasks.add_task(reindex_resume_results)
+    return {"message": "Reindexing started", "index": await get_resume_index().get_stats()}
+
 @app.get("/job/{job_id}/rankings", response_model=ResumeRankingResponse)
-async def get_job_resume_rankings(job_id: str, limit: int = 100):
+async def get_job_resume_rankings(job_id: str, limit: int = 100, cursor: Optional[str] = None):
     """
     Get ranked resumes for a specific job posting
+    
+    Pages hold a lightweight projection ordered by (overall_score, id); pass
+    the returned `next_cursor` as `cursor` to get the next page.
     """
+    page_cursor = None
+    if cursor:
+        try:
+            page_cursor = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if page_cursor.get('k') != 'overall_score' or page_cursor.get('d') is not True:
+            raise HTTPException(status_code=400, detail="Cursor does not belong to a rankings page")
+    
     try:
         supabase_svc = get_supabase_service()
         
@@ -433,28 +731,29 @@ async def get_job_resume_rankings(job_id: str, limit: int = 100):
         job_title = job_response.data.get('title', 'Unknown')
         
         # Get ranked resumes
-        resumes_response = supabase_svc.client.table('resume_results')\
-            .select('*')\
-            .eq('job_posting_id', job_id)\
-            .eq('processing_status', 'completed')\
-            .order('overall_score', desc=True)\
-            .limit(limit)\
-            .execute()
-        
-        # Get total count
-        count_response = supabase_svc.client.table('resume_results')\
-            .select('*', count='exact')\
+        query = supabase_svc.client.table('resume_results')\
+            .select(RESULT_LIST_COLUMNS)\
             .eq('job_posting_id', job_id)\
-            .execute()
+            .eq('processing_status', 'completed')
+        rows = apply_keyset(query, 'overall_score', True, page_cursor).limit(limit).execute().data
         
-        total_candidates = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
+        # Total count (head-only request) on the first page; later pages carry it in the cursor
+        if page_cursor and 't' in page_cursor:
+            total_candidates = page_cursor['t']
+        else:
+            count_response = supabase_svc.client.table('resume_results')\
+                .select('id', count='exact', head=True)\
+                .eq('job_posting_id', job_id)\
+                .execute()
+            total_candidates = count_response.count or 0
         
         return ResumeRankingResponse(
             job_posting_id=job_id,
             job_title=job_title,
             total_candidates=total_candidates,
-            evaluated_candidates=len(resumes_response.data),
-            rankings=[ResumeEvaluationResult(**r) for r in resumes_response.data]
+            evaluated_candidates=len(rows),
+            rankings=[ResumeEvaluationResult(**r) for r in rows],
+            next_cursor=next_cursor(rows, 'overall_score', limit, k='overall_score', d=True, t=total_candidates)
         )
         
     except Exception as e:
@@ -462,92 +761,17 @@ async def get_job_resume_rankings(job_id: str, limit: int = 100):
         raise HTTPException(status_code=500, detail=f"Failed to get rankings: {str(e)}")
 
 @app.get("/evaluation-stats", response_model=EvaluationStatistics)
-async def get_evaluation_statistics(job_posting_id: Optional[str] = None):
+async def get_evaluation_statistics(job_posting_id: Optional[str] = None, refresh: bool = False):
     """
     Get statistics about resume evaluations
+    
+    Served from rollups that are updated as each evaluation is stored; pass
+    `refresh=true` to re-aggregate from the database.
     """
     try:
-        supabase_svc = get_supabase_service()
-        
-        # Build base query
-        query = supabase_svc.client.table('resume_results').select('*')
-        
-        if job_posting_id:
-            query = query.eq('job_posting_id', job_posting_id)
-        
-        response = query.execute()
-        data = response.data
-        
-        if not data:
-            return EvaluationStatistics(
-                total_evaluations=0,
-                average_score=0.0,
-                score_distribution={},
-                top_skills=[],
-                recommendation_distribution={},
-                average_processing_time_ms=0.0,
-                evaluation_period={}
-            )
-        
-        # Calculate statistics
-        scores = [r['overall_score'] for r in data if r.get('overall_score') is not None]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        
-        # Score distribution
-        score_distribution = {
-            "0-20": sum(1 for s in scores if 0 <= s < 20),
-            "20-40": sum(1 for s in scores if 20 <= s < 40),
-            "40-60": sum(1 for s in scores if 40 <= s < 60),
-            "60-80": sum(1 for s in scores if 60 <= s < 80),
-            "80-100": sum(1 for s in scores if 80 <= s <= 100),
-        }
-        
-        # Recommendation distribution
-        recommendations = [r.get('recommendation', 'UNKNOWN') for r in data]
-        recommendation_distribution = {
-            rec: recommendations.count(rec)
-            for rec in set(recommendations)
-        }
-        
-        # Processing time
-        processing_times = [r['processing_time_ms'] for r in data if r.get('processing_time_ms')]
-        avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
-        
-        # Evaluation period
-        dates = [r.get('evaluated_at') for r in data if r.get('evaluated_at')]
-        if dates:
-            dates_parsed = [datetime.fromisoformat(d.replace('Z', '+00:00')) for d in dates]
-            evaluation_period = {
-                'start': min(dates_parsed),
-                'end': max(dates_parsed)
-            }
-        else:
-            evaluation_period = {}
-        
-        # Top skills (simplified - would need more processing for accurate skill extraction)
-        all_skills = []
-        for r in data:
-            if r.get('skills_matched'):
-                all_skills.extend(r['skills_matched'])
-        
-        skill_counts = {}
-        for skill in all_skills:
-            skill_counts[skill] = skill_counts.get(skill, 0) + 1
-        
-        top_skills = [
-            {'skill': skill, 'count': count}
-            for skill, count in sorted(skill_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        ]
-        
-        return EvaluationStatistics(
-            total_evaluations=len(data),
-            average_score=avg_score,
-            score_distribution=score_distribution,
-            top_skills=top_skills,
-            recommendation_distribution=recommendation_distribution,
-            average_processing_time_ms=avg_processing_time,
-            evaluation_period=evaluation_period
-        )
+        stats_svc = get_evaluation_stats_service()
+        stats = await stats_svc.get_statistics(job_posting_id, refresh=refresh)
+        return EvaluationStatistics(**stats)
         
     except Exception as e:
         logger.error(f"Error getting statistics: {str(e)}")
@@ -557,47 +781,39 @@ async def get_evaluation_statistics(job_posting_id: Optional[str] = None):
 @limiter.limit("10 per minute")
 async def fix_candidate_names_for_job(request: Request, job_id: str):
     """
-    Fix candidate names for a specific job by re-extracting them using LLM
+    Fix candidate names for a specific job by re-extracting them
+    
+    Only results whose name is a placeholder ('SUMMARY', 'Unknown', ...) are
+    touched. They are fixed in the background by workers as a
+    'candidate_name_fix' job; follow its progress with GET /jobs/{job_id}.
     """
     try:
         logger.info(f"Fixing candidate names for job {job_id}")
         
-        supabase_svc = get_supabase_service()
-        openai_svc = get_openai_service()
+        name_svc = get_candidate_name_service()
+        ids = await name_svc.find_rows_to_fix(job_id)
         
-        # Get all resume results for this job with bad names
-        response = supabase_svc.client.table('resume_results')\
-            .select('id, candidate_name, parsed_resume_text')\
-            .eq('job_posting_id', job_id)\
-            .execute()
-        
-        results = response.data
-        fixed_count = 0
+        if not ids:
+            return {
+                "success": True,
+                "message": f"No candidate names to fix for job {job_id}",
+                "job_id": None,
+                "queued_count": 0
+            }
         
-        for result in results:
-            current_name = result.get('candidate_name', '')
-            resume_text = result.get('parsed_resume_text', '')
-            
-            # Check if name needs fixing
-            if current_name in ['SUMMARY', 'Unknown', 'Candidate', ''] or not current_name:
-                if resume_text:
-                    # Extract proper name using LLM
-                    extracted_name = await openai_svc.extract_candidate_name(resume_text)
-                    
-                    # Update the record
-                    update_response = supabase_svc.client.table('resume_results')\
-                        .update({'candidate_name': extracted_name})\
-                        .eq('id', result['id'])\
-                        .execute()
-                    
-                    if update_response.data:
-                        logger.info(f"Updated name from '{current_name}' to '{extracted_name}'")
-                        fixed_count += 1
+        queue_svc = get_job_queue_service()
+        fix_job_id = await queue_svc.enqueue_job(
+            job_type='candidate_name_fix',
+            items=name_svc.split_batches(ids),
+            job_posting_id=job_id,
+            metadata={'rows': len(ids)}
+        )
         
         return {
             "success": True,
-            "message": f"Fixed {fixed_count} candidate names for job {job_id}",
-            "fixed_count": fixed_count
+            "message": f"Fixing {len(ids)} candidate names for job {job_id}",
+            "job_id": fix_job_id,
+            "queued_count": len(ids)
         }
         
     except Exception as e:
@@ -608,102 +824,148 @@ async def fix_candidate_names_for_job(request: Request, job_id: str):
 # Helper Functions
 # ============================================================================
 
-async def cleanup_temp_file(file_path: Path):
-    """Clean up temporary files after processing"""
+async def enqueue_resume_batch(job_posting_id: str, resumes: List[Dict[str, str]]) -> str:
+    """
+    Queue a large resume batch for the worker pool (see worker.py)
+    
+    Base64 uploads are decoded into the spool directory up front so the queue
+    only stores file paths and the batch survives API restarts.
+    """
+    spool_dir = Path(settings.job_spool_dir) / uuid.uuid4().hex
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    
     try:
-        if file_path.exists():
-            file_path.unlink()
-            logger.debug(f"Cleaned up temp file: {file_path}")
-    except Exception as e:
-        logger.error(f"Error cleaning up temp file: {str(e)}")
+        items = []
+        for resume in resumes:
+            if 'content' in resume:
+                spooled_file = await save_base64_to_temp(resume['content'], resume['name'], spool_dir)
+                items.append({
+                    'name': resume['name'],
+                    'path': str(spooled_file),
+                    'url': resume.get('url')
+                })
+            elif 'url' in resume:
+                items.append({
+                    'name': resume['name'],
+                    'url': resume['url']
+                })
+        
+        return await enqueue_spooled_batch(job_posting_id, items, spool_dir)
+    except Exception:
+        # Nothing was queued, so nothing will ever read these files
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        raise
 
-async def save_base64_to_temp(base64_content: str, filename: str) -> Path:
-    """Save base64 content to temporary file"""
+@asynccontextmanager
+async def spooled_resume_upload(request: Request):
+    """
+    Stream a multipart resume upload into a fresh spool directory
+    
+    Yields the MultipartResumeSpooler; an unparseable body is a 400. The
+    directory is removed on exit unless `spooler.keep_files` was set because
+    the files were queued for the workers.
+    """
+    spool_dir = Path(settings.job_spool_dir) / uuid.uuid4().hex
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    spooler = MultipartResumeSpooler(
+        spool_dir,
+        max_files=settings.batch_upload_max_files,
+        max_file_bytes=settings.batch_upload_max_file_bytes
+    )
+    
     try:
-        # Decode base64
-        file_content = base64.b64decode(base64_content)
-        
-        # Create temp file
-        temp_dir = tempfile.gettempdir()
-        temp_file_path = Path(temp_dir) / f"resume_{datetime.now().timestamp()}_{filename}"
-        
-        async with aiofiles.open(temp_file_path, 'wb') as f:
-            await f.write(file_content)
-        
-        return temp_file_path
-    except Exception as e:
-        logger.error(f"Error saving base64 to temp: {str(e)}")
-        raise
+        try:
+            await spooler.consume(request.headers.get('content-type', ''), request.stream())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        yield spooler
+    finally:
+        if not spooler.keep_files:
+            shutil.rmtree(spool_dir, ignore_errors=True)
 
-async def download_resume_from_url(url: str, filename: str) -> Path:
-    """Download resume from URL to temporary file"""
+async def enqueue_spooled_batch(job_posting_id: str, items: List[Dict[str, Any]], spool_dir: Path) -> str:
+    """Queue resume items whose files already live in `spool_dir`"""
+    queue_svc = get_job_queue_service()
+    job_id = await queue_svc.enqueue_job(
+        job_type='resume_evaluation',
+        items=items,
+        job_posting_id=job_posting_id,
+        metadata={'spool_dir': str(spool_dir)}
+    )
+    
+    logger.info(f"Queued batch job {job_id} with {len(items)} resumes for job {job_posting_id}")
+    return job_id
+
+async def reindex_resume_results(page_size: int = 500):
+    """Feed every completed resume_results row into the semantic search index"""
+    supabase_svc = get_supabase_service()
+    index = get_resume_index()
+    columns = 'id, job_posting_id, resume_file_name, candidate_name, candidate_email, overall_score, recommendation, evaluated_at, parsed_resume_text'
+    
+    indexed = 0
+    offset = 0
     try:
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
+        while True:
+            response = supabase_svc.client.table('resume_results')\
+                .select(columns)\
+                .eq('processing_status', 'completed')\
+                .order('id')\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            if not response.data:
+                break
             
-            # Create temp file
-            temp_dir = tempfile.gettempdir()
-            temp_file_path = Path(temp_dir) / f"resume_{datetime.now().timestamp()}_{filename}"
-            
-            async with aiofiles.open(temp_file_path, 'wb') as f:
-                await f.write(response.content)
-            
-            return temp_file_path
+            indexed += await index.add_many(response.data)
+            offset += page_size
+        
+        logger.info(f"Reindexed {indexed} resumes for semantic search")
     except Exception as e:
-        logger.error(f"Error downloading resume from URL: {str(e)}")
+        logger.error(f"Error reindexing resumes after {indexed} rows: {str(e)}")
+
+# ============================================================================
+# Batch Job Endpoints
+# ============================================================================
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Get progress of a queued batch job
+    """
+    try:
+        queue_svc = get_job_queue_service()
+        status = await queue_svc.get_job_status(job_id)
+        if not status:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobStatusResponse(**status)
+    except HTTPException:
         raise
+    except Exception as e:
+        logger.error(f"Error fetching job status: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch job status: {str(e)}")
 
-async def process_batch_in_background(job_posting_id: str, resumes: List[Dict[str, str]]):
-    """Process large batch of resumes in background"""
+@app.post("/jobs/{job_id}/retry", response_model=JobRetryResponse)
+async def retry_failed_job_items(job_id: str):
+    """
+    Re-queue permanently failed items of a batch job
+    """
     try:
-        logger.info(f"Processing batch of {len(resumes)} resumes in background for job {job_posting_id}")
+        queue_svc = get_job_queue_service()
+        if not await queue_svc.get_job_status(job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
         
-        eval_service = get_resume_evaluation_service()
-        
-        # Process in chunks to avoid overwhelming the system
-        CHUNK_SIZE = 50
-        for i in range(0, len(resumes), CHUNK_SIZE):
-            chunk = resumes[i:i+CHUNK_SIZE]
-            
-            # Prepare file paths for chunk
-            resume_files = []
-            for resume in chunk:
-                if 'content' in resume:
-                    temp_file = await save_base64_to_temp(resume['content'], resume['name'])
-                    resume_files.append({
-                        'path': str(temp_file),
-                        'name': resume['name'],
-                        'url': resume.get('url')
-                    })
-                elif 'url' in resume:
-                    temp_file = await download_resume_from_url(resume['url'], resume['name'])
-                    resume_files.append({
-                        'path': str(temp_file),
-                        'name': resume['name'],
-                        'url': resume['url']
-                    })
-            
-            # Evaluate chunk
-            await eval_service.evaluate_batch(
-                job_posting_id=job_posting_id,
-                resume_files=resume_files,
-                max_concurrent=10  # Higher concurrency for background processing
-            )
-            
-            # Clean up temp files
-            for rf in resume_files:
-                await cleanup_temp_file(Path(rf['path']))
-            
-            # Add delay between chunks to avoid rate limits
-            await asyncio.sleep(2)
-        
-        logger.info(f"Completed background processing of {len(resumes)} resumes")
+        requeued = await queue_svc.retry_failed_items(job_id)
         
+        return JobRetryResponse(
+            job_id=job_id,
+            requeued=requeued,
+            message=f"Re-queued {requeued} failed items"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in background batch processing: {str(e)}")
+        logger.error(f"Error retrying job items: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retry job: {str(e)}")
 
 # ============================================================================
 # Interview Question Generation Endpoint
@@ -20,6 +20,21 @@ class QuestionAnalysis(BaseModel):
     strengths: List[str] = Field(default=[], description="What the candidate did well")
     improvements: List[str] = Field(default=[], description="Areas for improvement")
 
+class QuestionScore(BaseModel):
+    """Score and feedback the LLM returns for one answer"""
+    score: int = Field(..., ge=1, le=5, description="Score from 1-5")
+    feedback: str = Field(..., description="Detailed feedback on the answer")
+    strengths: List[str] = Field(default=[], description="What the candidate did well")
+    improvements: List[str] = Field(default=[], description="Areas for improvement")
+
+class NumberedQuestionScore(QuestionScore):
+    """Question score in a batch reply, keyed by pair number"""
+    index: int = Field(..., description="1-based number of the question-answer pair")
+
+class QuestionScoreBatch(BaseModel):
+    """LLM reply scoring several question-answer pairs"""
+    analyses: List[NumberedQuestionScore] = Field(default=[], description="One entry per pair")
+
 class OverallAnalysis(BaseModel):
     """Overall interview analysis"""
     overall_score: int = Field(..., ge=1, le=5, description="Overall score from 1-5")
@@ -0,0 +1,29 @@
+"""
+Pydantic models for durable background jobs
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+
+class JobStatusResponse(BaseModel):
+    """Progress of a queued background job"""
+    job_id: str
+    job_type: str
+    job_posting_id: Optional[str] = None
+    status: str = Field(..., description="queued, processing, completed or completed_with_errors")
+    total_items: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    progress_percent: float
+    created_at: str
+    updated_at: str
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Job-level data, e.g. the follow-up evaluation job of a shortlist")
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="Sample of permanently failed items")
+
+class JobRetryResponse(BaseModel):
+    """Response for re-queuing failed job items"""
+    job_id: str
+    requeued: int
+    message: str
@@ -20,6 +20,19 @@ class QuestionGroup(BaseModel):
     variations: List[QuestionVariation] = Field(..., description="3 difficulty variations of the question")
 
 
+class GeneratedQuestion(BaseModel):
+    """A base question and its variations as the LLM returns them"""
+    base_question: str = Field("", description="The base question")
+    easy: str = Field("", description="Easy variation")
+    medium: str = Field("", description="Medium variation")
+    difficult: str = Field("", description="Difficult variation")
+
+
+class GeneratedQuestionSet(BaseModel):
+    """LLM reply with the base questions of one category"""
+    questions: List[GeneratedQuestion] = Field(default=[], description="Base questions with variations")
+
+
 class MultiLevelQuestionGenerationRequest(BaseModel):
     """Request model for generating multi-level interview questions"""
     candidate_id: str = Field(..., description="UUID of the candidate")
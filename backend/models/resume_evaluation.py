@@ -2,7 +2,7 @@
 Pydantic models for resume evaluation
 """
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -19,6 +19,25 @@ class BatchResumeUploadRequest(BaseModel):
     job_posting_id: str = Field(..., description="UUID of the job posting")
     resumes: List[Dict[str, str]] = Field(..., description="List of resume files with name and content/url")
 
+class EvaluationScores(BaseModel):
+    """Scores and details the LLM returns for one resume"""
+    skills_score: int = Field(..., ge=0, le=100)
+    experience_score: int = Field(..., ge=0, le=100)
+    education_score: int = Field(..., ge=0, le=100)
+    skills_matched: List[str] = []
+    skills_missing: List[str] = []
+    experience_details: Dict[str, Any] = {}
+    education_details: Dict[str, Any] = {}
+    summary: str = ""
+    strengths: List[str] = []
+    improvements: List[str] = []
+    
+    @field_validator('skills_score', 'experience_score', 'education_score', mode='before')
+    @classmethod
+    def round_score(cls, value):
+        # Models occasionally answer 72.5; round instead of rejecting the reply
+        return round(value) if isinstance(value, float) else value
+
 class ResumeEvaluationResult(BaseModel):
     """Response model for resume evaluation"""
     model_config = ConfigDict(from_attributes=True)
@@ -61,6 +80,19 @@ class ResumeEvaluationResult(BaseModel):
     evaluated_at: Optional[datetime] = None
     created_at: Optional[datetime] = None
 
+# Columns needed to build a ResumeEvaluationResult (never parsed_resume_text)
+RESULT_DETAIL_COLUMNS = ', '.join(ResumeEvaluationResult.model_fields)
+
+# Lightweight projection for ranked lists and search pages; details are
+# fetched on demand from /resume-results/{result_id}
+RESULT_LIST_COLUMNS = ', '.join(
+    field for field in ResumeEvaluationResult.model_fields
+    if field not in {
+        'experience_details', 'education_details', 'evaluation_summary',
+        'key_strengths', 'improvement_areas', 'skills_missing', 'processing_error'
+    }
+)
+
 class ResumeEvaluationResponse(BaseModel):
     """Response wrapper for resume evaluation"""
     success: bool
@@ -72,6 +104,7 @@ class BatchEvaluationResponse(BaseModel):
     """Response for batch resume evaluation"""
     success: bool
     message: str
+    job_id: Optional[str] = None
     total_processed: int
     successful: int
     failed: int
@@ -85,10 +118,37 @@ class ResumeSearchRequest(BaseModel):
     max_score: Optional[int] = Field(None, ge=0, le=100)
     recommendation: Optional[str] = None
     limit: int = Field(100, ge=1, le=1000)
-    offset: int = Field(0, ge=0)
+    offset: int = Field(0, ge=0, description="Deprecated: use cursor")
+    cursor: Optional[str] = Field(None, description="X-Next-Cursor header of the previous page")
     sort_by: str = Field("overall_score", description="Field to sort by")
     sort_order: str = Field("desc", description="asc or desc")
 
+class SemanticSearchRequest(BaseModel):
+    """Request model for similarity search over indexed resumes"""
+    query: Optional[str] = Field(None, description="Free text, e.g. skills or a job description")
+    like_job_posting_id: Optional[str] = Field(None, description="Job posting of the resume to find candidates like")
+    like_resume_file_name: Optional[str] = Field(None, description="File name of the resume to find candidates like")
+    job_posting_id: Optional[str] = Field(None, description="Only return resumes evaluated for this job")
+    min_score: Optional[int] = Field(None, ge=0, le=100)
+    limit: int = Field(20, ge=1, le=200)
+
+class SemanticSearchResult(BaseModel):
+    """A resume matched by similarity search"""
+    job_posting_id: Optional[str] = None
+    resume_file_name: Optional[str] = None
+    candidate_name: Optional[str] = None
+    candidate_email: Optional[str] = None
+    overall_score: Optional[int] = None
+    recommendation: Optional[str] = None
+    evaluated_at: Optional[str] = None
+    similarity: float
+
+class SemanticSearchResponse(BaseModel):
+    """Response for similarity search"""
+    results: List[SemanticSearchResult] = []
+    indexed_resumes: int
+    search_time_ms: float
+
 class ResumeRankingResponse(BaseModel):
     """Response for resume ranking"""
     job_posting_id: str
@@ -96,6 +156,7 @@ class ResumeRankingResponse(BaseModel):
     total_candidates: int
     evaluated_candidates: int
     rankings: List[ResumeEvaluationResult] = []
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page")
 
 class EvaluationStatistics(BaseModel):
     """Statistics for evaluations"""
@@ -105,4 +166,6 @@ class EvaluationStatistics(BaseModel):
     top_skills: List[Dict[str, Any]]  # skill and frequency
     recommendation_distribution: Dict[str, int]
     average_processing_time_ms: float
+    min_processing_time_ms: Optional[int] = None
+    max_processing_time_ms: Optional[int] = None
     evaluation_period: Dict[str, datetime]  # start and end dates
@@ -0,0 +1,134 @@
+"""
+Candidate Name Service
+Repairs placeholder candidate names ('SUMMARY', 'Unknown', ...) in resume_results
+
+A sweep runs as a durable 'candidate_name_fix' job. The API selects only the
+IDs of rows whose name is a placeholder, and workers fix them in batches: the
+rule-based extractor is tried first, the LLM is called (with bounded
+concurrency) only for resumes it cannot handle, and each batch is written with
+one `update_candidate_names` call (SETUP_CANDIDATE_NAMES.sql), or one update
+per distinct name if that function is not installed.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import get_settings
+from services.openai_service import OpenAIService
+from services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+UPDATE_RPC = 'update_candidate_names'
+ID_PAGE_SIZE = 1000
+
+# Names written by older extraction code that should be re-extracted
+PLACEHOLDER_FILTER = 'candidate_name.is.null,candidate_name.in.("SUMMARY","Unknown","Candidate","")'
+
+# After the RPC fails (e.g. not installed yet), use per-name updates for this long before trying again
+RPC_RETRY_SECONDS = 300
+
+class CandidateNameService:
+    """Service for finding and fixing placeholder candidate names"""
+    
+    def __init__(
+        self,
+        supabase_service: Optional[SupabaseService] = None,
+        openai_service: Optional[OpenAIService] = None
+    ):
+        settings = get_settings()
+        
+        self.client = (supabase_service or SupabaseService()).client
+        self.openai_service = openai_service or OpenAIService()
+        self.batch_size = settings.name_fix_batch_size
+        self.max_concurrent = settings.name_fix_max_concurrent
+        self._rpc_retry_at = 0.0
+    
+    async def find_rows_to_fix(self, job_posting_id: str) -> List[str]:
+        """IDs of a job's results with a placeholder name and some resume text"""
+        ids = []
+        last_id = None
+        while True:
+            rows = await asyncio.to_thread(self._fetch_id_page, job_posting_id, last_id)
+            ids.extend(row['id'] for row in rows)
+            
+            if len(rows) < ID_PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        
+        return ids
+    
+    def _fetch_id_page(self, job_posting_id: str, after_id: Optional[str]):
+        query = self.client.table('resume_results')\
+            .select('id')\
+            .eq('job_posting_id', job_posting_id)\
+            .or_(PLACEHOLDER_FILTER)\
+            .not_.is_('parsed_resume_text', 'null')\
+            .neq('parsed_resume_text', '')
+        if after_id:
+            query = query.gt('id', after_id)
+        return query.order('id').limit(ID_PAGE_SIZE).execute().data or []
+    
+    def split_batches(self, ids: List[str]) -> List[Dict[str, List[str]]]:
+        """Job item payloads of at most `batch_size` row IDs each"""
+        return [{'ids': ids[i:i + self.batch_size]} for i in range(0, len(ids), self.batch_size)]
+    
+    async def fix_batch(self, ids: List[str]) -> Dict[str, int]:
+        """
+        Re-extract and store the names of a batch of rows
+        
+        Returns:
+            Counts of rows checked and rows whose name changed
+        """
+        rows = await asyncio.to_thread(self._fetch_rows, ids)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        async def extract(row):
+            async with semaphore:
+                return await self.openai_service.extract_candidate_name(
+                    row.get('parsed_resume_text') or '',
+                    heuristic_first=True
+                )
+        
+        names = await asyncio.gather(*(extract(row) for row in rows))
+        updates = [
+            {'id': row['id'], 'candidate_name': name}
+            for row, name in zip(rows, names)
+            if name != row.get('candidate_name')
+        ]
+        
+        if updates:
+            await self._write_names(updates)
+        
+        return {'checked': len(rows), 'fixed': len(updates)}
+    
+    async def _write_names(self, updates: List[Dict[str, str]]) -> None:
+        if time.monotonic() >= self._rpc_retry_at:
+            try:
+                await asyncio.to_thread(lambda: self.client.rpc(UPDATE_RPC, {'p_updates': updates}).execute())
+                return
+            except Exception as e:
+                self._rpc_retry_at = time.monotonic() + RPC_RETRY_SECONDS
+                logger.warning(f"{UPDATE_RPC} RPC unavailable, updating names one by one: {str(e)}")
+        
+        by_name: Dict[str, List[str]] = {}
+        for update in updates:
+            by_name.setdefault(update['candidate_name'], []).append(update['id'])
+        
+        for name, row_ids in by_name.items():
+            await asyncio.to_thread(self._update_name, name, row_ids)
+    
+    def _fetch_rows(self, ids: List[str]):
+        return self.client.table('resume_results')\
+            .select('id, candidate_name, parsed_resume_text')\
+            .in_('id', ids)\
+            .execute().data or []
+    
+    def _update_name(self, name: str, ids: List[str]):
+        self.client.table('resume_results')\
+            .update({'candidate_name': name})\
+            .in_('id', ids)\
+            .execute()
@@ -0,0 +1,242 @@
+"""
+Deployment Pool
+Spreads Azure OpenAI calls over several (e.g. regional) deployments
+
+Deployments come from AZURE_OPENAI_DEPLOYMENTS, a JSON list such as
+    [{"name": "eastus", "endpoint": "https://...", "api_key": "...",
+      "deployment": "gpt-4o", "weight": 2, "tokens_per_minute": 450000,
+      "requests_per_minute": 2700}]
+Omitted fields fall back to the single-deployment AZURE_OPENAI_* settings, and
+an empty list means just that deployment. Entries may also name a "tier"
+("default" unless given); each tier gets a pool of its own, see model_router.
+
+Every deployment has its own rate governor, so its quota and adaptive
+concurrency are tracked separately. Each call goes to a healthy deployment
+that can admit it right away, or else to the least loaded one (calls in
+flight or queued per weighted concurrency slot). A deployment is ejected for
+a while after consecutive errors, or when its latency runs well above the
+fastest deployment's for the same kind of call. Throttled deployments are
+skipped until their Retry-After passes.
+"""
+
+import json
+import logging
+import time
+from typing import Dict, Any, List
+
+from config import get_settings
+from services.rate_governor import RateGovernor
+
+logger = logging.getLogger(__name__)
+
+# Ejections double in length while a deployment keeps misbehaving, up to this multiple
+MAX_EJECTION_MULTIPLIER = 10
+
+DEFAULT_TIER = 'default'
+SMALL_TIER = 'small'
+
+class Deployment:
+    """One Azure OpenAI deployment with its own governor and health"""
+    
+    def __init__(
+        self,
+        name: str,
+        tier: str,
+        endpoint: str,
+        api_key: str,
+        api_version: str,
+        model: str,
+        weight: float,
+        governor: RateGovernor
+    ):
+        self.name = name
+        self.tier = tier
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.api_version = api_version
+        self.model = model
+        self.weight = weight
+        self.governor = governor
+        
+        self.consecutive_errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self._client = None
+    
+    @property
+    def client(self):
+        # Created on first use; every client shares the process-wide connection pool
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+            from services.openai_service import get_http_client
+            
+            self._client = AsyncAzureOpenAI(
+                api_key=self.api_key,
+                api_version=self.api_version,
+                azure_endpoint=self.endpoint,
+                # Retries happen in OpenAIService._chat_completion so governors see every 429
+                max_retries=0,
+                http_client=get_http_client()
+            )
+        return self._client
+    
+    def ready_at(self) -> float:
+        """Monotonic time from which the deployment takes calls again"""
+        return max(self.ejected_until, self.governor.paused_until)
+    
+    def load(self) -> float:
+        """Calls in flight or queued, relative to weighted concurrency"""
+        governor = self.governor
+        return (governor.in_flight + governor.waiting) / (self.weight * governor.limit)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'tier': self.tier,
+            'model': self.model,
+            'weight': self.weight,
+            'healthy': time.monotonic() >= self.ejected_until,
+            'ejected_for_seconds': round(max(0.0, self.ejected_until - time.monotonic()), 2),
+            'ejections': self.ejections,
+            'consecutive_errors': self.consecutive_errors,
+            **self.governor.get_stats()
+        }
+
+class DeploymentPool:
+    """Routes calls to deployments and tracks their health"""
+    
+    def __init__(
+        self,
+        deployments: List[Deployment],
+        eject_after_errors: int,
+        eject_seconds: float,
+        slow_factor: float
+    ):
+        if not deployments:
+            raise ValueError("A deployment pool needs at least one deployment")
+        self.deployments = deployments
+        self.eject_after_errors = eject_after_errors
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+    
+    @property
+    def model_key(self) -> str:
+        """The model(s) answering calls routed to this pool"""
+        return ','.join(sorted({deployment.model for deployment in self.deployments}))
+    
+    def set_share(self, share: float) -> None:
+        """Use only a fraction of every deployment's quota"""
+        for deployment in self.deployments:
+            deployment.governor.set_share(share)
+    
+    def choose(self, estimated_tokens: int) -> Deployment:
+        """Deployment for the next call"""
+        now = time.monotonic()
+        ready = [d for d in self.deployments if d.ready_at() <= now]
+        if not ready:
+            # Everything is ejected or throttled: use whichever recovers first
+            return min(self.deployments, key=lambda d: d.ready_at())
+        
+        # Prefer deployments that can start the call without waiting
+        return min(ready, key=lambda d: (not d.governor.can_admit(estimated_tokens), d.load()))
+    
+    def record_success(self, deployment: Deployment, latency_key: Any) -> None:
+        """Update health after a completed call (governor accounting is separate)"""
+        deployment.consecutive_errors = 0
+        if len(self.deployments) < 2:
+            return
+        
+        own = deployment.governor.latency(latency_key)
+        fastest = min(
+            (latency[1] for latency in (d.governor.latency(latency_key) for d in self.deployments) if latency),
+            default=None
+        )
+        if own and fastest and own[1] > fastest * self.slow_factor:
+            self._eject(deployment, f"average latency {own[1]:.1f}s vs {fastest:.1f}s on the fastest deployment")
+        elif time.monotonic() >= deployment.ejected_until:
+            deployment.ejections = 0
+    
+    def record_error(self, deployment: Deployment, error: Exception) -> None:
+        """Update health after a connection or server error"""
+        deployment.consecutive_errors += 1
+        if len(self.deployments) > 1 and deployment.consecutive_errors >= self.eject_after_errors:
+            self._eject(deployment, f"{deployment.consecutive_errors} consecutive errors ({str(error)})")
+    
+    def _eject(self, deployment: Deployment, reason: str) -> None:
+        now = time.monotonic()
+        if now < deployment.ejected_until:
+            return
+        
+        deployment.ejections += 1
+        duration = self.eject_seconds * min(MAX_EJECTION_MULTIPLIER, 2 ** (deployment.ejections - 1))
+        deployment.ejected_until = now + duration
+        deployment.consecutive_errors = 0
+        # Judge it afresh when it returns
+        deployment.governor.reset_latency()
+        logger.warning(f"Ejecting Azure OpenAI deployment {deployment.name} for {duration:.0f}s: {reason}")
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [deployment.get_stats() for deployment in self.deployments]
+
+def load_deployments() -> List[Deployment]:
+    """
+    Deployments configured in AZURE_OPENAI_DEPLOYMENTS (or the single default
+    one), plus AZURE_OPENAI_SMALL_DEPLOYMENT_NAME in the small tier
+    """
+    settings = get_settings()
+    
+    entries = json.loads(settings.azure_openai_deployments) if settings.azure_openai_deployments.strip() else [{}]
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("AZURE_OPENAI_DEPLOYMENTS must be a non-empty JSON list")
+    if settings.azure_openai_small_deployment_name:
+        entries = entries + [{'deployment': settings.azure_openai_small_deployment_name, 'tier': SMALL_TIER}]
+    
+    deployments = []
+    for index, entry in enumerate(entries):
+        model = entry.get('deployment', settings.azure_openai_deployment_name)
+        weight = float(entry.get('weight', 1))
+        if weight <= 0:
+            raise ValueError(f"Deployment weight must be positive, got {weight}")
+        
+        name = entry.get('name') or model
+        if any(deployment.name == name for deployment in deployments):
+            name = f"{name}-{index}"
+        
+        deployments.append(Deployment(
+            name=name,
+            tier=entry.get('tier', DEFAULT_TIER),
+            endpoint=entry.get('endpoint', settings.azure_openai_endpoint),
+            api_key=entry.get('api_key', settings.azure_openai_api_key),
+            api_version=entry.get('api_version', settings.azure_openai_api_version),
+            model=model,
+            weight=weight,
+            governor=RateGovernor(
+                tokens_per_minute=entry.get('tokens_per_minute', settings.azure_openai_tokens_per_minute),
+                requests_per_minute=entry.get('requests_per_minute', settings.azure_openai_requests_per_minute),
+                min_concurrency=settings.llm_min_concurrency,
+                max_concurrency=settings.llm_max_concurrency,
+                latency_backoff_factor=settings.llm_latency_backoff_factor
+            )
+        ))
+    
+    if not any(deployment.tier == DEFAULT_TIER for deployment in deployments):
+        raise ValueError(f"AZURE_OPENAI_DEPLOYMENTS needs at least one deployment in the '{DEFAULT_TIER}' tier")
+    return deployments
+
+def load_deployment_pools() -> Dict[str, DeploymentPool]:
+    """Configured deployments grouped into one pool per tier"""
+    settings = get_settings()
+    
+    by_tier: Dict[str, List[Deployment]] = {}
+    for deployment in load_deployments():
+        by_tier.setdefault(deployment.tier, []).append(deployment)
+    
+    return {
+        tier: DeploymentPool(
+            deployments,
+            eject_after_errors=settings.azure_openai_eject_after_errors,
+            eject_seconds=settings.azure_openai_eject_seconds,
+            slow_factor=settings.azure_openai_slow_factor
+        )
+        for tier, deployments in by_tier.items()
+    }
@@ -0,0 +1,151 @@
+"""
+Embedding Service
+Cheap local text embeddings for resume retrieval
+
+Two embedders are available:
+- sentence-transformers (dense, semantic) when EMBEDDING_MODEL is set and the
+  optional `sentence-transformers` package is installed
+- hashed TF-IDF (default): log term frequencies hashed into a fixed number of
+  buckets, with IDF computed over the pool being searched. No model download
+  or fitting step, and vectors stay valid as the pool grows.
+
+Both run on CPU. Vectors are float32 so they can be stored as a plain matrix.
+"""
+
+import abc
+import logging
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+
+# Long resumes add little retrieval signal beyond this and cost embedding time
+MAX_EMBED_CHARS = 8000
+
+class Embedder(abc.ABC):
+    """Base class; subclasses turn texts into float32 row vectors"""
+    
+    name = "base"
+    dim = 0
+    
+    @abc.abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return one float32 row per text"""
+    
+    def idf_weights(self, document_frequency: np.ndarray, total_documents: int) -> Optional[np.ndarray]:
+        """Per-dimension weights from corpus statistics, or None if the embedder needs none"""
+        return None
+    
+    def prepare(self, matrix: np.ndarray, queries: np.ndarray, corpus: Optional[np.ndarray] = None):
+        """
+        Weight and L2-normalise stored vectors and queries for cosine similarity
+        
+        Args:
+            matrix: Stored vectors to score
+            queries: Query vectors
+            corpus: Vectors that define corpus statistics (defaults to `matrix`)
+        """
+        corpus = matrix if corpus is None else corpus
+        idf = self.idf_weights(np.count_nonzero(corpus, axis=0), len(corpus))
+        if idf is not None:
+            matrix = matrix * idf
+            queries = queries * idf
+        return normalize_rows(matrix), normalize_rows(queries)
+
+class HashingTfidfEmbedder(Embedder):
+    """Hashed bag-of-words with sublinear TF; IDF is applied at query time"""
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.name = f"tfidf-hash-{dim}"
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text[:MAX_EMBED_CHARS].lower())
+            if not tokens:
+                continue
+            buckets = np.fromiter(
+                (zlib.crc32(token.encode('utf-8')) % self.dim for token in tokens),
+                dtype=np.int64,
+                count=len(tokens)
+            )
+            counts = np.bincount(buckets, minlength=self.dim)
+            matrix[row] = np.log1p(counts)
+        return matrix
+    
+    def idf_weights(self, document_frequency: np.ndarray, total_documents: int) -> Optional[np.ndarray]:
+        return (np.log((1 + total_documents) / (1 + document_frequency)) + 1).astype(np.float32)
+
+class SentenceTransformerEmbedder(Embedder):
+    """Dense embeddings from a local sentence-transformers model"""
+    
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("EMBEDDING_MODEL requires the 'sentence-transformers' package")
+        
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name.split('/')[-1]}"
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            [text[:MAX_EMBED_CHARS] for text in texts],
+            batch_size=32,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise each row, leaving all-zero rows at zero"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def top_k_similar(
+    embedder: Embedder,
+    matrix: np.ndarray,
+    query: np.ndarray,
+    k: int
+) -> List[tuple]:
+    """
+    Rank stored vectors by cosine similarity to one query vector
+    
+    Returns:
+        (row index, similarity) pairs, best first
+    """
+    if len(matrix) == 0 or k <= 0:
+        return []
+    
+    weighted, queries = embedder.prepare(matrix, query.reshape(1, -1))
+    scores = weighted @ queries[0]
+    
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(i), float(scores[i])) for i in top]
+
+@lru_cache()
+def get_embedder() -> Embedder:
+    """Get the process-wide embedder configured in Settings"""
+    settings = get_settings()
+    
+    if settings.embedding_model:
+        try:
+            embedder = SentenceTransformerEmbedder(settings.embedding_model)
+            logger.info(f"Using embedding model {settings.embedding_model} ({embedder.dim} dims)")
+            return embedder
+        except Exception as e:
+            logger.error(f"Error loading embedding model, falling back to hashed TF-IDF: {str(e)}")
+    
+    return HashingTfidfEmbedder(settings.embedding_hash_dim)
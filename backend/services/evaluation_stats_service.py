@@ -0,0 +1,421 @@
+"""
+Evaluation Stats Service
+Incrementally maintained dashboard statistics over resume_results
+
+Statistics are kept as mergeable rollups (counts, sums, min/max, histograms)
+per job posting plus one for all evaluations, in a SQLite database shared by
+the API and worker processes. The result writer adds each flushed batch of
+stored evaluations to their rollups, so reading statistics is a single lookup.
+
+A rollup is seeded from the database the first time it is read (or when
+`refresh` is requested): from the `get_evaluation_statistics` Postgres
+function (SETUP_EVALUATION_STATS.sql) when installed, otherwise by paging
+through only the five columns the statistics need.
+
+Seeding and incremental adds meet at a high-water mark. The seeder first
+stores an empty rollup marked with the newest `created_at` of the scope, then
+aggregates only rows up to that mark and merges the result in. Meanwhile
+add() counts only rows newer than the mark, so no row is missed or counted
+twice, and concurrent seeders of a scope share one mark and merge once.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from config import get_settings
+from services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+STATS_RPC = 'get_evaluation_statistics'
+STATS_COLUMNS = 'overall_score, recommendation, processing_time_ms, evaluated_at, skills_matched'
+FALLBACK_PAGE_SIZE = 1000
+TOP_SKILLS = 10
+
+# Rollup scope covering every job posting
+ALL_SCOPE = '*'
+
+# After the RPC fails (e.g. not installed yet), use the fallback for this long before trying again
+RPC_RETRY_SECONDS = 300
+
+SCORE_BUCKETS = [("0-20", 0, 20), ("20-40", 20, 40), ("40-60", 40, 60), ("60-80", 60, 80), ("80-100", 80, 101)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluation_stats (
+    scope TEXT PRIMARY KEY,
+    rollup TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+def score_bucket(score: int) -> Optional[str]:
+    """Name of the histogram bucket a 0-100 score falls in"""
+    for name, low, high in SCORE_BUCKETS:
+        if low <= score < high:
+            return name
+    return None
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp; naive values (datetime.utcnow()) are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def empty_rollup() -> Dict[str, Any]:
+    return {
+        'total': 0,
+        'score_count': 0,
+        'score_sum': 0,
+        'score_buckets': {name: 0 for name, _, _ in SCORE_BUCKETS},
+        'recommendations': {},
+        'processing_count': 0,
+        'processing_sum': 0,
+        'processing_min': None,
+        'processing_max': None,
+        'period_start': None,
+        'period_end': None,
+        'skills': {},
+        # Newest created_at the seed aggregate covers; add() skips rows up to it
+        'seeded_through': None,
+        # Token of the seed in progress, None once the aggregate is merged in
+        'seed': None
+    }
+
+def load_rollup(text: str) -> Dict[str, Any]:
+    """Parse a stored rollup; rollups stored before a field existed get its default"""
+    return {**empty_rollup(), **json.loads(text)}
+
+def _merge_extreme(a: Optional[Any], b: Optional[Any], pick, key=None) -> Optional[Any]:
+    if a is None or b is None:
+        return a if b is None else b
+    return pick(a, b, key=key)
+
+def merge_rollups(rollup: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Add the counts of `other` to `rollup`"""
+    for key in ('total', 'score_count', 'score_sum', 'processing_count', 'processing_sum'):
+        rollup[key] += other[key]
+    for name, count in other['score_buckets'].items():
+        rollup['score_buckets'][name] = rollup['score_buckets'].get(name, 0) + count
+    for field in ('recommendations', 'skills'):
+        for name, count in other[field].items():
+            rollup[field][name] = rollup[field].get(name, 0) + count
+    
+    rollup['processing_min'] = _merge_extreme(rollup['processing_min'], other['processing_min'], min)
+    rollup['processing_max'] = _merge_extreme(rollup['processing_max'], other['processing_max'], max)
+    rollup['period_start'] = _merge_extreme(rollup['period_start'], other['period_start'], min, key=parse_timestamp)
+    rollup['period_end'] = _merge_extreme(rollup['period_end'], other['period_end'], max, key=parse_timestamp)
+
+def is_covered(rollup: Dict[str, Any], row: Dict[str, Any]) -> bool:
+    """Whether the seed aggregate of `rollup` already includes `row`"""
+    if not rollup['seeded_through'] or not row.get('created_at'):
+        return False
+    return parse_timestamp(row['created_at']) <= parse_timestamp(rollup['seeded_through'])
+
+def add_to_rollup(rollup: Dict[str, Any], row: Dict[str, Any]) -> None:
+    """Account for one resume_results row"""
+    rollup['total'] += 1
+    
+    score = row.get('overall_score')
+    if score is not None:
+        rollup['score_count'] += 1
+        rollup['score_sum'] += score
+        bucket = score_bucket(score)
+        if bucket:
+            rollup['score_buckets'][bucket] += 1
+    
+    recommendation = row.get('recommendation') or 'UNKNOWN'
+    rollup['recommendations'][recommendation] = rollup['recommendations'].get(recommendation, 0) + 1
+    
+    processing_time = row.get('processing_time_ms')
+    if processing_time:
+        rollup['processing_count'] += 1
+        rollup['processing_sum'] += processing_time
+        if rollup['processing_min'] is None or processing_time < rollup['processing_min']:
+            rollup['processing_min'] = processing_time
+        if rollup['processing_max'] is None or processing_time > rollup['processing_max']:
+            rollup['processing_max'] = processing_time
+    
+    if row.get('evaluated_at'):
+        evaluated_at = parse_timestamp(row['evaluated_at'])
+        if rollup['period_start'] is None or evaluated_at < parse_timestamp(rollup['period_start']):
+            rollup['period_start'] = evaluated_at.isoformat()
+        if rollup['period_end'] is None or evaluated_at > parse_timestamp(rollup['period_end']):
+            rollup['period_end'] = evaluated_at.isoformat()
+    
+    if isinstance(row.get('skills_matched'), list):
+        skills = rollup['skills']
+        for skill in row['skills_matched']:
+            skills[skill] = skills.get(skill, 0) + 1
+
+def rollup_to_statistics(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a rollup into a dict matching the EvaluationStatistics model"""
+    if not rollup['total']:
+        return {
+            'total_evaluations': 0,
+            'average_score': 0.0,
+            'score_distribution': {},
+            'top_skills': [],
+            'recommendation_distribution': {},
+            'average_processing_time_ms': 0.0,
+            'evaluation_period': {}
+        }
+    
+    return {
+        'total_evaluations': rollup['total'],
+        'average_score': rollup['score_sum'] / rollup['score_count'] if rollup['score_count'] else 0.0,
+        'score_distribution': rollup['score_buckets'],
+        'top_skills': [
+            {'skill': skill, 'count': count}
+            for skill, count in Counter(rollup['skills']).most_common(TOP_SKILLS)
+        ],
+        'recommendation_distribution': rollup['recommendations'],
+        'average_processing_time_ms': (
+            rollup['processing_sum'] / rollup['processing_count'] if rollup['processing_count'] else 0.0
+        ),
+        'min_processing_time_ms': rollup['processing_min'],
+        'max_processing_time_ms': rollup['processing_max'],
+        'evaluation_period': (
+            {'start': parse_timestamp(rollup['period_start']), 'end': parse_timestamp(rollup['period_end'])}
+            if rollup['period_start'] else {}
+        )
+    }
+
+class EvaluationStatsStore:
+    """SQLite store of per-scope rollups, shared across processes"""
+    
+    def __init__(self, db_path: Optional[str] = None):
+        settings = get_settings()
+        
+        self.db_path = Path(db_path or settings.evaluation_stats_db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+    
+    async def get(self, scope: str) -> Optional[Dict[str, Any]]:
+        """The rollup of a scope, or None if it has not been seeded yet"""
+        return await asyncio.to_thread(self._get, scope)
+    
+    def _get(self, scope: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT rollup FROM evaluation_stats WHERE scope = ?", (scope,)).fetchone()
+        return load_rollup(row[0]) if row else None
+    
+    async def start_seed(self, scope: str, seeded_through: Optional[str], reset: bool = False) -> Dict[str, Any]:
+        """
+        Store an empty rollup for a scope that is about to be seeded
+        
+        Unless `reset` is set, a rollup the scope already has (seeded, or
+        being seeded by another reader) is kept. Returns the stored rollup.
+        """
+        return await asyncio.to_thread(self._start_seed, scope, seeded_through, reset)
+    
+    def _start_seed(self, scope: str, seeded_through: Optional[str], reset: bool) -> Dict[str, Any]:
+        rollup = {**empty_rollup(), 'seeded_through': seeded_through, 'seed': uuid.uuid4().hex}
+        conflict = "DO UPDATE SET rollup = excluded.rollup, updated_at = excluded.updated_at" if reset else "DO NOTHING"
+        
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO evaluation_stats (scope, rollup, updated_at) VALUES (?, ?, ?) ON CONFLICT(scope) {conflict}",
+                (scope, json.dumps(rollup), time.time())
+            )
+            row = conn.execute("SELECT rollup FROM evaluation_stats WHERE scope = ?", (scope,)).fetchone()
+        return load_rollup(row[0])
+    
+    async def finish_seed(self, scope: str, seed: str, aggregate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Merge the seed aggregate into the rollup started with `seed`
+        
+        Does nothing if another reader finished (or restarted) the seed
+        first. Returns the rollup of the scope afterwards.
+        """
+        return await asyncio.to_thread(self._finish_seed, scope, seed, aggregate)
+    
+    def _finish_seed(self, scope: str, seed: str, aggregate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT rollup FROM evaluation_stats WHERE scope = ?", (scope,)).fetchone()
+                rollup = load_rollup(row[0]) if row else None
+                
+                if rollup is not None and rollup['seed'] == seed:
+                    merge_rollups(rollup, aggregate)
+                    rollup['seed'] = None
+                    conn.execute(
+                        "UPDATE evaluation_stats SET rollup = ?, updated_at = ? WHERE scope = ?",
+                        (json.dumps(rollup), time.time(), scope)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return rollup
+    
+    async def add(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Add stored resume_results rows to their job's rollup and the overall one
+        
+        Rows need the `created_at` the database gave them. Scopes that have
+        not been seeded are skipped, and so are rows the seed of a scope
+        already covers; both are counted by the seed aggregate.
+        """
+        await asyncio.to_thread(self._add, rows)
+    
+    def _add(self, rows: List[Dict[str, Any]]) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                scopes = {row.get('job_posting_id') for row in rows} | {ALL_SCOPE}
+                rollups = {
+                    scope: load_rollup(rollup)
+                    for scope, rollup in conn.execute(
+                        f"SELECT scope, rollup FROM evaluation_stats WHERE scope IN ({', '.join('?' for _ in scopes)})",
+                        list(scopes)
+                    )
+                }
+                
+                changed = set()
+                for row in rows:
+                    for scope in (row.get('job_posting_id'), ALL_SCOPE):
+                        if scope in rollups and not is_covered(rollups[scope], row):
+                            add_to_rollup(rollups[scope], row)
+                            changed.add(scope)
+                
+                now = time.time()
+                conn.executemany(
+                    "UPDATE evaluation_stats SET rollup = ?, updated_at = ? WHERE scope = ?",
+                    [(json.dumps(rollups[scope]), now, scope) for scope in changed]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+@lru_cache()
+def get_evaluation_stats_store() -> EvaluationStatsStore:
+    """Get the process-wide statistics store"""
+    return EvaluationStatsStore()
+
+class EvaluationStatsService:
+    """Service for reading evaluation statistics"""
+    
+    def __init__(self, supabase_service: Optional[SupabaseService] = None):
+        self.client = (supabase_service or SupabaseService()).client
+        self.store = get_evaluation_stats_store()
+        self._rpc_retry_at = 0.0
+    
+    async def get_statistics(self, job_posting_id: Optional[str] = None, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Statistics for one job posting, or for all evaluations
+        
+        Args:
+            job_posting_id: Job posting to report on (None = all)
+            refresh: Re-aggregate from the database instead of using the
+                maintained rollup
+        
+        Returns:
+            A dict matching the EvaluationStatistics model
+        """
+        scope = job_posting_id or ALL_SCOPE
+        
+        rollup = None if refresh else await self.store.get(scope)
+        if rollup is None or rollup['seed'] is not None:
+            rollup = await self._seed(scope, job_posting_id, reset=refresh)
+        
+        return rollup_to_statistics(rollup)
+    
+    async def _seed(self, scope: str, job_posting_id: Optional[str], reset: bool) -> Dict[str, Any]:
+        """Seed the rollup of a scope from the database, up to its current high-water mark"""
+        rollup = await self.store.start_seed(scope, await self._high_water_mark(job_posting_id), reset=reset)
+        if rollup['seed'] is None:
+            return rollup
+        
+        # Rows newer than the mark are being added to the stored rollup already
+        aggregate = empty_rollup()
+        if rollup['seeded_through']:
+            aggregate = await self._aggregate(job_posting_id, rollup['seeded_through'])
+        
+        seeded = await self.store.finish_seed(scope, rollup['seed'], aggregate)
+        if seeded is None or seeded['seed'] is not None:
+            # A refresh restarted the seed meanwhile and will store its own aggregate
+            return aggregate
+        
+        logger.info(f"Seeded evaluation statistics for {scope} ({seeded['total']} evaluations)")
+        return seeded
+    
+    async def _high_water_mark(self, job_posting_id: Optional[str]) -> Optional[str]:
+        """Newest created_at among the scope's rows, None if it has none"""
+        def fetch():
+            query = self.client.table('resume_results').select('created_at').not_.is_('created_at', 'null')
+            if job_posting_id:
+                query = query.eq('job_posting_id', job_posting_id)
+            return query.order('created_at', desc=True).limit(1).execute().data or []
+        
+        rows = await asyncio.to_thread(fetch)
+        return rows[0]['created_at'] if rows else None
+    
+    async def _aggregate(self, job_posting_id: Optional[str], created_through: str) -> Dict[str, Any]:
+        """Build a rollup from the database rows created up to `created_through`"""
+        if time.monotonic() >= self._rpc_retry_at:
+            try:
+                return await self._aggregate_rpc(job_posting_id, created_through)
+            except Exception as e:
+                self._rpc_retry_at = time.monotonic() + RPC_RETRY_SECONDS
+                logger.warning(f"{STATS_RPC} RPC unavailable, using projected scan: {str(e)}")
+        
+        return await self._aggregate_scan(job_posting_id, created_through)
+    
+    async def _aggregate_rpc(self, job_posting_id: Optional[str], created_through: str) -> Dict[str, Any]:
+        response = await asyncio.to_thread(
+            lambda: self.client.rpc(
+                STATS_RPC, {'p_job_posting_id': job_posting_id, 'p_created_through': created_through}
+            ).execute()
+        )
+        rollup = {**empty_rollup(), **(response.data or {})}
+        
+        # Normalise Postgres timestamps to the format add_to_rollup() writes
+        for key in ('period_start', 'period_end'):
+            if rollup[key]:
+                rollup[key] = parse_timestamp(rollup[key]).isoformat()
+        return rollup
+    
+    async def _aggregate_scan(self, job_posting_id: Optional[str], created_through: str) -> Dict[str, Any]:
+        rollup = empty_rollup()
+        
+        offset = 0
+        while True:
+            rows = await asyncio.to_thread(self._fetch_page, job_posting_id, created_through, offset)
+            for row in rows:
+                add_to_rollup(rollup, row)
+            
+            if len(rows) < FALLBACK_PAGE_SIZE:
+                break
+            offset += FALLBACK_PAGE_SIZE
+        
+        return rollup
+    
+    def _fetch_page(self, job_posting_id: Optional[str], created_through: str, offset: int):
+        query = self.client.table('resume_results').select(STATS_COLUMNS).lte('created_at', created_through)
+        if job_posting_id:
+            query = query.eq('job_posting_id', job_posting_id)
+        return query.order('id').range(offset, offset + FALLBACK_PAGE_SIZE - 1).execute().data or []
@@ -3,22 +3,36 @@ Interview Analysis Service
 Analyzes candidate interview transcripts using Azure OpenAI
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from config import get_settings
 from services.openai_service import OpenAIService
 from models.interview_analysis import (
     InterviewAnalysisRequest,
     InterviewAnalysisResponse,
     QuestionAnalysis,
     OverallAnalysis,
-    QuestionAnswerPair
+    QuestionAnswerPair,
+    QuestionScore,
+    QuestionScoreBatch
 )
 
 logger = logging.getLogger(__name__)
 
 class InterviewAnalysisService:
-    def __init__(self, openai_service: OpenAIService):
+    def __init__(
+        self,
+        openai_service: OpenAIService,
+        max_concurrent: Optional[int] = None,
+        batch_scoring: Optional[bool] = None
+    ):
+        settings = get_settings()
+        
         self.openai_service = openai_service
+        self.max_concurrent = max_concurrent or settings.interview_analysis_max_concurrent
+        self.batch_scoring = settings.interview_analysis_batch_scoring if batch_scoring is None else batch_scoring
+        self.batch_size = settings.interview_analysis_batch_size
     
     def extract_qa_pairs(self, transcript: List[Dict]) -> List[QuestionAnswerPair]:
         """Extract question-answer pairs from transcript, skipping greetings"""
@@ -96,36 +110,169 @@ Respond in JSON format:
 }}"""
 
         try:
-            response_text = await self.openai_service.generate_text(
+            analysis = await self.openai_service.generate_structured(
                 prompt=prompt,
+                schema=QuestionScore,
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                task='interview_analysis'
             )
             
-            # Parse JSON response
-            import json
-            analysis_data = json.loads(response_text)
-            
             return QuestionAnalysis(
                 question=question,
                 answer=answer,
-                score=analysis_data['score'],
-                feedback=analysis_data['feedback'],
-                strengths=analysis_data.get('strengths', []),
-                improvements=analysis_data.get('improvements', [])
+                **analysis.model_dump()
             )
         
         except Exception as e:
             logger.error(f"Error analyzing question: {str(e)}")
             # Return default analysis if parsing fails
-            return QuestionAnalysis(
-                question=question,
-                answer=answer,
-                score=3,
-                feedback="Unable to analyze this response automatically.",
-                strengths=["Response provided"],
-                improvements=["Could provide more detail"]
-            )
+            return self._default_question_analysis(question, answer)
+    
+    def _default_question_analysis(self, question: str, answer: str) -> QuestionAnalysis:
+        """Neutral analysis used when a response cannot be scored automatically"""
+        return QuestionAnalysis(
+            question=question,
+            answer=answer,
+            score=3,
+            feedback="Unable to analyze this response automatically.",
+            strengths=["Response provided"],
+            improvements=["Could provide more detail"]
+        )
+    
+    async def analyze_question_batch(
+        self,
+        qa_pairs: List[QuestionAnswerPair],
+        job_title: str,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[QuestionAnalysis]:
+        """
+        Score several question-answer pairs in a single completion
+        
+        Pairs the model fails to return are re-scored individually, so the
+        result always has one analysis per pair in the original order. Each
+        completion, the batch call and every re-score alike, takes a slot of
+        `semaphore` (default: a new one of `max_concurrent`).
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrent)
+        
+        pairs_text = "\n\n".join([
+            f"[{i + 1}]\nQuestion Asked: {qa.question}\nCandidate's Answer: {qa.answer}"
+            for i, qa in enumerate(qa_pairs)
+        ])
+        
+        prompt = f"""You are an expert technical interviewer analyzing a candidate's responses for a {job_title} position.
+
+Below are {len(qa_pairs)} numbered question-answer pairs:
+
+{pairs_text}
+
+Analyze EACH response independently and provide:
+1. A score from 1-5 using this rubric:
+   1 – Poor: Off-topic, incomplete, very unclear
+   2 – Fair: Somewhat relevant, but major gaps or low clarity
+   3 – Average: Answers the question, but lacks depth or examples
+   4 – Good: Clear, relevant, structured, with at least one example
+   5 – Excellent: Complete, clear, confident, well-structured, strong example(s)
+
+2. Detailed feedback (2-3 sentences)
+3. 2-3 specific strengths (what they did well)
+4. 2-3 specific improvements (what could be better)
+
+Respond in JSON format with one entry per pair, using the pair number as "index":
+{{
+  "analyses": [
+    {{
+      "index": <pair number>,
+      "score": <1-5>,
+      "feedback": "<detailed feedback>",
+      "strengths": ["<strength1>", "<strength2>"],
+      "improvements": ["<improvement1>", "<improvement2>"]
+    }}
+  ]
+}}"""
+        
+        scored: Dict[int, QuestionAnalysis] = {}
+        
+        try:
+            async with semaphore:
+                batch = await self.openai_service.generate_structured(
+                    prompt=prompt,
+                    schema=QuestionScoreBatch,
+                    temperature=0.3,
+                    max_tokens=min(4000, 400 * len(qa_pairs) + 200),
+                    task='interview_analysis'
+                )
+            
+            for item in batch.analyses:
+                index = item.index - 1
+                if 0 <= index < len(qa_pairs) and index not in scored:
+                    qa = qa_pairs[index]
+                    scored[index] = QuestionAnalysis(
+                        question=qa.question,
+                        answer=qa.answer,
+                        **item.model_dump(exclude={'index'})
+                    )
+        
+        except Exception as e:
+            logger.error(f"Error in batch question analysis: {str(e)}")
+        
+        missing = [i for i in range(len(qa_pairs)) if i not in scored]
+        if missing:
+            logger.warning(f"Batch scoring returned {len(scored)}/{len(qa_pairs)} analyses, re-scoring {len(missing)} individually")
+            
+            async def rescore(qa: QuestionAnswerPair) -> QuestionAnalysis:
+                async with semaphore:
+                    return await self.analyze_single_question(
+                        question=qa.question,
+                        answer=qa.answer,
+                        job_title=job_title
+                    )
+            
+            retried = await asyncio.gather(*[rescore(qa_pairs[i]) for i in missing])
+            scored.update(zip(missing, retried))
+        
+        return [scored[i] for i in range(len(qa_pairs))]
+    
+    async def analyze_questions(
+        self,
+        qa_pairs: List[QuestionAnswerPair],
+        job_title: str
+    ) -> List[QuestionAnalysis]:
+        """
+        Score all question-answer pairs concurrently
+        
+        Runs under a semaphore of `max_concurrent` completions. In batch
+        scoring mode pairs are grouped into chunks of `batch_size` and each
+        chunk is scored in one call. Results keep the order of `qa_pairs`.
+        """
+        if not qa_pairs:
+            return []
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        if self.batch_scoring:
+            chunks = [
+                qa_pairs[i:i + self.batch_size]
+                for i in range(0, len(qa_pairs), self.batch_size)
+            ]
+            
+            # Each chunk takes a semaphore slot per completion, including its re-scores
+            chunk_results = await asyncio.gather(*[
+                self.analyze_question_batch(chunk, job_title, semaphore)
+                for chunk in chunks
+            ])
+            return [analysis for chunk in chunk_results for analysis in chunk]
+        
+        async def score_pair(qa: QuestionAnswerPair) -> QuestionAnalysis:
+            async with semaphore:
+                return await self.analyze_single_question(
+                    question=qa.question,
+                    answer=qa.answer,
+                    job_title=job_title
+                )
+        
+        return list(await asyncio.gather(*[score_pair(qa) for qa in qa_pairs]))
     
     async def analyze_overall_performance(
         self,
@@ -174,23 +321,12 @@ Respond in JSON format:
 }}"""
 
         try:
-            response_text = await self.openai_service.generate_text(
+            return await self.openai_service.generate_structured(
                 prompt=prompt,
+                schema=OverallAnalysis,
                 temperature=0.3,
-                max_tokens=700
-            )
-            
-            import json
-            overall_data = json.loads(response_text)
-            
-            return OverallAnalysis(
-                overall_score=overall_data['overall_score'],
-                summary=overall_data['summary'],
-                key_strengths=overall_data['key_strengths'],
-                key_weaknesses=overall_data['key_weaknesses'],
-                recommendation=overall_data['recommendation'],
-                confidence_level=overall_data['confidence_level'],
-                communication_quality=overall_data['communication_quality']
+                max_tokens=700,
+                task='interview_analysis'
             )
         
         except Exception as e:
@@ -218,15 +354,8 @@ Respond in JSON format:
         qa_pairs = self.extract_qa_pairs(request.transcript)
         logger.info(f"Extracted {len(qa_pairs)} Q&A pairs")
         
-        # Analyze each question
-        question_analyses = []
-        for qa in qa_pairs:
-            analysis = await self.analyze_single_question(
-                question=qa.question,
-                answer=qa.answer,
-                job_title=request.job_title
-            )
-            question_analyses.append(analysis)
+        # Analyze all questions concurrently (order preserved)
+        question_analyses = await self.analyze_questions(qa_pairs, request.job_title)
         
         logger.info(f"Completed individual question analysis")
         
@@ -0,0 +1,232 @@
+"""
+Job Context Cache
+Per-job evaluation context shared by every resume evaluated against a posting
+
+A batch of 20k resumes for one job needs the job posting row and the job half
+of the evaluation prompt exactly once; this module fetches and renders them on
+first use and keeps them in a TTL cache that is invalidated whenever the job's
+ai_analysis is rewritten.
+
+Invalidation only reaches the process that rewrote the analysis, so cached
+contexts are also revalidated against the posting's `updated_at` at most every
+JOB_CONTEXT_REVALIDATE_SECONDS: a cheap one-column read, after which a changed
+posting is reloaded. Worker processes therefore pick up a new analysis within
+that window instead of at the end of the TTL.
+"""
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+
+from config import get_settings
+from services.skill_matcher import get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+class JobContext:
+    """Job posting data plus the pre-rendered job half of the evaluation prompt"""
+    
+    def __init__(self, job_data: Dict[str, Any]):
+        self.job_data = job_data
+        self.job_posting_id = job_data.get('id')
+        self.job_title = job_data.get('title', '')
+        self.experience_required = job_data.get('experience_required', 0)
+        
+        # USE EXISTING AI ANALYSIS - Don't re-analyze job description
+        self.ai_analysis = job_data.get('ai_analysis') or {}
+        ai_analysis = self.ai_analysis
+        
+        if not ai_analysis:
+            # If no AI analysis exists, use fallback data
+            logger.warning(f"No AI analysis found for job {self.job_title}, using basic data")
+            self.required_skills = job_data.get('skills_required') or []
+            self.education_requirements = []
+            self.responsibilities = []
+            self.qualifications = []
+            self.nice_to_have = []
+            self.job_level = 'mid'
+        else:
+            # Extract all structured data from existing AI analysis
+            self.required_skills = ai_analysis.get('key_skills', [])
+            self.education_requirements = ai_analysis.get('education_requirements', [])
+            self.responsibilities = ai_analysis.get('responsibilities', [])
+            self.qualifications = ai_analysis.get('qualifications', [])
+            self.nice_to_have = ai_analysis.get('nice_to_have', [])
+            self.job_level = ai_analysis.get('job_level', 'mid')
+            
+            # Combine technical and soft skills if present
+            technical_skills = ai_analysis.get('technical_skills', [])
+            soft_skills = ai_analysis.get('soft_skills', [])
+            if technical_skills or soft_skills:
+                self.required_skills = technical_skills + soft_skills
+        
+        self.difficulty_score = ai_analysis.get('difficulty_score', 5)
+        
+        # Required skills resolved to taxonomy names once, for local pre-scoring
+        skill_matcher = get_skill_matcher()
+        self.skill_requirements: List[Tuple[str, frozenset]] = [
+            (skill.strip().lower(), frozenset(name.lower() for name in skill_matcher.find_all(skill)))
+            for skill in self.required_skills
+            if isinstance(skill, str) and skill.strip()
+        ]
+        
+        # Query text for embedding retrieval (two-stage shortlisting)
+        self.retrieval_text = '\n'.join(
+            str(part) for part in [
+                self.job_title,
+                *self.required_skills,
+                *self.responsibilities,
+                *self.qualifications,
+                *self.education_requirements,
+                *self.nice_to_have
+            ]
+            if part
+        )
+        
+        self.requirements_prompt = self._render_requirements_prompt()
+        self.response_format_prompt = self._render_response_format_prompt()
+    
+    def _render_requirements_prompt(self) -> str:
+        """Job requirements section that opens the evaluation prompt"""
+        required_skills = self.required_skills
+        education_requirements = self.education_requirements
+        responsibilities = self.responsibilities
+        qualifications = self.qualifications
+        nice_to_have = self.nice_to_have
+        
+        return f"""You are an expert recruiter evaluating a resume against ALREADY ANALYZED job requirements.
+DO NOT re-analyze the job description - use the structured requirements provided below.
+
+JOB REQUIREMENTS (FROM EXISTING AI ANALYSIS):
+- Title: {self.job_title}
+- Level: {self.job_level} (difficulty: {self.difficulty_score}/10)
+- Required Experience: {self.experience_required} years
+- Required Skills: {', '.join(required_skills) if required_skills else 'None specified'}
+- Education Requirements: {', '.join(education_requirements) if education_requirements else 'Not specified'}
+- Key Responsibilities: {', '.join(responsibilities[:5]) if responsibilities else 'Not specified'}
+- Required Qualifications: {', '.join(qualifications[:5]) if qualifications else 'Not specified'}
+- Nice to Have: {', '.join(nice_to_have[:5]) if nice_to_have else 'None specified'}"""
+    
+    def _render_response_format_prompt(self) -> str:
+        """Evaluation instructions and JSON response format that close the prompt"""
+        return f"""EVALUATION INSTRUCTIONS:
+Compare the candidate's qualifications DIRECTLY against the structured requirements above.
+Use the scoring weights: 60% skills, 30% experience, 10% education
+
+Respond in JSON format with these exact keys:
+{{
+    "skills_score": <0-100 based on match with required_skills>,
+    "experience_score": <0-100 based on {self.experience_required} years requirement>,
+    "education_score": <0-100 based on education_requirements match>,
+    "skills_matched": [<skills from required_skills that candidate has>],
+    "skills_missing": [<skills from required_skills that candidate lacks>],
+    "experience_details": {{
+        "years": <actual years>,
+        "relevance": "<how relevant to job level: {self.job_level}>",
+        "key_roles": [<relevant roles>]
+    }},
+    "education_details": {{
+        "highest_degree": "<degree>",
+        "relevance": "<match with education_requirements>"
+    }},
+    "summary": "<2-3 sentence evaluation summary>",
+    "strengths": [<top 3 strengths based on qualifications match>],
+    "improvements": [<top 3 gaps based on missing requirements>]
+}}"""
+
+class JobContextCache:
+    """TTL cache of JobContext objects with coalesced loading and revalidation"""
+    
+    def __init__(self, ttl_seconds: int, revalidate_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.revalidate_seconds = revalidate_seconds
+        # job_posting_id -> (expires_at, revalidate_at, version, context)
+        self._entries: Dict[str, Tuple[float, float, Optional[str], JobContext]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        # Bumped on invalidation so a load that was already in flight is not cached
+        self._generations: Dict[str, int] = {}
+    
+    async def get(
+        self,
+        job_posting_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+        version_loader: Optional[Callable[[str], Awaitable[Optional[str]]]] = None
+    ) -> Optional[JobContext]:
+        """
+        Get the context for a job, loading it with `loader` on a miss
+        
+        With `version_loader` (the posting's current `updated_at`), a cached
+        context due for revalidation is kept if the version is unchanged and
+        reloaded otherwise. Concurrent misses and revalidations for the same
+        job share one load. Returns None (and caches nothing) if the loader
+        finds no job posting.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(job_posting_id)
+        if entry and entry[0] > now and (version_loader is None or entry[1] > now):
+            return entry[3]
+        
+        task = self._loading.get(job_posting_id)
+        if task is None:
+            cached = entry if entry and entry[0] > now else None
+            task = asyncio.ensure_future(self._load(job_posting_id, loader, version_loader, cached))
+            self._loading[job_posting_id] = task
+            task.add_done_callback(lambda done: self._forget_load(job_posting_id, done))
+        
+        return await asyncio.shield(task)
+    
+    def _forget_load(self, job_posting_id: str, task: asyncio.Task) -> None:
+        # An invalidation may already have replaced the in-flight load
+        if self._loading.get(job_posting_id) is task:
+            del self._loading[job_posting_id]
+    
+    async def _load(
+        self,
+        job_posting_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+        version_loader: Optional[Callable[[str], Awaitable[Optional[str]]]],
+        cached: Optional[Tuple[float, float, Optional[str], JobContext]]
+    ) -> Optional[JobContext]:
+        generation = self._generations.get(job_posting_id, 0)
+        
+        if cached is not None and version_loader is not None:
+            expires_at, _, version, context = cached
+            latest = await version_loader(job_posting_id)
+            # An unreadable version (e.g. Supabase briefly down) keeps the cached context
+            if latest is None or latest == version:
+                if self._generations.get(job_posting_id, 0) == generation:
+                    revalidate_at = time.monotonic() + self.revalidate_seconds
+                    self._entries[job_posting_id] = (expires_at, revalidate_at, version, context)
+                return context
+            logger.info(f"Job {job_posting_id} changed since its evaluation context was cached")
+        
+        job_data = await loader(job_posting_id)
+        if not job_data:
+            return None
+        
+        context = JobContext(job_data)
+        if self._generations.get(job_posting_id, 0) == generation:
+            now = time.monotonic()
+            self._entries[job_posting_id] = (
+                now + self.ttl_seconds,
+                now + self.revalidate_seconds,
+                job_data.get('updated_at'),
+                context
+            )
+            logger.info(f"Cached evaluation context for job {job_posting_id}")
+        return context
+    
+    def invalidate(self, job_posting_id: str) -> None:
+        """Drop a job's cached context (e.g. after its ai_analysis changes)"""
+        self._generations[job_posting_id] = self._generations.get(job_posting_id, 0) + 1
+        self._loading.pop(job_posting_id, None)
+        if self._entries.pop(job_posting_id, None):
+            logger.info(f"Invalidated evaluation context for job {job_posting_id}")
+
+@lru_cache()
+def get_job_context_cache() -> JobContextCache:
+    """Get the process-wide job context cache"""
+    settings = get_settings()
+    return JobContextCache(settings.job_context_cache_ttl_seconds, settings.job_context_revalidate_seconds)
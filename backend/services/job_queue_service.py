@@ -0,0 +1,400 @@
+"""
+Durable Job Queue Service
+SQLite-backed queue for long-running batch work (e.g. 20k-resume evaluations)
+
+Every job is split into items that are checkpointed individually, so a batch
+survives restarts: items left 'processing' by a dead worker are reclaimed once
+their lease expires, and failed items are retried up to `max_attempts` times.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    job_posting_id TEXT,
+    total_items INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result TEXT,
+    locked_by TEXT,
+    lease_expires_at TEXT,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_finalizations (
+    job_id TEXT PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+    claimed_by TEXT NOT NULL,
+    claimed_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_items_claim ON job_items(status, lease_expires_at, id);
+CREATE INDEX IF NOT EXISTS idx_job_items_job ON job_items(job_id, status);
+"""
+
+class JobQueueService:
+    """Service for enqueuing, claiming and tracking durable batch jobs"""
+    
+    def __init__(self, db_path: Optional[str] = None):
+        settings = get_settings()
+        
+        self.db_path = Path(db_path or settings.job_queue_db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = settings.job_max_attempts
+        self.lease_seconds = settings.job_lease_seconds
+        
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            yield conn
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _now() -> str:
+        return datetime.utcnow().isoformat()
+    
+    async def enqueue_job(
+        self,
+        job_type: str,
+        items: List[Dict[str, Any]],
+        job_posting_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Create a job with one queue item per payload
+        
+        Args:
+            job_type: Kind of work, used by workers to pick a handler
+            items: JSON-serialisable payloads, one per unit of work
+            job_posting_id: Job posting the work belongs to
+            metadata: Extra job-level data
+        
+        Returns:
+            The new job ID
+        """
+        return await asyncio.to_thread(self._enqueue_job, job_type, items, job_posting_id, metadata)
+    
+    def _enqueue_job(
+        self,
+        job_type: str,
+        items: List[Dict[str, Any]],
+        job_posting_id: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> str:
+        job_id = str(uuid.uuid4())
+        now = self._now()
+        
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, job_type, job_posting_id, total_items, metadata, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, job_type, job_posting_id, len(items), json.dumps(metadata or {}), now, now)
+                )
+                conn.executemany(
+                    "INSERT INTO job_items (job_id, seq, payload, updated_at) VALUES (?, ?, ?, ?)",
+                    [(job_id, seq, json.dumps(item), now) for seq, item in enumerate(items)]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        logger.info(f"Enqueued {job_type} job {job_id} with {len(items)} items")
+        return job_id
+    
+    async def claim_items(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` runnable items to a worker
+        
+        Pending items and items whose lease has expired (their worker died)
+        are both claimable. Claimed items are returned oldest first.
+        
+        An expired item that has already used up `max_attempts` (e.g. it
+        crashes its worker every time) is marked failed instead of leased
+        again; it is returned with 'abandoned': True so the worker can run
+        the job's failure and finalization steps.
+        """
+        return await asyncio.to_thread(self._claim_items, worker_id, limit)
+    
+    def _claim_items(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        lease_expires_at = (now + timedelta(seconds=self.lease_seconds)).isoformat()
+        
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT i.id, i.job_id, i.seq, i.payload, i.status, i.attempts, j.job_type, j.job_posting_id "
+                    "FROM job_items i JOIN jobs j ON j.id = i.job_id "
+                    "WHERE i.status = 'pending' "
+                    "   OR (i.status = 'processing' AND i.lease_expires_at < ?) "
+                    "ORDER BY i.id LIMIT ?",
+                    (now.isoformat(), limit)
+                ).fetchall()
+                
+                abandoned = {
+                    row['id'] for row in rows
+                    if row['status'] == 'processing' and row['attempts'] >= self.max_attempts
+                }
+                if abandoned:
+                    conn.executemany(
+                        "UPDATE job_items SET status = 'failed', last_error = ?, locked_by = NULL, "
+                        "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                        [
+                            (f"Worker lease expired on each of {row['attempts']} attempts", now.isoformat(), row['id'])
+                            for row in rows if row['id'] in abandoned
+                        ]
+                    )
+                claimed = [row for row in rows if row['id'] not in abandoned]
+                if claimed:
+                    conn.executemany(
+                        "UPDATE job_items SET status = 'processing', locked_by = ?, lease_expires_at = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        [(worker_id, lease_expires_at, now.isoformat(), row['id']) for row in claimed]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        return [
+            {
+                'id': row['id'],
+                'job_id': row['job_id'],
+                'job_type': row['job_type'],
+                'job_posting_id': row['job_posting_id'],
+                'seq': row['seq'],
+                'attempts': row['attempts'] if row['id'] in abandoned else row['attempts'] + 1,
+                'abandoned': row['id'] in abandoned,
+                'payload': json.loads(row['payload'])
+            }
+            for row in rows
+        ]
+    
+    async def complete_item(self, item_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Checkpoint an item as completed
+        
+        Returns:
+            False if the worker's lease had expired and another worker has
+            reclaimed the item; its outcome is then left to that worker
+        """
+        return await asyncio.to_thread(self._finish_item, item_id, worker_id, 'completed', None, result)
+    
+    async def fail_item(self, item_id: int, worker_id: str, attempts: int, error: str) -> bool:
+        """
+        Record a failed attempt
+        
+        Returns:
+            True if the item will run again (re-queued for another attempt, or
+            reclaimed by another worker after this one's lease expired), False
+            if it has exhausted `max_attempts` and is now permanently failed
+        """
+        retry = attempts < self.max_attempts
+        owned = await asyncio.to_thread(self._finish_item, item_id, worker_id, 'pending' if retry else 'failed', error, None)
+        return retry or not owned
+    
+    def _finish_item(
+        self,
+        item_id: int,
+        worker_id: str,
+        status: str,
+        error: Optional[str],
+        result: Optional[Dict[str, Any]]
+    ) -> bool:
+        # Only the current lease holder may finish an item
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE job_items SET status = ?, last_error = ?, result = ?, locked_by = NULL, "
+                "lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND locked_by = ? AND status = 'processing'",
+                (status, error, json.dumps(result) if result is not None else None, self._now(), item_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    async def extend_lease(self, item_ids: List[int], worker_id: str) -> None:
+        """Push back the lease of items the worker is still working on and still holds"""
+        if item_ids:
+            await asyncio.to_thread(self._extend_lease, item_ids, worker_id)
+    
+    def _extend_lease(self, item_ids: List[int], worker_id: str) -> None:
+        lease_expires_at = (datetime.utcnow() + timedelta(seconds=self.lease_seconds)).isoformat()
+        # An item reclaimed by another worker keeps that worker's lease
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE job_items SET lease_expires_at = ? WHERE id = ? AND locked_by = ? AND status = 'processing'",
+                [(lease_expires_at, item_id, worker_id) for item_id in item_ids]
+            )
+    
+    async def retry_failed_items(self, job_id: str) -> int:
+        """Re-queue every permanently failed item of a job; returns the count"""
+        return await asyncio.to_thread(self._retry_failed_items, job_id)
+    
+    def _retry_failed_items(self, job_id: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE job_items SET status = 'pending', attempts = 0, updated_at = ? "
+                "WHERE job_id = ? AND status = 'failed'",
+                (self._now(), job_id)
+            )
+            return cursor.rowcount
+    
+    async def update_job_metadata(self, job_id: str, updates: Dict[str, Any]) -> None:
+        """Merge `updates` into a job's metadata"""
+        await asyncio.to_thread(self._update_job_metadata, job_id, updates)
+    
+    def _update_job_metadata(self, job_id: str, updates: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT metadata FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row:
+                    metadata = {**json.loads(row['metadata'] or '{}'), **updates}
+                    conn.execute(
+                        "UPDATE jobs SET metadata = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(metadata), self._now(), job_id)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    async def claim_finalization(self, job_id: str, worker_id: str) -> bool:
+        """
+        Claim the one-off finalization step of a finished job
+        
+        Several workers can see the last items of a job finish at the same
+        time; exactly one of them gets True.
+        """
+        return await asyncio.to_thread(self._claim_finalization, job_id, worker_id)
+    
+    def _claim_finalization(self, job_id: str, worker_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO job_finalizations (job_id, claimed_by, claimed_at) VALUES (?, ?, ?)",
+                (job_id, worker_id, self._now())
+            )
+            return cursor.rowcount == 1
+    
+    async def release_finalization(self, job_id: str) -> None:
+        """Give up a finalization claim (e.g. after the step failed) so it can run again"""
+        await asyncio.to_thread(self._release_finalization, job_id)
+    
+    def _release_finalization(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_finalizations WHERE job_id = ?", (job_id,))
+    
+    async def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job details and item progress counts"""
+        return await asyncio.to_thread(self._get_job_status, job_id)
+    
+    def _get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not job:
+                return None
+            
+            counts = {
+                row['status']: row['count']
+                for row in conn.execute(
+                    "SELECT status, COUNT(*) AS count FROM job_items WHERE job_id = ? GROUP BY status",
+                    (job_id,)
+                )
+            }
+            last_update = conn.execute(
+                "SELECT MAX(updated_at) AS updated_at FROM job_items WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()['updated_at']
+            errors = [
+                {'seq': row['seq'], 'error': row['last_error']}
+                for row in conn.execute(
+                    "SELECT seq, last_error FROM job_items WHERE job_id = ? AND status = 'failed' "
+                    "ORDER BY seq LIMIT 20",
+                    (job_id,)
+                )
+            ]
+        
+        pending = counts.get('pending', 0)
+        processing = counts.get('processing', 0)
+        completed = counts.get('completed', 0)
+        failed = counts.get('failed', 0)
+        total = job['total_items']
+        
+        if pending + processing == 0:
+            status = 'completed_with_errors' if failed else 'completed'
+        elif completed + failed + processing == 0:
+            status = 'queued'
+        else:
+            status = 'processing'
+        
+        return {
+            'job_id': job['id'],
+            'job_type': job['job_type'],
+            'job_posting_id': job['job_posting_id'],
+            'status': status,
+            'total_items': total,
+            'pending': pending,
+            'processing': processing,
+            'completed': completed,
+            'failed': failed,
+            'progress_percent': round((completed + failed) / total * 100, 2) if total else 100.0,
+            'created_at': job['created_at'],
+            'updated_at': last_update or job['updated_at'],
+            'metadata': json.loads(job['metadata'] or '{}'),
+            'errors': errors
+        }
+    
+    async def active_spool_dirs(self) -> Set[str]:
+        """Spool directories of jobs that still have pending or in-flight items"""
+        return await asyncio.to_thread(self._active_spool_dirs)
+    
+    def _active_spool_dirs(self) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT json_extract(j.metadata, '$.spool_dir') AS spool_dir "
+                "FROM jobs j JOIN job_items i ON i.job_id = j.id "
+                "WHERE i.status IN ('pending', 'processing')"
+            ).fetchall()
+        return {row['spool_dir'] for row in rows if row['spool_dir']}
+    
+    async def is_job_finished(self, job_id: str) -> bool:
+        """True once a job has no pending or in-flight items"""
+        status = await self.get_job_status(job_id)
+        return bool(status) and status['pending'] + status['processing'] == 0
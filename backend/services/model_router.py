@@ -0,0 +1,175 @@
+"""
+Model Router
+Sends each kind of LLM call to a deployment tier and measures every tier
+
+Callers name the task class of a call ('evaluation', 'name_extraction', ...).
+LLM_TASK_TIERS maps task classes to tiers, e.g. {"interview_analysis": "small"}.
+Tasks that are not listed, and tiers without deployments, use the default
+tier. Unless configured otherwise, the cheap tasks (name extraction, interview
+greetings, question variations, JSON repair) go to the small tier. That tier exists once
+AZURE_OPENAI_SMALL_DEPLOYMENT_NAME, or a deployment with "tier": "small", is
+configured, so moving a task to another model needs no code change.
+"""
+
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+
+from config import get_settings
+from services.deployment_pool import DeploymentPool, DEFAULT_TIER, SMALL_TIER, load_deployment_pools
+
+logger = logging.getLogger(__name__)
+
+# Task classes OpenAIService calls are labelled with
+TASK_CLASSES = (
+    'job_analysis',
+    'evaluation',
+    'evaluation_screening',
+    'name_extraction',
+    'greeting',
+    'question_generation',
+    'variation',
+    'interview_analysis',
+    'json_repair',
+    'general'
+)
+
+DEFAULT_TASK_TIERS = {
+    'evaluation_screening': SMALL_TIER,
+    'name_extraction': SMALL_TIER,
+    'greeting': SMALL_TIER,
+    'variation': SMALL_TIER,
+    'json_repair': SMALL_TIER
+}
+
+# How a structured (JSON) reply was turned into its model, see structured_output
+PARSE_OUTCOMES = ('valid', 'repaired_locally', 'repaired_by_call', 'failed')
+
+class TaskMetrics:
+    """Call, latency, token and JSON parsing counters of one task class on one tier"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latency_sum = 0.0
+        self.total_time_sum = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.parse_outcomes = dict.fromkeys(PARSE_OUTCOMES, 0)
+    
+    def record_success(self, latency_seconds: float, total_seconds: float, usage) -> None:
+        self.calls += 1
+        self.latency_sum += latency_seconds
+        self.total_time_sum += total_seconds
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+    
+    def merge(self, other: 'TaskMetrics') -> None:
+        self.calls += other.calls
+        self.failures += other.failures
+        self.latency_sum += other.latency_sum
+        self.total_time_sum += other.total_time_sum
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        for outcome, count in other.parse_outcomes.items():
+            self.parse_outcomes[outcome] += count
+    
+    def get_stats(self) -> Dict[str, Any]:
+        structured = sum(self.parse_outcomes.values())
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            # Latency of the successful request; total includes queueing for quota and retries
+            'average_latency_ms': round(self.latency_sum / self.calls * 1000) if self.calls else None,
+            'average_total_ms': round(self.total_time_sum / self.calls * 1000) if self.calls else None,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'structured_replies': {
+                **self.parse_outcomes,
+                # Share of JSON replies that were not valid as returned
+                'parse_failure_rate': round(1 - self.parse_outcomes['valid'] / structured, 4) if structured else None
+            }
+        }
+
+class ModelRouter:
+    """Routing table from task class to deployment tier"""
+    
+    def __init__(self, pools: Dict[str, DeploymentPool], task_tiers: Dict[str, str]):
+        self.pools = pools
+        self.task_tiers = task_tiers
+        self._metrics: Dict[Tuple[str, str], TaskMetrics] = {}
+        
+        for task, tier in task_tiers.items():
+            if tier not in pools:
+                logger.info(f"LLM tier '{tier}' has no deployments; '{task}' calls use the '{DEFAULT_TIER}' tier")
+    
+    def route(self, task: str) -> Tuple[str, DeploymentPool]:
+        """Tier name and deployment pool for a task class"""
+        tier = self.task_tiers.get(task, DEFAULT_TIER)
+        if tier not in self.pools:
+            tier = DEFAULT_TIER
+        return tier, self.pools[tier]
+    
+    def _task_metrics(self, task: str, tier: str) -> TaskMetrics:
+        metrics = self._metrics.get((tier, task))
+        if metrics is None:
+            metrics = self._metrics[(tier, task)] = TaskMetrics()
+        return metrics
+    
+    def record_success(self, task: str, tier: str, latency_seconds: float, total_seconds: float, usage) -> None:
+        self._task_metrics(task, tier).record_success(latency_seconds, total_seconds, usage)
+    
+    def record_failure(self, task: str, tier: str) -> None:
+        self._task_metrics(task, tier).failures += 1
+    
+    def record_parse(self, task: str, tier: str, outcome: str) -> None:
+        """Count how a structured reply was parsed (one of PARSE_OUTCOMES)"""
+        self._task_metrics(task, tier).parse_outcomes[outcome] += 1
+    
+    def set_share(self, share: float) -> None:
+        """Use only a fraction of every deployment's quota"""
+        for pool in self.pools.values():
+            pool.set_share(share)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing table plus per-tier (and per-task) metrics and deployment health"""
+        tiers = {}
+        for tier, pool in self.pools.items():
+            totals = TaskMetrics()
+            tasks = {}
+            for (metrics_tier, task), metrics in self._metrics.items():
+                if metrics_tier == tier:
+                    totals.merge(metrics)
+                    tasks[task] = metrics.get_stats()
+            
+            tiers[tier] = {
+                **totals.get_stats(),
+                'tasks': tasks,
+                'deployments': pool.get_stats()
+            }
+        
+        return {
+            'routes': {task: self.route(task)[0] for task in TASK_CLASSES},
+            'tiers': tiers
+        }
+
+def load_task_tiers() -> Dict[str, str]:
+    """Task class -> tier table from LLM_TASK_TIERS, on top of the defaults"""
+    raw = get_settings().llm_task_tiers
+    if not raw.strip():
+        return dict(DEFAULT_TASK_TIERS)
+    
+    overrides = json.loads(raw)
+    if not isinstance(overrides, dict):
+        raise ValueError("LLM_TASK_TIERS must be a JSON object of task class -> tier")
+    unknown = set(overrides) - set(TASK_CLASSES)
+    if unknown:
+        raise ValueError(f"Unknown task classes in LLM_TASK_TIERS: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_TASK_TIERS, **overrides}
+
+@lru_cache()
+def get_model_router() -> ModelRouter:
+    """Get the process-wide model router"""
+    return ModelRouter(load_deployment_pools(), load_task_tiers())
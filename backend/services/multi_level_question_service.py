@@ -3,20 +3,43 @@ Multi-Level Interview Question Generation Service
 Generates interview questions with easy, medium, and difficult variations
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 
+from config import get_settings
+from models.multi_level_questions import GeneratedQuestionSet
+
 logger = logging.getLogger(__name__)
 
 
 class MultiLevelQuestionService:
     """Service for generating multi-level interview questions"""
     
-    def __init__(self, openai_service, supabase_service):
+    # Expected answer time per difficulty level (seconds)
+    DIFFICULTY_DURATIONS = {
+        'easy': 75,
+        'medium': 105,
+        'difficult': 150
+    }
+    
+    def __init__(
+        self,
+        openai_service,
+        supabase_service,
+        max_concurrent: Optional[int] = None,
+        combined_generation: Optional[bool] = None
+    ):
+        settings = get_settings()
+        
         self.openai_service = openai_service
         self.supabase_service = supabase_service
+        self.max_concurrent = max_concurrent or settings.question_generation_max_concurrent
+        self.combined_generation = (
+            settings.question_generation_combined if combined_generation is None else combined_generation
+        )
     
     def calculate_question_distribution(self, duration_minutes: int, screening_pct: int, technical_pct: int, hr_pct: int) -> Dict[str, int]:
         """
@@ -125,45 +148,40 @@ AI Analysis Insights:
 {ai_analysis}
 """
             
-            # Generate screening questions with variations
-            screening_questions = await self._generate_category_questions(
-                category="screening",
-                base_count=distribution['screening'],
-                job_context=job_context,
-                duration_minutes=duration_minutes
-            )
-            
-            # Generate technical questions with variations
-            technical_questions = await self._generate_category_questions(
-                category="technical",
-                base_count=distribution['technical'],
-                job_context=job_context,
-                duration_minutes=duration_minutes
-            )
+            # Shared budget for every LLM call made while building this interview
+            semaphore = asyncio.Semaphore(self.max_concurrent)
             
-            # Generate HR questions with variations
-            hr_questions = await self._generate_category_questions(
-                category="hr",
-                base_count=distribution['hr'],
-                job_context=job_context,
-                duration_minutes=duration_minutes
+            # Generate all three categories and the greeting concurrently
+            screening_questions, technical_questions, hr_questions, greeting_message = await asyncio.gather(
+                self._generate_category_questions(
+                    category="screening",
+                    base_count=distribution['screening'],
+                    job_context=job_context,
+                    duration_minutes=duration_minutes,
+                    semaphore=semaphore
+                ),
+                self._generate_category_questions(
+                    category="technical",
+                    base_count=distribution['technical'],
+                    job_context=job_context,
+                    duration_minutes=duration_minutes,
+                    semaphore=semaphore
+                ),
+                self._generate_category_questions(
+                    category="hr",
+                    base_count=distribution['hr'],
+                    job_context=job_context,
+                    duration_minutes=duration_minutes,
+                    semaphore=semaphore
+                ),
+                self._generate_greeting(
+                    candidate_name=candidate_name,
+                    job_title=job_title,
+                    duration_minutes=duration_minutes,
+                    semaphore=semaphore
+                )
             )
             
-            # Generate greeting message
-            greeting_prompt = f"""Create a warm, professional greeting message for an AI interviewer starting a {duration_minutes}-minute interview for the position of {job_title}.
-            
-The greeting should:
-1. Welcome the candidate by name ({candidate_name})
-2. Introduce the AI interviewer
-3. Explain the interview structure briefly
-4. Set a positive, encouraging tone
-5. Be concise (2-3 sentences)
-
-Generate the greeting message now:"""
-            
-            greeting_message = await self.openai_service.generate_text(greeting_prompt, temperature=0.7)
-            greeting_message = greeting_message.strip()
-            
             # Prepare result
             result = {
                 'candidate_id': candidate_id,
@@ -193,14 +211,49 @@ Generate the greeting message now:"""
             logger.error(f"Error generating multi-level questions: {str(e)}")
             raise
     
+    async def _generate_greeting(
+        self,
+        candidate_name: str,
+        job_title: str,
+        duration_minutes: int,
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Generate the interviewer's opening greeting message"""
+        
+        greeting_prompt = f"""Create a warm, professional greeting message for an AI interviewer starting a {duration_minutes}-minute interview for the position of {job_title}.
+            
+The greeting should:
+1. Welcome the candidate by name ({candidate_name})
+2. Introduce the AI interviewer
+3. Explain the interview structure briefly
+4. Set a positive, encouraging tone
+5. Be concise (2-3 sentences)
+
+Generate the greeting message now:"""
+        
+        async with semaphore:
+            greeting_message = await self.openai_service.generate_text(greeting_prompt, temperature=0.7, task='greeting')
+        
+        return greeting_message.strip()
+    
     async def _generate_category_questions(
         self,
         category: str,
         base_count: int,
         job_context: str,
-        duration_minutes: int
+        duration_minutes: int,
+        semaphore: Optional[asyncio.Semaphore] = None
     ) -> List[Dict[str, Any]]:
-        """Generate questions for a specific category with difficulty variations"""
+        """
+        Generate questions for a specific category with difficulty variations
+        
+        Variation calls for all base questions run concurrently under the
+        shared semaphore. In combined mode the base questions and their
+        variations come back from one structured call instead.
+        """
+        
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent)
         
         category_config = {
             'screening': {
@@ -219,6 +272,18 @@ Generate the greeting message now:"""
         
         config = category_config[category]
         
+        if self.combined_generation:
+            combined_questions = await self._generate_category_questions_combined(
+                category=category,
+                base_count=base_count,
+                job_context=job_context,
+                config=config,
+                semaphore=semaphore
+            )
+            if combined_questions:
+                return combined_questions
+            logger.warning(f"Combined generation failed for {category} questions, falling back to per-question variations")
+        
         # Generate base questions
         base_prompt = f"""You are an expert interviewer creating {category.upper()} interview questions.
 
@@ -237,14 +302,13 @@ Requirements:
 
 Generate {base_count} base questions now:"""
         
-        base_response = await self.openai_service.generate_text(base_prompt, temperature=0.7)
+        async with semaphore:
+            base_response = await self.openai_service.generate_text(base_prompt, temperature=0.7, task='question_generation')
         base_questions = [q.strip() for q in base_response.split('\n') if q.strip() and not q.strip().startswith('#')]
         base_questions = base_questions[:base_count]
         
-        # For each base question, generate 3 difficulty variations
-        questions_with_variations = []
-        
-        for base_q in base_questions:
+        # For each base question, generate 3 difficulty variations concurrently
+        async def generate_variations(base_q: str) -> Dict[str, Any]:
             # Generate variations
             variation_prompt = f"""Given this base interview question for a {category} round:
 "{base_q}"
@@ -276,17 +340,96 @@ DIFFICULT: [question]
 
 Do not add any extra text or explanations."""
             
-            variation_response = await self.openai_service.generate_text(variation_prompt, temperature=0.6)
+            async with semaphore:
+                variation_response = await self.openai_service.generate_text(variation_prompt, temperature=0.6, task='variation')
             
             # Parse variations
             variations = self._parse_variations(variation_response)
             
-            questions_with_variations.append({
+            return {
                 'base_question': base_q,
                 'variations': variations
-            })
+            }
+        
+        questions_with_variations = await asyncio.gather(*[
+            generate_variations(base_q) for base_q in base_questions
+        ])
         
-        return questions_with_variations
+        return list(questions_with_variations)
+    
+    async def _generate_category_questions_combined(
+        self,
+        category: str,
+        base_count: int,
+        job_context: str,
+        config: Dict[str, str],
+        semaphore: asyncio.Semaphore
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate base questions and their EASY/MEDIUM/DIFFICULT variations in one call
+        
+        Returns an empty list if the response cannot be parsed so the caller
+        can fall back to the per-question flow.
+        """
+        
+        prompt = f"""You are an expert interviewer creating {category.upper()} interview questions.
+
+{job_context}
+
+Generate EXACTLY {base_count} base {category} questions that assess:
+{config['focus']}
+
+Questions should be {config['style']}, clear and direct, and progressively challenging.
+
+For each base question also write 3 variations with different difficulty levels:
+- easy: simpler phrasing, straightforward, suitable for entry-level candidates (60-90 second answer)
+- medium: standard professional phrasing, moderate depth, suitable for mid-level candidates (90-120 second answer)
+- difficult: complex, multi-layered, suitable for senior-level candidates (120-180 second answer)
+
+Respond in JSON format only:
+{{
+  "questions": [
+    {{
+      "base_question": "<question>",
+      "easy": "<easy variation>",
+      "medium": "<medium variation>",
+      "difficult": "<difficult variation>"
+    }}
+  ]
+}}"""
+        
+        try:
+            async with semaphore:
+                generated = await self.openai_service.generate_structured(
+                    prompt,
+                    schema=GeneratedQuestionSet,
+                    temperature=0.7,
+                    max_tokens=min(4000, 300 * base_count + 200),
+                    task='question_generation'
+                )
+            
+            questions_with_variations = []
+            for item in generated.questions[:base_count]:
+                base_q = item.base_question.strip()
+                variations = [
+                    {
+                        'difficulty': difficulty,
+                        'question': getattr(item, difficulty).strip(),
+                        'expected_duration_seconds': duration
+                    }
+                    for difficulty, duration in self.DIFFICULTY_DURATIONS.items()
+                ]
+                if base_q and all(v['question'] for v in variations):
+                    questions_with_variations.append({
+                        'base_question': base_q,
+                        'variations': variations
+                    })
+            
+            return questions_with_variations
+            
+        except Exception as e:
+            logger.error(f"Error in combined {category} question generation: {str(e)}")
+            return []
     
     def _parse_variations(self, response: str) -> List[Dict[str, Any]]:
         """Parse the difficulty variations from AI response"""
@@ -294,11 +437,7 @@ Do not add any extra text or explanations."""
         variations = []
         lines = response.strip().split('\n')
         
-        difficulty_map = {
-            'easy': 75,      # 75 seconds
-            'medium': 105,   # 105 seconds  
-            'difficult': 150 # 150 seconds
-        }
+        difficulty_map = self.DIFFICULTY_DURATIONS
         
         for line in lines:
             line = line.strip()
@@ -2,35 +2,285 @@
 Azure OpenAI service for job description analysis
 """
 
+import asyncio
 import json
 import logging
 import re
-from typing import Optional, Dict, Any
-from openai import AzureOpenAI
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Type
+import httpx
+from openai import APIConnectionError, InternalServerError, RateLimitError
 from config import get_settings
 from models.job_analysis import AnalysisResult
+from models.resume_evaluation import EvaluationScores
+from services.response_cache_service import get_response_cache, fingerprint_request
+from services.rate_governor import estimate_prompt_tokens, retry_after_seconds
+from services.model_router import get_model_router
+from services.structured_output import (
+    ModelT,
+    RESPONSE_FORMATS,
+    StructuredOutputError,
+    build_response_format,
+    parse_structured
+)
 
 logger = logging.getLogger(__name__)
 
+@lru_cache()
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP connection pool used by every OpenAIService instance
+    
+    Keeping one pool per process lets all services reuse warm keep-alive
+    connections to Azure instead of each opening their own.
+    """
+    settings = get_settings()
+    
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.azure_openai_max_connections,
+            max_keepalive_connections=settings.azure_openai_max_keepalive_connections
+        ),
+        timeout=httpx.Timeout(settings.azure_openai_timeout_seconds, connect=10.0)
+    )
+
+async def close_http_client() -> None:
+    """Close the shared HTTP connection pool (call on application shutdown)"""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+
 class OpenAIService:
     """Service for Azure OpenAI interactions"""
     
     def __init__(self):
         settings = get_settings()
         
-        self.client = AzureOpenAI(
-            api_key=settings.azure_openai_api_key,
-            api_version=settings.azure_openai_api_version,
-            azure_endpoint=settings.azure_openai_endpoint
+        self.deployment_name = settings.azure_openai_deployment_name
+        self.max_retries = settings.azure_openai_max_retries
+        self.rate_limit_retries = settings.azure_openai_rate_limit_retries
+        self.response_format_mode = settings.llm_response_format
+        self.json_repair_enabled = settings.llm_json_repair_enabled
+        self.response_cache = get_response_cache()
+        self.router = get_model_router()
+        
+        if self.response_format_mode not in RESPONSE_FORMATS:
+            raise ValueError(f"LLM_RESPONSE_FORMAT must be one of {', '.join(RESPONSE_FORMATS)}")
+    
+    async def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1500,
+        use_cache: bool = False,
+        task: str = 'general',
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Run a chat completion and return the message text
+        
+        With use_cache=True (and LLM_CACHE_ENABLED) byte-identical requests
+        are answered from the response cache without calling Azure. Calls
+        that expect JSON go through _structured_completion instead, which
+        caches only replies that validate.
+        
+        The task class picks the deployment tier (see services/model_router.py).
+        Each attempt goes to the least loaded healthy deployment of that tier
+        and is admitted by that deployment's rate governor. Throttled calls
+        are retried (on another deployment, or after Retry-After) up to
+        AZURE_OPENAI_RATE_LIMIT_RETRIES times, connection and server errors
+        up to AZURE_OPENAI_MAX_RETRIES times; after that the error is raised.
+        """
+        tier, pool = self.router.route(task)
+        
+        cache_key = None
+        if use_cache and self.response_cache:
+            cache_key = fingerprint_request(pool.model_key, messages, temperature, max_tokens, response_format)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("LLM response cache hit")
+                return cached
+        
+        request_args = {
+            'messages': messages,
+            'max_tokens': max_tokens
+        }
+        if temperature is not None:
+            request_args['temperature'] = temperature
+        if response_format is not None:
+            request_args['response_format'] = response_format
+        
+        estimated_tokens = estimate_prompt_tokens(messages) + max_tokens
+        throttles = 0
+        errors = 0
+        call_started = time.monotonic()
+        while True:
+            deployment = pool.choose(estimated_tokens)
+            governor = deployment.governor
+            await governor.acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                raw_response = await deployment.client.chat.completions.with_raw_response.create(
+                    model=deployment.model,
+                    **request_args
+                )
+                response = raw_response.parse()
+            except RateLimitError as e:
+                throttles += 1
+                pause = governor.release_throttled(retry_after_seconds(e.response.headers))
+                if throttles > self.rate_limit_retries:
+                    self.router.record_failure(task, tier)
+                    raise
+                logger.warning(
+                    f"Azure OpenAI deployment {deployment.name} throttled the request for {pause:.1f}s "
+                    f"(attempt {throttles})"
+                )
+                continue
+            except (APIConnectionError, InternalServerError) as e:
+                governor.release_failed()
+                pool.record_error(deployment, e)
+                errors += 1
+                if errors > self.max_retries:
+                    self.router.record_failure(task, tier)
+                    raise
+                logger.warning(f"Azure OpenAI deployment {deployment.name} failed, retrying (attempt {errors}): {str(e)}")
+                await asyncio.sleep(min(8.0, 0.5 * 2 ** errors))
+                continue
+            except BaseException:
+                governor.release_failed()
+                self.router.record_failure(task, tier)
+                raise
+            
+            latency = time.monotonic() - started
+            governor.release_completed(
+                latency,
+                latency_key=task,
+                tokens_used=response.usage.total_tokens if response.usage else None,
+                headers=raw_response.headers
+            )
+            pool.record_success(deployment, task)
+            self.router.record_success(task, tier, latency, time.monotonic() - call_started, response.usage)
+            break
+        
+        content = response.choices[0].message.content
+        
+        if cache_key and content:
+            await self.response_cache.set(cache_key, content)
+        
+        return content
+    
+    async def _structured_completion(
+        self,
+        messages: List[Dict[str, str]],
+        schema: Type[ModelT],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1500,
+        use_cache: bool = False,
+        task: str = 'general'
+    ) -> ModelT:
+        """
+        Run a chat completion whose reply must be a JSON object matching `schema`
+        
+        The request asks for JSON (LLM_RESPONSE_FORMAT). A reply that does not
+        validate is repaired locally first; if that is not enough, a short
+        'json_repair' call (small tier by default) fixes the reply against
+        the validation errors instead of re-running the whole prompt. Only
+        validated replies are cached.
+        
+        Raises:
+            StructuredOutputError: if the reply cannot be turned into `schema`
+        """
+        tier, pool = self.router.route(task)
+        response_format = build_response_format(schema, self.response_format_mode)
+        
+        cache_key = None
+        if use_cache and self.response_cache:
+            cache_key = fingerprint_request(pool.model_key, messages, temperature, max_tokens, response_format)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                try:
+                    return schema.model_validate_json(cached)
+                except ValueError:
+                    # Cached before the schema changed; ask again
+                    logger.debug("Discarding cached LLM response that no longer validates")
+        
+        content = await self._chat_completion(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            task=task,
+            response_format=response_format
         )
         
-        self.deployment_name = settings.azure_openai_deployment_name
+        try:
+            result, repaired = parse_structured(content, schema)
+            outcome = 'repaired_locally' if repaired else 'valid'
+        except StructuredOutputError as e:
+            if not self.json_repair_enabled:
+                self.router.record_parse(task, tier, 'failed')
+                raise
+            logger.warning(f"Invalid JSON reply for '{task}', requesting a repair: {str(e)[:200]}")
+            try:
+                result = await self._repair_structured_reply(content, schema, str(e), max_tokens)
+            except Exception:
+                self.router.record_parse(task, tier, 'failed')
+                raise
+            outcome = 'repaired_by_call'
         
+        self.router.record_parse(task, tier, outcome)
+        if cache_key:
+            await self.response_cache.set(cache_key, result.model_dump_json())
+        
+        return result
+    
+    async def _repair_structured_reply(
+        self,
+        content: Optional[str],
+        schema: Type[ModelT],
+        error: str,
+        max_tokens: int
+    ) -> ModelT:
+        """Ask the model to fix an invalid JSON reply; only the reply is resent, not the prompt"""
+        repaired_text = await self._chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You repair malformed JSON. Return only the corrected JSON object, keeping the "
+                        "original content wherever possible. It must match this JSON schema:\n"
+                        + json.dumps(schema.model_json_schema())
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": f"Validation errors:\n{error[:2000]}\n\nJSON to repair:\n{content or ''}"
+                }
+            ],
+            temperature=0.0,
+            max_tokens=max_tokens,
+            task='json_repair',
+            response_format=build_response_format(schema, self.response_format_mode)
+        )
+        return parse_structured(repaired_text, schema)[0]
+    
+    def describe_route(self, task: str) -> Dict[str, str]:
+        """Tier and model(s) that calls of a task class go to"""
+        tier, pool = self.router.route(task)
+        return {'tier': tier, 'model': pool.model_key}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Operational statistics for monitoring endpoints"""
+        return {
+            'deployment': self.deployment_name,
+            'routing': self.router.get_stats(),
+            'response_cache': self.response_cache.get_stats() if self.response_cache else None
+        }
+    
     async def test_connection(self) -> bool:
         """Test connection to Azure OpenAI"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
+            await self._chat_completion(
                 messages=[{"role": "user", "content": "Hello"}],
                 max_tokens=10
             )
@@ -53,8 +303,7 @@ class OpenAIService:
             prompt = self._create_analysis_prompt(title, description, requirements)
             
             # Call Azure OpenAI
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
+            analysis_result = await self._structured_completion(
                 messages=[
                     {
                         "role": "system", 
@@ -65,27 +314,21 @@ class OpenAIService:
                         "content": prompt
                     }
                 ],
+                schema=AnalysisResult,
                 temperature=0.2,
-                max_tokens=2000
+                max_tokens=2000,
+                use_cache=True,
+                task='job_analysis'
             )
             
-            # Parse the response
-            analysis_text = response.choices[0].message.content
-            logger.info("Received analysis from Azure OpenAI")
-            
-            # Parse JSON response from GPT-4
-            analysis_data = json.loads(analysis_text)
-            
-            # Create AnalysisResult object
-            analysis_result = AnalysisResult(**analysis_data)
-            
             logger.info(f"Successfully analyzed job: {title}")
             return analysis_result
             
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
+            # Raised rather than replaced by a placeholder analysis, which would be
+            # saved to the job posting and skew every evaluation against it
             logger.error(f"Failed to parse JSON response from GPT-4: {str(e)}")
-            # Return a fallback analysis
-            return self._create_fallback_analysis(title, description)
+            raise
             
         except Exception as e:
             logger.error(f"Error in job description analysis: {str(e)}")
@@ -152,39 +395,21 @@ class OpenAIService:
         - Return ONLY the JSON object, no additional text
         """
     
-    def _create_fallback_analysis(self, title: str, description: str) -> AnalysisResult:
-        """Create a fallback analysis if GPT-4 response parsing fails"""
-        return AnalysisResult(
-            key_skills=["Analysis pending"],
-            required_experience="To be determined",
-            education_requirements=[],
-            responsibilities=[],
-            qualifications=[],
-            nice_to_have=[],
-            job_level="mid",
-            remote_work=None,
-            salary_range=None,
-            company_benefits=[],
-            industry=None,
-            job_summary=f"Analysis pending for {title}",
-            difficulty_score=5,
-            ai_confidence_score=0.5
-        )
-    
-    async def evaluate_resume(self, evaluation_prompt: str) -> str:
+    async def evaluate_resume(self, evaluation_prompt: str, task: str = 'evaluation') -> EvaluationScores:
         """
         Evaluate a resume against job requirements using GPT-4
         
         Args:
             evaluation_prompt: Detailed prompt for resume evaluation
+            task: 'evaluation', or 'evaluation_screening' for the first,
+                small-model pass of a cascade evaluation
             
         Returns:
-            JSON string with evaluation scores and details
+            Validated evaluation scores and details
         """
         try:
             # Call Azure OpenAI for resume evaluation
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
+            evaluation = await self._structured_completion(
                 messages=[
                     {
                         "role": "system",
@@ -195,31 +420,23 @@ class OpenAIService:
                         "content": evaluation_prompt
                     }
                 ],
+                schema=EvaluationScores,
                 temperature=0.3,  # Lower temperature for more consistent scoring
-                max_tokens=2000
+                max_tokens=2000,
+                use_cache=True,
+                task=task
             )
             
             # Get the evaluation response
-            evaluation_text = response.choices[0].message.content
             logger.info("Received resume evaluation from Azure OpenAI")
             
-            return evaluation_text
+            return evaluation
             
         except Exception as e:
+            # Raised rather than replaced by default scores, which would pollute rankings;
+            # the resume is stored as failed and batch jobs retry it
             logger.error(f"Error evaluating resume: {str(e)}")
-            # Return a default evaluation on error
-            return json.dumps({
-                "skills_score": 50,
-                "experience_score": 50,
-                "education_score": 50,
-                "skills_matched": [],
-                "skills_missing": [],
-                "experience_details": {"years": 0, "relevance": "Error in evaluation"},
-                "education_details": {"highest_degree": "Unknown", "relevance": "Error in evaluation"},
-                "summary": "Evaluation could not be completed due to an error",
-                "strengths": [],
-                "improvements": ["Unable to evaluate"]
-            })
+            raise
     
     def _get_resume_evaluation_system_prompt(self) -> str:
         """Get the system prompt for resume evaluation"""
@@ -256,16 +473,23 @@ class OpenAIService:
         Focus on actual qualifications rather than demographic factors.
         """
     
-    async def extract_candidate_name(self, resume_text: str) -> str:
+    async def extract_candidate_name(self, resume_text: str, heuristic_first: bool = False) -> str:
         """
         Extract candidate's full name from resume text using GPT-4
         
         Args:
             resume_text: Raw resume text
+            heuristic_first: Try the rule-based extractor first and only call
+                the LLM when it finds no name
             
         Returns:
             Extracted candidate name
         """
+        if heuristic_first:
+            name = self._extract_name_fallback(resume_text)
+            if name != "Unknown Candidate":
+                return name
+        
         try:
             # Create prompt for name extraction
             prompt = f"""
@@ -284,8 +508,7 @@ class OpenAIService:
             Respond with ONLY the candidate's name, nothing else.
             """
             
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
+            extracted_name = await self._chat_completion(
                 messages=[
                     {
                         "role": "system",
@@ -297,10 +520,12 @@ class OpenAIService:
                     }
                 ],
                 temperature=0.1,  # Very low temperature for consistent results
-                max_tokens=50  # Name should be short
+                max_tokens=50,  # Name should be short
+                use_cache=True,
+                task='name_extraction'
             )
             
-            extracted_name = response.choices[0].message.content.strip()
+            extracted_name = (extracted_name or "").strip()
             
             # Clean up the extracted name
             cleaned_name = self._clean_extracted_name(extracted_name)
@@ -351,7 +576,13 @@ class OpenAIService:
         
         return "Unknown Candidate"
     
-    async def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1500) -> str:
+    async def generate_text(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        task: str = 'general'
+    ) -> str:
         """
         Generate text using Azure OpenAI with a custom prompt
         
@@ -359,13 +590,14 @@ class OpenAIService:
             prompt: The prompt to send to the model
             temperature: Creativity level (0.0 to 1.0)
             max_tokens: Maximum tokens to generate
+            task: Task class of the call, which picks the model tier
+                (see services/model_router.py)
             
         Returns:
             Generated text response
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
+            generated_text = await self._chat_completion(
                 messages=[
                     {
                         "role": "user",
@@ -373,14 +605,61 @@ class OpenAIService:
                     }
                 ],
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                task=task
             )
             
-            generated_text = response.choices[0].message.content
             logger.info("Successfully generated text from Azure OpenAI")
             
             return generated_text
             
         except Exception as e:
             logger.error(f"Error generating text: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+    
+    async def generate_structured(
+        self,
+        prompt: str,
+        schema: Type[ModelT],
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        task: str = 'general'
+    ) -> ModelT:
+        """
+        Generate a JSON reply to a custom prompt, validated against a Pydantic model
+        
+        Args:
+            prompt: The prompt to send to the model; it must ask for JSON
+            schema: Pydantic model the reply has to match
+            temperature: Creativity level (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            task: Task class of the call, which picks the model tier
+                (see services/model_router.py)
+        
+        Returns:
+            The validated model
+        
+        Raises:
+            StructuredOutputError: if the reply cannot be repaired into `schema`
+        """
+        try:
+            result = await self._structured_completion(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                schema=schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                task=task
+            )
+            
+            logger.info(f"Successfully generated {schema.__name__} from Azure OpenAI")
+            
+            return result
+        
+        except Exception as e:
+            logger.error(f"Error generating {schema.__name__}: {str(e)}")
+            raise e
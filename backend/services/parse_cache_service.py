@@ -0,0 +1,153 @@
+"""
+Parse Cache Service
+Content-addressed, size-bounded SQLite cache for parsed resumes
+
+Entries are keyed by the SHA-256 of the file bytes plus the parser
+configuration, so the same PDF uploaded against several job postings is only
+parsed once. The database file can be shared by the API and worker processes.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    cache_key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_parse_cache_last_accessed ON parse_cache(last_accessed);
+"""
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ParseCacheService:
+    """Service for caching parsed resume data by content hash"""
+    
+    def __init__(self, db_path: Optional[str] = None, max_bytes: Optional[int] = None):
+        settings = get_settings()
+        
+        self.db_path = Path(db_path or settings.parse_cache_db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or settings.parse_cache_max_bytes
+        
+        self.hits = 0
+        self.misses = 0
+        
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+    
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh copy of the cached parse, or None on a miss"""
+        value = await asyncio.to_thread(self._get, cache_key)
+        
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return json.loads(value)
+    
+    def _get(self, cache_key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM parse_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE parse_cache SET last_accessed = ? WHERE cache_key = ?",
+                    (time.time(), cache_key)
+                )
+        return row[0] if row else None
+    
+    async def set(self, cache_key: str, parsed_data: Dict[str, Any]) -> None:
+        """Store a parse result and evict least recently used entries over the size limit"""
+        try:
+            value = json.dumps(parsed_data, default=str)
+            await asyncio.to_thread(self._set, cache_key, value)
+        except Exception as e:
+            # A cache write failure must never fail the parse itself
+            logger.error(f"Error writing parse cache: {str(e)}")
+    
+    def _set(self, cache_key: str, value: str) -> None:
+        now = time.time()
+        size_bytes = len(value.encode('utf-8'))
+        
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache (cache_key, value, size_bytes, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (cache_key, value, size_bytes, now, now)
+                )
+                
+                total_bytes = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM parse_cache").fetchone()[0]
+                if total_bytes > self.max_bytes:
+                    self._evict(conn, total_bytes - self.max_bytes)
+                
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def _evict(self, conn: sqlite3.Connection, bytes_to_free: int) -> None:
+        """Delete least recently used entries until `bytes_to_free` is reclaimed"""
+        freed = 0
+        evicted = []
+        for cache_key, size_bytes in conn.execute(
+            "SELECT cache_key, size_bytes FROM parse_cache ORDER BY last_accessed"
+        ):
+            if freed >= bytes_to_free:
+                break
+            evicted.append((cache_key,))
+            freed += size_bytes
+        
+        conn.executemany("DELETE FROM parse_cache WHERE cache_key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} parse cache entries ({freed} bytes)")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current cache size"""
+        with self._connect() as conn:
+            entries, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM parse_cache"
+            ).fetchone()
+        
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'size_bytes': total_bytes,
+            'max_bytes': self.max_bytes
+        }
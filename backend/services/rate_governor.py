@@ -0,0 +1,294 @@
+"""
+Rate Governor
+Keeps Azure OpenAI traffic at the deployment's quota instead of past it
+
+Every completion reserves its estimated cost from two token buckets, refilled
+at the deployment's tokens- and requests-per-minute quota. The token cost is
+prompt tokens plus `max_tokens`, the same estimate Azure meters TPM with.
+Concurrency adapts AIMD-style. It grows by one per completed call until the
+first throttle (slow start), and after that by one per window of calls. It is
+halved when Azure throttles a request, and cut back when latency climbs well
+above the best seen for that kind of call. A 429's Retry-After pauses every
+caller of the deployment in the process until it has passed.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Buckets hold this many seconds of quota; Azure enforces quotas over short windows
+BURST_SECONDS = 10.0
+
+# Fallback pause after a 429 without Retry-After: doubles per consecutive throttle, capped
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+# Concurrency cut when latency, rather than a 429, signals congestion
+LATENCY_BACKOFF = 0.8
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt token count (~4 characters per token plus per-message overhead)"""
+    return sum(len(message.get('content') or '') // 4 + 4 for message in messages) + 3
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Delay requested by a throttled response, if it says"""
+    if headers is None:
+        return None
+    
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    
+    value = headers.get('retry-after')
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+def _header_int(headers, name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Continuously refilled budget; unlimited when the rate is 0"""
+    
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = self.rate * BURST_SECONDS
+        self.level = self.capacity
+        self._refilled_at = time.monotonic()
+    
+    @property
+    def limited(self) -> bool:
+        return self.rate > 0
+    
+    def refill(self, now: float) -> None:
+        if self.limited:
+            self.level = min(self.capacity, self.level + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (capped at a full bucket)"""
+        if not self.limited:
+            return 0.0
+        shortfall = min(amount, self.capacity) - self.level
+        return shortfall / self.rate if shortfall > 0 else 0.0
+    
+    def take(self, amount: float) -> None:
+        if self.limited:
+            self.level -= min(amount, self.capacity)
+
+class RateGovernor:
+    """Admission control for the completions of one deployment, shared by a process"""
+    
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        requests_per_minute: int,
+        min_concurrency: int,
+        max_concurrency: int,
+        latency_backoff_factor: float
+    ):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.latency_backoff_factor = latency_backoff_factor
+        self.share = 1.0
+        
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        
+        self.limit = float(self.min_concurrency)
+        self._slow_start_until = float(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_throttles = 0
+        
+        # latency key -> [best seen, moving average] in seconds
+        self._latency: Dict[Any, List[float]] = {}
+        
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+        self.tokens_used = 0
+        # Set (and replaced) whenever a slot is released, waking waiting callers
+        self._released: Optional[asyncio.Event] = None
+    
+    def set_share(self, share: float) -> None:
+        """Use only a fraction of the quota (e.g. one of several worker processes)"""
+        self.share = share
+        self.tokens = TokenBucket(self.tokens_per_minute * share)
+        self.requests = TokenBucket(self.requests_per_minute * share)
+    
+    async def acquire(self, estimated_tokens: int) -> None:
+        """
+        Wait for a concurrency slot and enough quota for one call
+        
+        Every acquire() must be followed by exactly one release_*() call.
+        """
+        if self._released is None:
+            self._released = asyncio.Event()
+        
+        while True:
+            now = time.monotonic()
+            self.tokens.refill(now)
+            self.requests.refill(now)
+            
+            wait = self.paused_until - now
+            if wait <= 0 and self.in_flight < int(self.limit):
+                wait = max(self.tokens.wait_time(estimated_tokens), self.requests.wait_time(1))
+                if wait <= 0:
+                    self.tokens.take(estimated_tokens)
+                    self.requests.take(1)
+                    self.in_flight += 1
+                    return
+            
+            # Without a timeout, only a release can free the slot we are waiting for
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout=wait if wait > 0 else None)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.waiting -= 1
+    
+    def can_admit(self, estimated_tokens: int) -> bool:
+        """True if acquire() would not have to wait"""
+        now = time.monotonic()
+        self.tokens.refill(now)
+        self.requests.refill(now)
+        
+        return (
+            now >= self.paused_until
+            and self.in_flight < int(self.limit)
+            and self.tokens.wait_time(estimated_tokens) <= 0
+            and self.requests.wait_time(1) <= 0
+        )
+    
+    def latency(self, latency_key: Any) -> Optional[Tuple[float, float]]:
+        """Best and moving-average latency (seconds) of one kind of call, if seen"""
+        best_average = self._latency.get(latency_key)
+        return tuple(best_average) if best_average else None
+    
+    def reset_latency(self) -> None:
+        """Forget observed latencies (e.g. after the deployment was out of rotation)"""
+        self._latency.clear()
+    
+    def release_completed(
+        self,
+        latency_seconds: float,
+        latency_key: Any = None,
+        tokens_used: Optional[int] = None,
+        headers=None
+    ) -> None:
+        """Account for a successful call and grow (or trim) concurrency"""
+        self.completed += 1
+        self.tokens_used += tokens_used or 0
+        self._consecutive_throttles = 0
+        now = time.monotonic()
+        
+        # Azure reports what is left of the quota; never assume more than that
+        if headers is not None:
+            remaining_tokens = _header_int(headers, 'x-ratelimit-remaining-tokens')
+            if remaining_tokens is not None and self.tokens.limited:
+                self.tokens.level = min(self.tokens.level, remaining_tokens)
+            remaining_requests = _header_int(headers, 'x-ratelimit-remaining-requests')
+            if remaining_requests is not None and self.requests.limited:
+                self.requests.level = min(self.requests.level, remaining_requests)
+        
+        best, average = self._latency.get(latency_key, (latency_seconds, latency_seconds))
+        best = min(best, latency_seconds)
+        average = 0.8 * average + 0.2 * latency_seconds
+        self._latency[latency_key] = [best, average]
+        
+        if average > best * self.latency_backoff_factor and now - self._last_decrease > average:
+            self._decrease(LATENCY_BACKOFF, now)
+        elif self.in_flight < int(self.limit):
+            # The limit was not what held callers back; growing it would be untested
+            pass
+        elif self.limit < self._slow_start_until:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        
+        self._release()
+    
+    def release_throttled(self, retry_after: Optional[float]) -> float:
+        """
+        Account for a 429: halve concurrency and pause until Retry-After
+        
+        Returns:
+            The pause in seconds
+        """
+        self.throttled += 1
+        self._consecutive_throttles += 1
+        now = time.monotonic()
+        
+        if retry_after is None:
+            retry_after = min(
+                MAX_RETRY_AFTER_SECONDS,
+                DEFAULT_RETRY_AFTER_SECONDS * 2 ** (self._consecutive_throttles - 1)
+            )
+        
+        # Calls in flight when the quota ran out are throttled together; back off once
+        if now >= self.paused_until:
+            self._decrease(0.5, now)
+        self.paused_until = max(self.paused_until, now + retry_after)
+        
+        self._release()
+        return retry_after
+    
+    def release_failed(self) -> None:
+        """Account for a call that failed for any other reason"""
+        self.failed += 1
+        self._release()
+    
+    def _decrease(self, factor: float, now: float) -> None:
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+        self._slow_start_until = self.limit
+        self._last_decrease = now
+    
+    def _release(self) -> None:
+        self.in_flight -= 1
+        if self._released is not None:
+            self._released.set()
+            self._released = asyncio.Event()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Current limits and counters for monitoring endpoints"""
+        now = time.monotonic()
+        self.tokens.refill(now)
+        self.requests.refill(now)
+        
+        return {
+            'tokens_per_minute': self.tokens_per_minute * self.share if self.tokens.limited else None,
+            'requests_per_minute': self.requests_per_minute * self.share if self.requests.limited else None,
+            'concurrency_limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'tokens_available': int(self.tokens.level) if self.tokens.limited else None,
+            'paused_for_seconds': round(max(0.0, self.paused_until - now), 2),
+            'completed': self.completed,
+            'failed': self.failed,
+            'throttled': self.throttled,
+            'tokens_used': self.tokens_used,
+            'latency_ms': {
+                str(key): {'best': round(best * 1000), 'average': round(average * 1000)}
+                for key, (best, average) in self._latency.items()
+            }
+        }
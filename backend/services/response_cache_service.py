@@ -0,0 +1,268 @@
+"""
+LLM Response Cache Service
+Opt-in cache for deterministic-ish chat completions, keyed by a prompt fingerprint
+
+Backends:
+- memory: per-process LRU with TTL (default)
+- sqlite: shared by every process on the host, LRU by last access with TTL
+- redis: shared across hosts; TTL via key expiry, eviction left to Redis' maxmemory policy
+"""
+
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+def fingerprint_request(
+    deployment: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    response_format: Optional[Dict[str, Any]] = None
+) -> str:
+    """Stable hash of everything that determines a completion"""
+    request = {
+        'deployment': deployment,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }
+    if response_format is not None:
+        request['response_format'] = response_format
+    
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache(abc.ABC):
+    """Base class for response cache backends; tracks hit/miss counters"""
+    
+    backend_name = "base"
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self._get(key)
+        except Exception as e:
+            # Like writes, reads are best effort: a broken cache is a miss
+            logger.error(f"Error reading LLM response cache: {str(e)}")
+            value = None
+        
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await self._set(key, value)
+        except Exception as e:
+            # Caching is best effort; never fail the completion because of it
+            logger.error(f"Error writing LLM response cache: {str(e)}")
+    
+    @abc.abstractmethod
+    async def _get(self, key: str) -> Optional[str]:
+        """The cached value, or None if there is none (or it expired)"""
+    
+    @abc.abstractmethod
+    async def _set(self, key: str, value: str) -> None:
+        """Store a value for ttl_seconds"""
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend_name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries
+        }
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache with TTL"""
+    
+    backend_name = "memory"
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def _get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def _set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats['entries'] = len(self._entries)
+        return stats
+
+class SQLiteResponseCache(ResponseCache):
+    """SQLite cache shared by all processes on a host"""
+    
+    backend_name = "sqlite"
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_response_cache (
+        cache_key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        last_accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_response_cache(last_accessed);
+    """
+    
+    def __init__(self, ttl_seconds: int, max_entries: int, db_path: str):
+        super().__init__(ttl_seconds, max_entries)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+    
+    async def _get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, key)
+    
+    def _get_sync(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_response_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET last_accessed = ? WHERE cache_key = ?", (now, key)
+            )
+            return row[0]
+    
+    async def _set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set_sync, key, value)
+    
+    def _set_sync(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (cache_key, value, expires_at, last_accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now)
+            )
+            conn.execute("DELETE FROM llm_response_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_response_cache WHERE cache_key IN ("
+                "  SELECT cache_key FROM llm_response_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,)
+            )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        with self._connect() as conn:
+            stats['entries'] = conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+        return stats
+
+class RedisResponseCache(ResponseCache):
+    """Redis-backed cache; works with any Redis-compatible server"""
+    
+    backend_name = "redis"
+    
+    KEY_PREFIX = "llm_cache:"
+    
+    def __init__(self, ttl_seconds: int, max_entries: int, redis_url: str):
+        super().__init__(ttl_seconds, max_entries)
+        
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImportError("LLM_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        
+        self.client = redis.from_url(redis_url, decode_responses=True)
+    
+    async def _get(self, key: str) -> Optional[str]:
+        return await self.client.get(self.KEY_PREFIX + key)
+    
+    async def _set(self, key: str, value: str) -> None:
+        await self.client.set(self.KEY_PREFIX + key, value, ex=self.ttl_seconds)
+
+@lru_cache()
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache configured in Settings
+    
+    Returns None when LLM_CACHE_ENABLED is false.
+    """
+    settings = get_settings()
+    
+    if not settings.llm_cache_enabled:
+        return None
+    
+    backend = settings.llm_cache_backend.lower()
+    
+    if backend == "memory":
+        cache = MemoryResponseCache(settings.llm_cache_ttl_seconds, settings.llm_cache_max_entries)
+    elif backend == "sqlite":
+        cache = SQLiteResponseCache(
+            settings.llm_cache_ttl_seconds,
+            settings.llm_cache_max_entries,
+            settings.llm_cache_db_path
+        )
+    elif backend == "redis":
+        cache = RedisResponseCache(
+            settings.llm_cache_ttl_seconds,
+            settings.llm_cache_max_entries,
+            settings.llm_cache_redis_url
+        )
+    else:
+        raise ValueError(f"Unknown LLM_CACHE_BACKEND: {settings.llm_cache_backend}")
+    
+    logger.info(f"LLM response cache enabled ({backend} backend)")
+    return cache
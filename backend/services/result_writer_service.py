@@ -0,0 +1,213 @@
+"""
+Result Writer Service
+Write-behind buffer that batches resume_results rows into multi-row inserts
+
+Evaluations hand their rows to the writer instead of inserting them one by one.
+A background task flushes the buffer whenever it reaches `batch_size` rows or
+`flush_interval` seconds have passed since the first buffered row, so a large
+batch costs one PostgREST round trip per `batch_size` resumes.
+
+- Backpressure: at most `max_pending` rows are buffered; submit() waits for room
+- Retries: a failed insert is retried with exponential backoff, then the batch
+  is written row by row so a single bad row cannot drop its neighbours
+- Shutdown: close() drains the buffer before returning
+- Listener: `on_written` receives the rows of each flush as the database
+  stored them (with their `id` and `created_at`), in one call per flush
+"""
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from config import get_settings
+from services.evaluation_stats_service import get_evaluation_stats_store
+from services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+class ResultWriterService:
+    """Buffers rows for a Supabase table and writes them in bulk"""
+    
+    def __init__(
+        self,
+        table: str = 'resume_results',
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        settings = get_settings()
+        
+        self.table = table
+        self.client = SupabaseService().client
+        self.batch_size = batch_size or settings.result_writer_batch_size
+        self.flush_interval = flush_interval or settings.result_writer_flush_interval_seconds
+        self.max_pending = max_pending or settings.result_writer_max_pending
+        self.max_retries = max_retries if max_retries is not None else settings.result_writer_max_retries
+        self.on_written = on_written
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches_written = 0
+    
+    def _ensure_started(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._flusher = asyncio.create_task(self._run())
+    
+    async def submit(self, row: Dict[str, Any]) -> "asyncio.Future[bool]":
+        """
+        Buffer a row for insertion, waiting if the buffer is full
+        
+        Returns:
+            A future that resolves to True once the row is written, or False
+            if it could not be written after all retries
+        """
+        self._ensure_started()
+        
+        written = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, written))
+        return written
+    
+    async def flush(self) -> None:
+        """Wait until every buffered row has been written (or given up on)"""
+        if self._queue is not None and self._flusher is not None and not self._flusher.done():
+            await self._queue.join()
+    
+    async def close(self) -> None:
+        """Drain the buffer and stop the background flusher"""
+        await self.flush()
+        
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        
+        logger.info(
+            f"Result writer closed ({self.rows_written} rows in {self.batches_written} batches, "
+            f"{self.rows_failed} failed)"
+        )
+    
+    async def _run(self) -> None:
+        """Collect rows until the batch is full or the time window closes, then write"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error writing {self.table} batch: {str(e)}")
+                self._resolve(batch, False)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _write_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        # PostgREST bulk inserts need every row to have the same columns, and
+        # completed and failed evaluations carry different ones
+        groups: Dict[Tuple[str, ...], List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        for entry in batch:
+            groups.setdefault(tuple(sorted(entry[0])), []).append(entry)
+        
+        stored: List[Dict[str, Any]] = []
+        for entries in groups.values():
+            rows = [row for row, _ in entries]
+            
+            inserted = await self._insert_with_retry(rows)
+            if inserted is not None:
+                self.batches_written += 1
+                self.rows_written += len(rows)
+                stored.extend(inserted)
+                self._resolve(entries, True)
+                logger.info(f"Stored {len(rows)} rows in {self.table}")
+                continue
+            
+            if len(entries) == 1:
+                self.rows_failed += 1
+                self._resolve(entries, False)
+                continue
+            
+            # Isolate the row(s) that make the bulk insert fail
+            logger.warning(f"Bulk insert of {len(rows)} rows into {self.table} failed, writing rows individually")
+            for entry in entries:
+                inserted = await self._insert([entry[0]])
+                if inserted is not None:
+                    self.rows_written += 1
+                    stored.extend(inserted)
+                else:
+                    self.rows_failed += 1
+                self._resolve([entry], inserted is not None)
+        
+        if stored and self.on_written is not None:
+            try:
+                await self.on_written(stored)
+            except Exception as e:
+                logger.error(f"Error handling {len(stored)} rows written to {self.table}: {str(e)}")
+    
+    async def _insert_with_retry(self, rows: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        for attempt in range(self.max_retries + 1):
+            inserted = await self._insert(rows)
+            if inserted is not None:
+                return inserted
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        return None
+    
+    async def _insert(self, rows: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Insert rows; returns them as stored (or as given, if not returned), None on failure"""
+        try:
+            response = await asyncio.to_thread(lambda: self.client.table(self.table).insert(rows).execute())
+            return response.data or rows
+        except Exception as e:
+            logger.error(f"Error inserting {len(rows)} rows into {self.table}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _resolve(entries: List[Tuple[Dict[str, Any], asyncio.Future]], written: bool) -> None:
+        for _, future in entries:
+            if not future.done():
+                future.set_result(written)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth and write counters"""
+        return {
+            'table': self.table,
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'rows_written': self.rows_written,
+            'rows_failed': self.rows_failed,
+            'batches_written': self.batches_written,
+            'batch_size': self.batch_size,
+            'flush_interval_seconds': self.flush_interval
+        }
+
+@lru_cache()
+def get_result_writer() -> ResultWriterService:
+    """Get the process-wide resume_results writer, which keeps the evaluation statistics current"""
+    return ResultWriterService(on_written=get_evaluation_stats_store().add)
+
+async def close_result_writer() -> None:
+    """Flush and stop the shared result writer (call on shutdown)"""
+    if get_result_writer.cache_info().currsize:
+        await get_result_writer().close()
+        get_result_writer.cache_clear()
@@ -8,11 +8,21 @@ import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
-import re
 
+import numpy as np
+
+from config import get_settings
 from services.openai_service import OpenAIService
+from services.structured_output import StructuredOutputError
 from services.supabase_service import SupabaseService
 from services.llamaparse_service import LlamaParseService
+from services.job_context_cache import JobContext, get_job_context_cache
+from services.result_writer_service import get_result_writer
+from services.skill_matcher import get_skill_matcher
+from services.embedding_service import get_embedder, top_k_similar
+from services.vector_store_service import VectorStoreService
+from services.resume_index_service import get_resume_index
+from utils.file_utils import cleanup_temp_file, download_resume_from_url
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +34,34 @@ class ResumeEvaluationService:
     EXPERIENCE_WEIGHT = 0.30  # 30% weight for experience
     EDUCATION_WEIGHT = 0.10  # 10% weight for education
     
+    # Lowest overall score of each recommendation level, best first
+    RECOMMENDATION_THRESHOLDS = [(85, 'STRONG_MATCH'), (70, 'GOOD_MATCH'), (50, 'FAIR_MATCH')]
+    
     def __init__(self):
         """Initialize services"""
         self.openai_service = OpenAIService()
         self.supabase_service = SupabaseService()
         self.llamaparse_service = LlamaParseService()
+        self._vector_store: Optional[VectorStoreService] = None
+        # Index updates waiting for their row to be written
+        self._pending_tasks = set()
+    
+    @property
+    def vector_store(self) -> VectorStoreService:
+        # Opened on first use; only two-stage shortlisting needs it
+        if self._vector_store is None:
+            self._vector_store = VectorStoreService()
+        return self._vector_store
     
     async def evaluate_resume(
         self,
         job_posting_id: str,
         resume_file_path: str,
         resume_file_name: str,
-        resume_file_url: Optional[str] = None
+        resume_file_url: Optional[str] = None,
+        wait_for_store: bool = False,
+        extra_metadata: Optional[Dict[str, Any]] = None,
+        store_failure: bool = True
     ) -> Dict[str, Any]:
         """
         Evaluate a single resume against a job posting
@@ -45,6 +71,12 @@ class ResumeEvaluationService:
             resume_file_path: Path to the resume file
             resume_file_name: Original filename
             resume_file_url: URL where resume is stored
+            wait_for_store: Wait until the result row is written (raises if it
+                could not be); by default it is written behind in bulk
+            extra_metadata: Extra entries for evaluation_metadata (e.g. the
+                retrieval score of a shortlisted resume)
+            store_failure: Store a failed result row if the evaluation fails;
+                callers that retry store one themselves once they give up
             
         Returns:
             Evaluation results dictionary
@@ -52,9 +84,9 @@ class ResumeEvaluationService:
         try:
             start_time = datetime.utcnow()
             
-            # Step 1: Get job posting details from Supabase [[memory:8114315]]
-            job_data = await self._get_job_posting_data(job_posting_id)
-            if not job_data:
+            # Step 1: Get job posting context (cached per job) [[memory:8114315]]
+            job_context = await self._get_job_context(job_posting_id)
+            if not job_context:
                 raise ValueError(f"Job posting {job_posting_id} not found")
             
             # Step 2: Parse resume using LlamaParse
@@ -71,13 +103,23 @@ class ResumeEvaluationService:
                 parsed_resume['personal_info']['name'] = extracted_name
                 logger.info(f"Extracted candidate name: {extracted_name}")
             
-            # Step 3: Evaluate resume against job requirements
-            logger.info(f"Evaluating resume against job {job_posting_id}")
-            evaluation_result = await self._evaluate_against_job(
-                parsed_resume,
-                job_data,
-                resume_file_name
-            )
+            # Step 3: Evaluate resume against job requirements, skipping the LLM
+            # for resumes the local pre-score already rules out
+            prescore = self._prescore_resume(parsed_resume, job_context)
+            if self._is_clear_no_match(prescore, job_context):
+                logger.info(f"Resume {resume_file_name} screened out by pre-score ({prescore['overall_score']})")
+                evaluation_result = self._build_prescreened_evaluation(prescore, job_context)
+            else:
+                logger.info(f"Evaluating resume against job {job_posting_id}")
+                evaluation_result = await self._evaluate_against_job(
+                    parsed_resume,
+                    job_context,
+                    resume_file_name
+                )
+                evaluation_result['evaluation_metadata']['prescore'] = prescore
+            
+            if extra_metadata:
+                evaluation_result['evaluation_metadata'].update(extra_metadata)
             
             # Step 4: Calculate processing time
             processing_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
@@ -94,72 +136,161 @@ class ResumeEvaluationService:
                 **evaluation_result,
                 'processing_status': 'completed',
                 'processing_time_ms': processing_time_ms,
-                'ai_model': 'gpt-4.1',
+                'ai_model': evaluation_result.get('ai_model', 'gpt-4.1'),
                 'evaluated_at': datetime.utcnow().isoformat()
             }
             
-            # Step 6: Store in database
-            await self._store_evaluation_result(final_result)
-            
-            return final_result
+            # Step 6: Queue for a bulk insert into the database
+            stored = await self._store_evaluation_result(final_result)
             
         except Exception as e:
             logger.error(f"Error evaluating resume: {str(e)}")
             
-            # Store failed result
-            failed_result = {
-                'job_posting_id': job_posting_id,
-                'resume_file_name': resume_file_name,
-                'resume_file_url': resume_file_url,
-                'processing_status': 'failed',
-                'processing_error': str(e),
-                'evaluated_at': datetime.utcnow().isoformat()
-            }
-            
-            await self._store_evaluation_result(failed_result)
+            if store_failure:
+                await self.store_failed_evaluation(job_posting_id, resume_file_name, resume_file_url, str(e))
             raise
+        
+        if wait_for_store and not await stored:
+            raise RuntimeError(f"Failed to store evaluation result for {resume_file_name}")
+        
+        return final_result
     
     async def evaluate_batch(
         self,
         job_posting_id: str,
         resume_files: List[Dict[str, str]],
-        max_concurrent: int = 5
+        max_concurrent: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Evaluate multiple resumes concurrently
         
         Args:
             job_posting_id: ID of the job posting
-            resume_files: List of dicts with 'path', 'name', 'url'
-            max_concurrent: Maximum concurrent evaluations
+            resume_files: List of dicts with 'path', 'name', 'url'; entries
+                without a 'path' are downloaded from 'url' (and removed after)
+            max_concurrent: Maximum concurrent evaluations (default
+                LLM_MAX_CONCURRENCY; the rate governor paces the LLM calls)
             
         Returns:
             List of evaluation results
         """
-        semaphore = asyncio.Semaphore(max_concurrent)
+        semaphore = asyncio.Semaphore(max_concurrent or get_settings().llm_max_concurrency)
         
         async def evaluate_with_semaphore(resume_file):
-            async with semaphore:
-                try:
+            downloaded_path = None
+            try:
+                file_path = resume_file.get('path')
+                if not file_path:
+                    # Downloads run outside the evaluation slots, so each resume
+                    # is evaluated as soon as its file lands
+                    downloaded_path = await download_resume_from_url(resume_file['url'], resume_file['name'])
+                    file_path = str(downloaded_path)
+                
+                async with semaphore:
                     return await self.evaluate_resume(
                         job_posting_id,
-                        resume_file['path'],
+                        file_path,
                         resume_file['name'],
                         resume_file.get('url')
                     )
-                except Exception as e:
-                    logger.error(f"Batch evaluation error for {resume_file['name']}: {str(e)}")
-                    return {
-                        'resume_file_name': resume_file['name'],
-                        'error': str(e),
-                        'processing_status': 'failed'
-                    }
+            except Exception as e:
+                logger.error(f"Batch evaluation error for {resume_file['name']}: {str(e)}")
+                return {
+                    'resume_file_name': resume_file['name'],
+                    'error': str(e),
+                    'processing_status': 'failed'
+                }
+            finally:
+                if downloaded_path:
+                    await cleanup_temp_file(downloaded_path)
         
         tasks = [evaluate_with_semaphore(rf) for rf in resume_files]
         results = await asyncio.gather(*tasks)
         
         return results
     
+    @staticmethod
+    def shortlist_namespace(shortlist_id: str) -> str:
+        """Vector store namespace of a shortlist; includes the embedder so vectors never mix"""
+        return f"shortlist:{shortlist_id}:{get_embedder().name}"
+    
+    async def index_resume_for_shortlist(
+        self,
+        shortlist_id: str,
+        key: str,
+        resume_file_path: str,
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Stage 1 of two-stage ranking: parse and embed a resume (no LLM calls)
+        
+        Args:
+            shortlist_id: ID of the shortlist the resume belongs to
+            key: Unique key of the resume within the shortlist
+            resume_file_path: Path to the resume file
+            metadata: Stored with the vector and returned by select_shortlist
+            
+        Returns:
+            Locally extracted name and text length
+        """
+        parsed_resume = await self.llamaparse_service.parse_resume_file(resume_file_path)
+        resume_text = parsed_resume.get('raw_text', '') or ''
+        if not resume_text.strip():
+            raise ValueError(f"No text extracted from {metadata.get('name', resume_file_path)}")
+        
+        embedder = get_embedder()
+        vector = (await asyncio.to_thread(embedder.embed, [resume_text]))[0]
+        
+        candidate_name = parsed_resume.get('personal_info', {}).get('name')
+        await self.vector_store.upsert(
+            self.shortlist_namespace(shortlist_id),
+            key,
+            vector,
+            {**metadata, 'candidate_name': candidate_name}
+        )
+        
+        return {'candidate_name': candidate_name, 'text_length': len(resume_text)}
+    
+    async def select_shortlist(
+        self,
+        shortlist_id: str,
+        job_posting_id: str,
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank every indexed resume of a shortlist by cosine similarity to the job
+        
+        Returns:
+            Metadata of all indexed resumes, best first, each with
+            `retrieval_score`, `retrieval_rank` and `shortlisted` (rank <= top_k)
+        """
+        job_context = await self._get_job_context(job_posting_id)
+        if not job_context:
+            raise ValueError(f"Job posting {job_posting_id} not found")
+        
+        keys, matrix, metadata = await self.vector_store.load(self.shortlist_namespace(shortlist_id))
+        if not keys:
+            return []
+        
+        embedder = get_embedder()
+        
+        def rank():
+            query = embedder.embed([job_context.retrieval_text])[0]
+            return top_k_similar(embedder, matrix, query, len(keys))
+        
+        ranked = await asyncio.to_thread(rank)
+        
+        return [
+            {
+                **metadata[index],
+                'key': keys[index],
+                'retrieval_score': round(score, 4),
+                'retrieval_rank': rank_number,
+                'shortlisted': rank_number <= top_k
+            }
+            for rank_number, (index, score) in enumerate(ranked, start=1)
+        ]
+    
     async def _get_job_posting_data(self, job_posting_id: str) -> Optional[Dict[str, Any]]:
         """Get job posting data from Supabase"""
         try:
@@ -169,10 +300,27 @@ class ResumeEvaluationService:
             logger.error(f"Error fetching job posting: {str(e)}")
             return None
     
+    async def _get_job_posting_version(self, job_posting_id: str) -> Optional[str]:
+        """Get the updated_at stamp of a job posting"""
+        try:
+            response = self.supabase_service.client.table('job_postings').select('updated_at').eq('id', job_posting_id).single().execute()
+            return response.data.get('updated_at')
+        except Exception as e:
+            logger.error(f"Error fetching job posting version: {str(e)}")
+            return None
+    
+    async def _get_job_context(self, job_posting_id: str) -> Optional[JobContext]:
+        """Get the cached evaluation context for a job posting, loading it on first use"""
+        return await get_job_context_cache().get(
+            job_posting_id,
+            self._get_job_posting_data,
+            self._get_job_posting_version
+        )
+    
     async def _evaluate_against_job(
         self,
         parsed_resume: Dict[str, Any],
-        job_data: Dict[str, Any],
+        job_context: JobContext,
         resume_file_name: str
     ) -> Dict[str, Any]:
         """
@@ -181,72 +329,45 @@ class ResumeEvaluationService:
         
         Args:
             parsed_resume: Parsed resume data
-            job_data: Job posting data with ai_analysis
+            job_context: Cached job posting context with ai_analysis
             resume_file_name: Resume filename for reference
             
         Returns:
             Evaluation scores and details
         """
         
-        # Extract basic job info
-        job_title = job_data.get('title', '')
-        experience_required = job_data.get('experience_required', 0)
-        
-        # USE EXISTING AI ANALYSIS - Don't re-analyze job description
-        ai_analysis = job_data.get('ai_analysis', {})
-        
-        if not ai_analysis:
-            # If no AI analysis exists, use fallback data
-            logger.warning(f"No AI analysis found for job {job_title}, using basic data")
-            required_skills = job_data.get('skills_required', [])
-            education_requirements = []
-            responsibilities = []
-            qualifications = []
-            nice_to_have = []
-            job_level = 'mid'
-        else:
-            # Extract all structured data from existing AI analysis
-            required_skills = ai_analysis.get('key_skills', [])
-            education_requirements = ai_analysis.get('education_requirements', [])
-            responsibilities = ai_analysis.get('responsibilities', [])
-            qualifications = ai_analysis.get('qualifications', [])
-            nice_to_have = ai_analysis.get('nice_to_have', [])
-            job_level = ai_analysis.get('job_level', 'mid')
-            
-            # Combine technical and soft skills if present
-            technical_skills = ai_analysis.get('technical_skills', [])
-            soft_skills = ai_analysis.get('soft_skills', [])
-            if technical_skills or soft_skills:
-                required_skills = technical_skills + soft_skills
-        
         # Prepare optimized evaluation prompt using structured data
-        evaluation_prompt = self._create_optimized_evaluation_prompt(
-            parsed_resume,
-            job_title,
-            required_skills,
-            experience_required,
-            education_requirements,
-            responsibilities,
-            job_level,
-            ai_analysis
-        )
+        evaluation_prompt = self._create_optimized_evaluation_prompt(parsed_resume, job_context)
         
-        # Get AI evaluation
-        ai_evaluation = await self.openai_service.evaluate_resume(evaluation_prompt)
+        # In cascade mode a small model scores first; only resumes close to a
+        # recommendation threshold are evaluated again by the full model
+        cascade = None
+        if self._cascade_enabled():
+            try:
+                evaluation = await self.openai_service.evaluate_resume(evaluation_prompt, task='evaluation_screening')
+                evaluation_scores = evaluation.model_dump()
+                screening_score = self._calculate_overall_score(evaluation_scores)
+                cascade = {
+                    'screening_score': screening_score,
+                    'escalated': self._is_borderline(screening_score)
+                }
+            except StructuredOutputError:
+                # An unusable screening reply is settled by the full model
+                cascade = {'screening_score': None, 'escalated': True}
         
-        # Parse AI response
-        evaluation_scores = self._parse_ai_evaluation(ai_evaluation)
+        if cascade is None or cascade['escalated']:
+            task = 'evaluation'
+            evaluation = await self.openai_service.evaluate_resume(evaluation_prompt)
+            evaluation_scores = evaluation.model_dump()
+        else:
+            task = 'evaluation_screening'
+        route = self.openai_service.describe_route(task)
         
         # Calculate overall score based on weights
         skills_score = evaluation_scores.get('skills_score', 0)
         experience_score = evaluation_scores.get('experience_score', 0)
         education_score = evaluation_scores.get('education_score', 0)
-        
-        overall_score = int(
-            skills_score * self.SKILLS_WEIGHT +
-            experience_score * self.EXPERIENCE_WEIGHT +
-            education_score * self.EDUCATION_WEIGHT
-        )
+        overall_score = self._calculate_overall_score(evaluation_scores)
         
         # Determine recommendation level
         recommendation = self._get_recommendation_level(overall_score)
@@ -264,31 +385,154 @@ class ResumeEvaluationService:
             'key_strengths': evaluation_scores.get('strengths', []),
             'improvement_areas': evaluation_scores.get('improvements', []),
             'recommendation': recommendation,
+            'ai_model': route['model'],
             'evaluation_metadata': {
-                'job_title': job_title,
-                'required_experience_years': experience_required,
-                'required_skills_count': len(required_skills),
-                'job_level': job_level if ai_analysis else 'mid',
-                'difficulty_score': ai_analysis.get('difficulty_score', 5) if ai_analysis else 5,
-                'used_ai_analysis': bool(ai_analysis),
-                'ai_raw_response': ai_evaluation
+                'job_title': job_context.job_title,
+                'required_experience_years': job_context.experience_required,
+                'required_skills_count': len(job_context.required_skills),
+                'job_level': job_context.job_level,
+                'difficulty_score': job_context.difficulty_score,
+                'used_ai_analysis': bool(job_context.ai_analysis),
+                'evaluation_method': 'llm',
+                'evaluation_tier': route['tier'],
+                'cascade': cascade,
+                'ai_raw_response': evaluation.model_dump_json()
+            }
+        }
+    
+    def _calculate_overall_score(self, evaluation_scores: Dict[str, Any]) -> int:
+        """Weighted overall score from the skills, experience and education scores"""
+        return int(
+            evaluation_scores.get('skills_score', 0) * self.SKILLS_WEIGHT +
+            evaluation_scores.get('experience_score', 0) * self.EXPERIENCE_WEIGHT +
+            evaluation_scores.get('education_score', 0) * self.EDUCATION_WEIGHT
+        )
+    
+    def _cascade_enabled(self) -> bool:
+        """True if cascade mode is on and screening runs on a different tier than evaluation"""
+        if not get_settings().cascade_evaluation_enabled:
+            return False
+        screening = self.openai_service.describe_route('evaluation_screening')
+        return screening['tier'] != self.openai_service.describe_route('evaluation')['tier']
+    
+    def _is_borderline(self, overall_score: int) -> bool:
+        """True if a score is within the cascade uncertainty band of a recommendation threshold"""
+        band = get_settings().cascade_uncertainty_band
+        return any(abs(overall_score - threshold) < band for threshold, _ in self.RECOMMENDATION_THRESHOLDS)
+    
+    def _prescore_resume(self, parsed_resume: Dict[str, Any], job_context: JobContext) -> Dict[str, Any]:
+        """
+        Deterministic local score from skill overlap, years of experience and degree
+        
+        Uses the same 60/30/10 weights as the LLM evaluation so the scores
+        are comparable. No network calls.
+        """
+        resume_text = parsed_resume.get('raw_text', '') or ''
+        resume_text_lower = resume_text.lower()
+        resume_skills = {str(skill).lower() for skill in parsed_resume.get('skills', [])}
+        resume_skills.update(name.lower() for name in get_skill_matcher().find_all(resume_text, include_ambiguous=False))
+        
+        # Skill overlap: a requirement is met if any of its taxonomy names is among
+        # the resume's skills, or its own wording appears in the resume text. This
+        # errs towards matching, so only clear misses are kept away from the LLM
+        requirements = job_context.skill_requirements
+        matched = np.fromiter(
+            (
+                bool(terms & resume_skills) or label in resume_skills or label in resume_text_lower
+                for label, terms in requirements
+            ),
+            dtype=bool,
+            count=len(requirements)
+        )
+        skills_score = float(matched.mean()) * 100 if len(requirements) else 100.0
+        
+        # Experience: ratio of stated to required years; unknown years are neutral
+        resume_years = next(
+            (exp['total_years'] for exp in parsed_resume.get('experience', []) if 'total_years' in exp),
+            0
+        )
+        required_years = job_context.experience_required or 0
+        if not required_years:
+            experience_score = 100.0
+        elif not resume_years:
+            experience_score = 50.0
+        else:
+            experience_score = float(np.clip(resume_years / required_years, 0, 1)) * 100
+        
+        # Education: any detected degree satisfies a stated requirement; unknown is neutral
+        has_degree = any(entry.get('degree') for entry in parsed_resume.get('education', []))
+        if not job_context.education_requirements:
+            education_score = 100.0
+        else:
+            education_score = 100.0 if has_degree else 50.0
+        
+        features = np.array([skills_score, experience_score, education_score])
+        weights = np.array([self.SKILLS_WEIGHT, self.EXPERIENCE_WEIGHT, self.EDUCATION_WEIGHT])
+        
+        return {
+            'skills_score': int(round(skills_score)),
+            'experience_score': int(round(experience_score)),
+            'education_score': int(round(education_score)),
+            'overall_score': int(features @ weights),
+            'skills_matched': [job_context.required_skills[i] for i in np.flatnonzero(matched)],
+            'skills_missing': [job_context.required_skills[i] for i in np.flatnonzero(~matched)],
+            'resume_years': resume_years
+        }
+    
+    def _is_clear_no_match(self, prescore: Dict[str, Any], job_context: JobContext) -> bool:
+        """True if the pre-score is low enough to skip the LLM evaluation"""
+        settings = get_settings()
+        
+        # With only a couple of required skills the overlap says too little
+        return (
+            settings.prescore_enabled
+            and len(job_context.skill_requirements) >= settings.prescore_min_required_skills
+            and prescore['overall_score'] < settings.prescore_no_match_threshold
+        )
+    
+    def _build_prescreened_evaluation(self, prescore: Dict[str, Any], job_context: JobContext) -> Dict[str, Any]:
+        """Evaluation result for a resume screened out by the local pre-score"""
+        matched_count = len(prescore['skills_matched'])
+        total_count = matched_count + len(prescore['skills_missing'])
+        
+        return {
+            'skills_score': prescore['skills_score'],
+            'experience_score': prescore['experience_score'],
+            'education_score': prescore['education_score'],
+            'overall_score': prescore['overall_score'],
+            'skills_matched': prescore['skills_matched'],
+            'skills_missing': prescore['skills_missing'],
+            'experience_details': {'years': prescore['resume_years']},
+            'education_details': {},
+            'evaluation_summary': (
+                f"Screened out by automatic pre-screening: matches {matched_count} of "
+                f"{total_count} required skills."
+            ),
+            'key_strengths': [],
+            'improvement_areas': [f"Missing: {skill}" for skill in prescore['skills_missing'][:3]],
+            'recommendation': 'NO_MATCH',
+            'ai_model': 'local-prescore',
+            'evaluation_metadata': {
+                'job_title': job_context.job_title,
+                'required_experience_years': job_context.experience_required,
+                'required_skills_count': len(job_context.required_skills),
+                'job_level': job_context.job_level,
+                'difficulty_score': job_context.difficulty_score,
+                'used_ai_analysis': bool(job_context.ai_analysis),
+                'evaluation_method': 'local_prescore',
+                'prescore': prescore
             }
         }
     
     def _create_optimized_evaluation_prompt(
         self,
         parsed_resume: Dict[str, Any],
-        job_title: str,
-        required_skills: List[str],
-        experience_required: int,
-        education_requirements: List[str],
-        responsibilities: List[str],
-        job_level: str,
-        ai_analysis: Dict[str, Any]
+        job_context: JobContext
     ) -> str:
         """
         Create optimized evaluation prompt using EXISTING AI analysis
-        No re-analysis of job description - uses structured data directly
+        No re-analysis of job description - the job half of the prompt is
+        rendered once per job by JobContext, only the resume half is built here
         """
         
         # Extract resume information
@@ -306,25 +550,7 @@ class ResumeEvaluationService:
                 total_exp_years = exp['total_years']
                 break
         
-        # Get additional requirements from AI analysis
-        qualifications = ai_analysis.get('qualifications', [])
-        nice_to_have = ai_analysis.get('nice_to_have', [])
-        difficulty_score = ai_analysis.get('difficulty_score', 5)
-        
-        prompt = f"""You are an expert recruiter evaluating a resume against ALREADY ANALYZED job requirements.
-DO NOT re-analyze the job description - use the structured requirements provided below.
-
-JOB REQUIREMENTS (FROM EXISTING AI ANALYSIS):
-- Title: {job_title}
-- Level: {job_level} (difficulty: {difficulty_score}/10)
-- Required Experience: {experience_required} years
-- Required Skills: {', '.join(required_skills) if required_skills else 'None specified'}
-- Education Requirements: {', '.join(education_requirements) if education_requirements else 'Not specified'}
-- Key Responsibilities: {', '.join(responsibilities[:5]) if responsibilities else 'Not specified'}
-- Required Qualifications: {', '.join(qualifications[:5]) if qualifications else 'Not specified'}
-- Nice to Have: {', '.join(nice_to_have[:5]) if nice_to_have else 'None specified'}
-
-CANDIDATE RESUME DATA:
+        resume_prompt = f"""CANDIDATE RESUME DATA:
 - Skills Found: {', '.join(resume_skills) if resume_skills else 'None identified'}
 - Total Experience: {total_exp_years} years
 - Education: {json.dumps(resume_education) if resume_education else 'Not found'}
@@ -332,34 +558,13 @@ CANDIDATE RESUME DATA:
 - Projects: {len(resume_projects)} projects found
 
 RESUME TEXT EXCERPT (for additional context):
-{resume_text[:2000]}  # Reduced to 2000 chars since we have structured requirements
-
-EVALUATION INSTRUCTIONS:
-Compare the candidate's qualifications DIRECTLY against the structured requirements above.
-Use the scoring weights: 60% skills, 30% experience, 10% education
-
-Respond in JSON format with these exact keys:
-{{
-    "skills_score": <0-100 based on match with required_skills>,
-    "experience_score": <0-100 based on {experience_required} years requirement>,
-    "education_score": <0-100 based on education_requirements match>,
-    "skills_matched": [<skills from required_skills that candidate has>],
-    "skills_missing": [<skills from required_skills that candidate lacks>],
-    "experience_details": {{
-        "years": <actual years>,
-        "relevance": "<how relevant to job level: {job_level}>",
-        "key_roles": [<relevant roles>]
-    }},
-    "education_details": {{
-        "highest_degree": "<degree>",
-        "relevance": "<match with education_requirements>"
-    }},
-    "summary": "<2-3 sentence evaluation summary>",
-    "strengths": [<top 3 strengths based on qualifications match>],
-    "improvements": [<top 3 gaps based on missing requirements>]
-}}"""
+{resume_text[:2000]}  # Reduced to 2000 chars since we have structured requirements"""
         
-        return prompt
+        return "\n\n".join([
+            job_context.requirements_prompt,
+            resume_prompt,
+            job_context.response_format_prompt
+        ])
     
     def _create_evaluation_prompt(
         self,
@@ -446,41 +651,6 @@ Respond in JSON format with these exact keys:
         
         return prompt
     
-    def _parse_ai_evaluation(self, ai_response: str) -> Dict[str, Any]:
-        """Parse the AI evaluation response"""
-        try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{[\s\S]*\}', ai_response)
-            if json_match:
-                evaluation_data = json.loads(json_match.group())
-                return evaluation_data
-            else:
-                # Fallback parsing if JSON extraction fails
-                logger.warning("Could not extract JSON from AI response, using defaults")
-                return self._get_default_evaluation()
-                
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing AI evaluation JSON: {str(e)}")
-            return self._get_default_evaluation()
-        except Exception as e:
-            logger.error(f"Error parsing AI evaluation: {str(e)}")
-            return self._get_default_evaluation()
-    
-    def _get_default_evaluation(self) -> Dict[str, Any]:
-        """Return default evaluation structure"""
-        return {
-            'skills_score': 50,
-            'experience_score': 50,
-            'education_score': 50,
-            'skills_matched': [],
-            'skills_missing': [],
-            'experience_details': {'years': 0, 'relevance': 'Unable to evaluate'},
-            'education_details': {'highest_degree': 'Unknown', 'relevance': 'Unable to evaluate'},
-            'summary': 'Evaluation could not be completed',
-            'strengths': [],
-            'improvements': []
-        }
-    
     def _get_recommendation_level(self, overall_score: int) -> str:
         """
         Determine recommendation level based on overall score
@@ -491,29 +661,55 @@ Respond in JSON format with these exact keys:
         Returns:
             Recommendation level string
         """
-        if overall_score >= 85:
-            return 'STRONG_MATCH'
-        elif overall_score >= 70:
-            return 'GOOD_MATCH'
-        elif overall_score >= 50:
-            return 'FAIR_MATCH'
-        else:
-            return 'NO_MATCH'
+        for threshold, level in self.RECOMMENDATION_THRESHOLDS:
+            if overall_score >= threshold:
+                return level
+        return 'NO_MATCH'
     
-    async def _store_evaluation_result(self, result: Dict[str, Any]) -> None:
-        """Store evaluation result in Supabase"""
+    async def store_failed_evaluation(
+        self,
+        job_posting_id: str,
+        resume_file_name: str,
+        resume_file_url: Optional[str],
+        error: str
+    ) -> "asyncio.Future[bool]":
+        """Queue the failed result row of a resume that could not be evaluated"""
+        return await self._store_evaluation_result({
+            'job_posting_id': job_posting_id,
+            'resume_file_name': resume_file_name,
+            'resume_file_url': resume_file_url,
+            'processing_status': 'failed',
+            'processing_error': error,
+            'evaluated_at': datetime.utcnow().isoformat()
+        })
+    
+    async def _store_evaluation_result(self, result: Dict[str, Any]) -> "asyncio.Future[bool]":
+        """
+        Queue evaluation result for a bulk insert into Supabase
+        
+        Returns a future that resolves to whether the row was written.
+        """
+        # Prepare data for insertion
+        insert_data = {
+            key: value for key, value in result.items()
+            if key not in ['ai_raw_response']  # Exclude raw response from main fields
+        }
+        
+        # Buffered and written to the resume_results table in batches
+        stored = await get_result_writer().submit(insert_data)
+        
+        # Keep the semantic search index current, but only with rows that made it to the database
+        if result.get('processing_status') == 'completed' and get_settings().resume_index_enabled:
+            task = asyncio.create_task(self._index_evaluation(stored, result))
+            self._pending_tasks.add(task)
+            task.add_done_callback(self._pending_tasks.discard)
+        
+        return stored
+    
+    async def _index_evaluation(self, stored: "asyncio.Future[bool]", result: Dict[str, Any]) -> None:
+        """Add a result to the semantic search index once it is actually in the database"""
         try:
-            # Prepare data for insertion
-            insert_data = {
-                key: value for key, value in result.items()
-                if key not in ['ai_raw_response']  # Exclude raw response from main fields
-            }
-            
-            # Store in resume_results table
-            response = self.supabase_service.client.table('resume_results').insert(insert_data).execute()
-            
-            logger.info(f"Stored evaluation result for {result.get('resume_file_name')}")
-            
+            if await stored:
+                await get_resume_index().add_evaluation(result)
         except Exception as e:
-            logger.error(f"Error storing evaluation result: {str(e)}")
-            # Don't raise here to avoid failing the entire evaluation
+            logger.error(f"Error indexing resume {result.get('resume_file_name')}: {str(e)}")
@@ -0,0 +1,329 @@
+"""
+Resume Text Extraction
+PyPDF text extraction and rule-based structuring of resume text
+
+Everything here is CPU-bound, so it runs in a process pool (see
+`run_in_parse_executor`) instead of on the event loop. This module is kept free
+of heavy imports so pool workers start quickly.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from config import get_settings
+from services.resume_segmenter import ResumeDocument
+from services.skill_matcher import get_certification_matcher, get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Patterns are compiled once per process rather than on every resume
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(\+?\d{1,3}[-.\s]?)?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,4}')
+LINKEDIN_PATTERN = re.compile(r'linkedin\.com/in/[\w-]+')
+GITHUB_PATTERN = re.compile(r'github\.com/[\w-]+')
+DEGREE_PATTERN = re.compile(
+    r'(Bachelor|Master|PhD|B\.?S\.?|M\.?S\.?|B\.?Tech|M\.?Tech|MBA|B\.?E\.?|M\.?E\.?)', re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r'(\d{4})')
+YEARS_EXPERIENCE_PATTERN = re.compile(r'(\d+)\+?\s*years?\s*(of)?\s*experience')
+JOB_TITLE_PATTERN = re.compile('|'.join(re.escape(title) for title in [
+    'software engineer', 'developer', 'programmer', 'analyst',
+    'manager', 'designer', 'architect', 'consultant', 'specialist',
+    'lead', 'senior', 'junior', 'intern', 'associate'
+]))
+COMMA_LIST_PATTERN = re.compile(r'[A-Za-z][A-Za-z\s\+\#\.\-]+(?:,|$)')
+CERT_KEYWORD_PATTERN = re.compile(r'certification|certified|certificate|license')
+
+class ResumeExtractor:
+    """Rule-based extraction of structured fields from resume text"""
+    
+    def _extract_resume_info(self, text: str) -> Dict[str, Any]:
+        """
+        Extract structured information from resume text
+        
+        Args:
+            text: Raw resume text
+        
+        Returns:
+            Structured resume data
+        """
+        # Split, lowercase and segment once; every extractor reads this
+        doc = ResumeDocument(text)
+        
+        info = {
+            'personal_info': self._extract_personal_info(doc),
+            'education': self._extract_education(doc),
+            'experience': self._extract_experience(doc),
+            'skills': self._extract_skills(doc),
+            'certifications': self._extract_certifications(doc),
+            'projects': self._extract_projects(doc),
+            'parsed_at': datetime.utcnow().isoformat()
+        }
+        
+        return info
+    
+    def _extract_personal_info(self, doc: ResumeDocument) -> Dict[str, str]:
+        """Extract personal information from resume text"""
+        info = {}
+        
+        # Extract email
+        email = EMAIL_PATTERN.search(doc.text)
+        if email:
+            info['email'] = email.group(0)
+        
+        # Extract phone
+        phone = PHONE_PATTERN.search(doc.text)
+        if phone:
+            info['phone'] = phone.group(0).strip()
+        
+        # Extract name (usually at the beginning of the resume)
+        for line, line_lower in zip(doc.lines[:10], doc.lines_lower[:10]):  # Check first 10 lines
+            line = line.strip()
+            if line and len(line.split()) <= 4 and not any(char.isdigit() for char in line):
+                # Likely a name if it's short and has no digits
+                if not any(keyword in line_lower for keyword in ['resume', 'cv', 'curriculum', 'page']):
+                    info['name'] = line
+                    break
+        
+        # Extract LinkedIn
+        linkedin = LINKEDIN_PATTERN.search(doc.text_lower)
+        if linkedin:
+            info['linkedin'] = linkedin.group(0)
+        
+        # Extract GitHub
+        github = GITHUB_PATTERN.search(doc.text_lower)
+        if github:
+            info['github'] = github.group(0)
+        
+        return info
+    
+    def _extract_education(self, doc: ResumeDocument) -> List[Dict[str, str]]:
+        """Extract education information from resume text"""
+        education = []
+        
+        # Common education keywords
+        edu_keywords = [
+            'education', 'academic', 'qualification', 'degree',
+            'bachelor', 'master', 'phd', 'diploma', 'certificate'
+        ]
+        
+        # Lines around the first mention of each keyword; a line shared by
+        # several keywords is only read once
+        seen_lines = set()
+        for keyword in edu_keywords:
+            i = doc.first_line_containing([keyword])
+            if i < 0 or i in seen_lines:
+                continue
+            seen_lines.add(i)
+            
+            # Extract next few lines as education info
+            edu_text = '\n'.join(doc.lines[i:min(i+5, len(doc.lines))])
+            
+            edu_entry = {
+                'degree': '',
+                'field': '',
+                'institution': '',
+                'year': ''
+            }
+            
+            degree = DEGREE_PATTERN.search(edu_text)
+            if degree and ('Bachelor' in degree.group(0) or 'Master' in degree.group(0)):
+                edu_entry['degree'] = degree.group(0)
+            
+            year = YEAR_PATTERN.search(edu_text)
+            if year:
+                edu_entry['year'] = year.group(0)
+            
+            if edu_entry['degree'] or edu_entry['year']:
+                education.append(edu_entry)
+        
+        return education
+    
+    def _extract_experience(self, doc: ResumeDocument) -> List[Dict[str, Any]]:
+        """Extract work experience from resume text"""
+        experience = []
+        
+        # Find years of experience mentions
+        total_experience_years = 0
+        for match in YEARS_EXPERIENCE_PATTERN.finditer(doc.text_lower):
+            total_experience_years = max(total_experience_years, int(match.group(1)))
+        
+        # Extract job titles and companies
+        for line, line_lower in zip(doc.lines, doc.lines_lower):
+            if JOB_TITLE_PATTERN.search(line_lower):
+                experience.append({
+                    'title': line.strip(),
+                    'raw_text': line
+                })
+        
+        # Add total years
+        if total_experience_years > 0:
+            experience.insert(0, {
+                'total_years': total_experience_years
+            })
+        
+        return experience
+    
+    def _extract_skills(self, doc: ResumeDocument) -> List[str]:
+        """Extract skills from resume text"""
+        skill_matcher = get_skill_matcher()
+        
+        # Focus on skills section (up to 10 lines); ambiguous terms like 'go' are trusted here
+        section = doc.section_range('skills', 10)
+        if section is None:
+            return skill_matcher.find_all(doc.text, include_ambiguous=False)
+        
+        skills_text = '\n'.join(doc.lines[section[0]:section[1]])
+        skills = skill_matcher.find_all(skills_text)
+        
+        # Also extract skills from comma-separated lists
+        for skill in COMMA_LIST_PATTERN.findall(skills_text):
+            skill = skill.strip().strip(',').lower()
+            if len(skill) > 1 and len(skill) < 30:  # Reasonable skill length
+                if skill not in skills:
+                    skills.append(skill)
+        
+        return list(dict.fromkeys(skills))  # Remove duplicates, keep order
+    
+    def _extract_certifications(self, doc: ResumeDocument) -> List[str]:
+        """Extract certifications from resume text"""
+        certifications = []
+        cert_matcher = get_certification_matcher()
+        lines = doc.lines
+        
+        # Flag lines naming a certification once, so each keyword line only
+        # checks flags for its neighbours
+        has_cert_name = [cert_matcher.search(line) for line in lines]
+        
+        for i, line_lower in enumerate(doc.lines_lower):
+            # Check if line contains certification keywords
+            if CERT_KEYWORD_PATTERN.search(line_lower):
+                # Check next few lines for certification names
+                for j in range(max(0, i-1), min(i+3, len(lines))):
+                    if has_cert_name[j]:
+                        certifications.append(lines[j].strip())
+        
+        return list(dict.fromkeys(certifications))  # Remove duplicates, keep order
+    
+    def _extract_projects(self, doc: ResumeDocument) -> List[Dict[str, str]]:
+        """Extract project information from resume text"""
+        projects = []
+        
+        # Up to 14 lines after the projects header, stopping at the next section
+        section = doc.section_range('projects', 15)
+        if section is None:
+            return projects
+        
+        current_project = None
+        for line in doc.lines[section[0]+1:section[1]]:
+            line = line.strip()
+            if line and not line.startswith(' '):  # Likely a project title
+                if current_project:
+                    projects.append(current_project)
+                current_project = {
+                    'title': line,
+                    'description': ''
+                }
+            elif current_project and line:
+                current_project['description'] += ' ' + line
+        
+        if current_project:
+            projects.append(current_project)
+        
+        return projects
+
+_extractor = ResumeExtractor()
+
+def read_pdf_text(file_path: str) -> str:
+    """
+    Fallback PDF parsing using PyPDF
+    
+    Args:
+        file_path: Path to the PDF file
+    
+    Returns:
+        Extracted text
+    """
+    try:
+        from pypdf import PdfReader
+        
+        reader = PdfReader(file_path)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+        
+        return text
+    
+    except Exception as e:
+        logger.error(f"Fallback parsing failed: {str(e)}")
+        return ""
+
+def extract_resume_info(text: str) -> Dict[str, Any]:
+    """Structure resume text and attach it as raw_text"""
+    parsed_data = _extractor._extract_resume_info(text)
+    parsed_data['raw_text'] = text
+    return parsed_data
+
+def parse_resume_locally(file_path: str) -> Dict[str, Any]:
+    """Read a PDF with PyPDF and structure it, in one trip to the pool"""
+    return extract_resume_info(read_pdf_text(file_path))
+
+def _warm_up() -> int:
+    # Import the PDF reader and compile the matchers once so the first real parse doesn't pay for it
+    import pypdf  # noqa: F401
+    get_skill_matcher()
+    get_certification_matcher()
+    return multiprocessing.current_process().pid
+
+def get_parse_executor(max_workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Get the process pool for CPU-bound parsing, creating it on first use
+    
+    Returns None when PARSE_EXECUTOR_WORKERS is 0; work then runs in a thread.
+    """
+    global _executor
+    
+    if _executor is None:
+        workers = max_workers if max_workers is not None else get_settings().parse_executor_workers
+        if workers <= 0:
+            return None
+        # spawn: never fork a process that is running an event loop and threads
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Started parse executor with {workers} processes")
+    
+    return _executor
+
+async def warm_parse_executor(max_workers: Optional[int] = None) -> None:
+    """Start every pool process up front so the first batch doesn't wait on spawns"""
+    executor = get_parse_executor(max_workers)
+    if executor is None:
+        return
+    
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*[
+        loop.run_in_executor(executor, _warm_up)
+        for _ in range(executor._max_workers)
+    ])
+
+def shutdown_parse_executor() -> None:
+    """Stop the parse pool (call on shutdown)"""
+    global _executor
+    
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def run_in_parse_executor(func: Callable, *args) -> Any:
+    """Run a module-level function of this module off the event loop"""
+    executor = get_parse_executor()
+    if executor is None:
+        return await asyncio.to_thread(func, *args)
+    
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
@@ -0,0 +1,636 @@
+"""
+Resume Index Service
+Persistent IVF vector index over the parsed text of every evaluated resume
+
+Vectors live in a flat float32 file that is memory-mapped for search; entry
+metadata, corpus statistics and the IVF centroids live in a SQLite database
+next to it. Each completed evaluation is appended as it lands, under SQLite's
+write lock, so the API and every worker process can add to the same index.
+
+Search is brute force until the index holds RESUME_INDEX_MIN_TRAIN_ROWS
+resumes. After that a background thread clusters the vectors into ~sqrt(n)
+lists (spherical k-means), and a query only scores the resumes in its
+RESUME_INDEX_NPROBE closest lists. The clustering is redone whenever the
+index has doubled since the last run.
+
+Re-evaluating a resume replaces its entry. Replaced entries are numbered by a
+deletion sequence, so a process only masks out those deleted since its last
+look instead of reloading the index. Their vectors stay in the file until the
+next clustering run (or once they are half the file), which writes the live
+vectors to a new, compacted file and renumbers the entries.
+
+Each embedder gets its own index directory, so changing EMBEDDING_MODEL
+starts a new index (fill it with POST /search-resumes/semantic/reindex).
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_settings
+from services.embedding_service import Embedder, get_embedder, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    row INTEGER PRIMARY KEY,
+    entry_key TEXT NOT NULL,
+    job_posting_id TEXT,
+    resume_file_name TEXT,
+    candidate_name TEXT,
+    candidate_email TEXT,
+    overall_score INTEGER,
+    recommendation TEXT,
+    evaluated_at TEXT,
+    list_id INTEGER NOT NULL DEFAULT -1,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    deleted_seq INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_entries_key ON entries(entry_key, deleted);
+CREATE INDEX IF NOT EXISTS idx_entries_deleted_seq ON entries(deleted_seq);
+
+CREATE TABLE IF NOT EXISTS index_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    dim INTEGER NOT NULL,
+    live_rows INTEGER NOT NULL DEFAULT 0,
+    document_frequency BLOB NOT NULL,
+    centroids BLOB,
+    trained_rows INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0,
+    deletion_seq INTEGER NOT NULL DEFAULT 0,
+    vectors_file TEXT NOT NULL DEFAULT 'vectors.0.f32',
+    training_started_at REAL
+);
+"""
+
+ENTRY_FIELDS = (
+    'job_posting_id', 'resume_file_name', 'candidate_name', 'candidate_email',
+    'overall_score', 'recommendation', 'evaluated_at'
+)
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_CHUNK_ROWS = 8192
+
+# A training claim older than this is assumed to belong to a dead process
+TRAINING_CLAIM_SECONDS = 3600
+
+# Compact small indexes too once replaced entries are half the vectors file,
+# but not before the file holds this many rows
+COMPACT_MIN_ROWS = 1000
+
+# Searches retried when a compaction renumbers the entries underneath them
+SEARCH_ATTEMPTS = 3
+
+def entry_key(job_posting_id: str, resume_file_name: str) -> str:
+    """Index key of a resume; re-evaluating the same file for a job replaces its entry"""
+    return f"{job_posting_id}:{resume_file_name}"
+
+class IndexSnapshot:
+    """
+    Immutable in-memory view of the live entries at one point in time
+    
+    _refresh() builds a new snapshot instead of changing the current one, so
+    searches and training running in other threads keep a consistent view.
+    Row numbers are only meaningful within a generation, since each
+    clustering run compacts the vectors file.
+    """
+    
+    def __init__(
+        self,
+        generation: Optional[int] = None,
+        deletion_seq: int = 0,
+        vectors_file: Optional[str] = None,
+        rows: Optional[np.ndarray] = None,
+        lists: Optional[np.ndarray] = None,
+        job_codes: Optional[np.ndarray] = None,
+        scores: Optional[np.ndarray] = None,
+        job_code_map: Optional[Dict[str, int]] = None,
+        centroids: Optional[np.ndarray] = None,
+        idf: Optional[np.ndarray] = None,
+        live_rows: int = 0,
+        vectors: Optional[np.memmap] = None
+    ):
+        self.generation = generation
+        self.deletion_seq = deletion_seq
+        self.vectors_file = vectors_file
+        self.rows = rows if rows is not None else np.zeros(0, dtype=np.int64)
+        self.lists = lists if lists is not None else np.zeros(0, dtype=np.int32)
+        self.job_codes = job_codes if job_codes is not None else np.zeros(0, dtype=np.int32)
+        self.scores = scores if scores is not None else np.zeros(0, dtype=np.float32)
+        self.job_code_map = job_code_map if job_code_map is not None else {}
+        self.centroids = centroids
+        self.idf = idf
+        self.live_rows = live_rows
+        self.vectors = vectors
+    
+    @property
+    def max_row(self) -> int:
+        return int(self.rows[-1]) if len(self.rows) else 0
+
+class ResumeIndexService:
+    """Service for adding evaluated resumes to the vector index and searching it"""
+    
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        embedder: Optional[Embedder] = None,
+        nprobe: Optional[int] = None,
+        min_train_rows: Optional[int] = None
+    ):
+        settings = get_settings()
+        
+        self.embedder = embedder or get_embedder()
+        self.dim = self.embedder.dim
+        self.directory = Path(directory or settings.resume_index_dir) / self.embedder.name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / 'index.db'
+        self.nprobe = nprobe or settings.resume_index_nprobe
+        self.min_train_rows = min_train_rows or settings.resume_index_min_train_rows
+        
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute(
+                "INSERT OR IGNORE INTO index_state (id, dim, document_frequency) VALUES (1, ?, ?)",
+                (self.dim, np.zeros(self.dim, dtype=np.int64).tobytes())
+            )
+        
+        # In-memory view of the live entries, replaced (under the lock) when the index changes
+        self._lock = threading.Lock()
+        self._snapshot = IndexSnapshot()
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+    
+    async def add_evaluation(self, result: Dict[str, Any]) -> None:
+        """Index a completed evaluation by its parsed resume text"""
+        await self.add_many([result])
+    
+    async def add_many(self, results: List[Dict[str, Any]]) -> int:
+        """Index several evaluations in one transaction; returns how many had text"""
+        results = [r for r in results if (r.get('parsed_resume_text') or '').strip()]
+        if not results:
+            return 0
+        
+        await asyncio.to_thread(self._add_many, results)
+        return len(results)
+    
+    def _add_many(self, results: List[Dict[str, Any]]) -> None:
+        vectors = self.embedder.embed([r['parsed_resume_text'] for r in results])
+        
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = conn.execute("SELECT * FROM index_state WHERE id = 1").fetchone()
+                document_frequency = np.frombuffer(state['document_frequency'], dtype=np.int64).copy()
+                live_rows = state['live_rows']
+                deletion_seq = state['deletion_seq']
+                vectors_path = self.directory / state['vectors_file']
+                
+                centroids = None
+                if state['centroids'] is not None:
+                    centroids = np.frombuffer(state['centroids'], dtype=np.float32).reshape(-1, self.dim)
+                
+                for result, vector in zip(results, vectors):
+                    key = entry_key(result.get('job_posting_id'), result.get('resume_file_name'))
+                    
+                    for old in conn.execute(
+                        "SELECT row FROM entries WHERE entry_key = ? AND deleted = 0", (key,)
+                    ).fetchall():
+                        deletion_seq += 1
+                        conn.execute(
+                            "UPDATE entries SET deleted = 1, deleted_seq = ? WHERE row = ?",
+                            (deletion_seq, old['row'])
+                        )
+                        document_frequency -= self._read_vector(vectors_path, old['row']) != 0
+                        live_rows -= 1
+                    
+                    document_frequency += vector != 0
+                    live_rows += 1
+                    
+                    list_id = -1
+                    if centroids is not None:
+                        idf = self.embedder.idf_weights(document_frequency, live_rows)
+                        list_id = int(np.argmax(centroids @ self._weigh(vector.reshape(1, -1), idf)[0]))
+                    
+                    cursor = conn.execute(
+                        f"INSERT INTO entries (entry_key, {', '.join(ENTRY_FIELDS)}, list_id) "
+                        f"VALUES (?, {', '.join('?' for _ in ENTRY_FIELDS)}, ?)",
+                        (key, *(result.get(field) for field in ENTRY_FIELDS), list_id)
+                    )
+                    self._write_vector(vectors_path, cursor.lastrowid, vector)
+                    last_row = cursor.lastrowid
+                
+                conn.execute(
+                    "UPDATE index_state SET live_rows = ?, document_frequency = ?, deletion_seq = ? WHERE id = 1",
+                    (live_rows, document_frequency.tobytes(), deletion_seq)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        needs_training = live_rows >= self.min_train_rows and live_rows >= 2 * state['trained_rows']
+        needs_compaction = last_row >= 2 * max(live_rows, COMPACT_MIN_ROWS)
+        if needs_training or needs_compaction:
+            self._start_training()
+    
+    def _write_vector(self, vectors_path: Path, row: int, vector: np.ndarray) -> None:
+        # Rows are allocated under the SQLite write lock, so writers never overlap
+        with open(vectors_path, 'r+b' if vectors_path.exists() else 'w+b') as f:
+            f.seek((row - 1) * self.dim * 4)
+            f.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+    
+    def _read_vector(self, vectors_path: Path, row: int) -> np.ndarray:
+        with open(vectors_path, 'rb') as f:
+            f.seek((row - 1) * self.dim * 4)
+            return np.frombuffer(f.read(self.dim * 4), dtype=np.float32)
+    
+    def _weigh(self, vectors: np.ndarray, idf: Optional[np.ndarray]) -> np.ndarray:
+        return normalize_rows(vectors * idf if idf is not None else vectors)
+    
+    def _start_training(self) -> None:
+        """Claim the training run (one process at a time) and run it in a background thread"""
+        now = time.time()
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE index_state SET training_started_at = ? "
+                "WHERE id = 1 AND (training_started_at IS NULL OR training_started_at < ?)",
+                (now, now - TRAINING_CLAIM_SECONDS)
+            ).rowcount
+        
+        if claimed:
+            threading.Thread(target=self._train, name="resume-index-train", daemon=True).start()
+    
+    def _train(self) -> None:
+        """Cluster the live vectors (once there are enough) and compact the vectors file"""
+        try:
+            started = time.monotonic()
+            snapshot = self._refresh()
+            rows, idf, vectors = snapshot.rows, snapshot.idf, snapshot.vectors
+            
+            centroids = None
+            assignments = np.full(len(rows), -1, dtype=np.int64)
+            if len(rows) >= self.min_train_rows:
+                centroids = self._cluster(rows, idf, vectors)
+                assignments = self._assign(rows, centroids, idf, snapshot.vectors_file, vectors)
+            
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    state = conn.execute("SELECT * FROM index_state WHERE id = 1").fetchone()
+                    if state['generation'] != snapshot.generation:
+                        raise RuntimeError("the index was compacted by another process meanwhile")
+                    
+                    # Entries added while training ran
+                    late_rows = np.array(
+                        [r['row'] for r in conn.execute(
+                            "SELECT row FROM entries WHERE row > ? AND deleted = 0 ORDER BY row", (snapshot.max_row,)
+                        )],
+                        dtype=np.int64
+                    )
+                    if len(late_rows):
+                        rows = np.concatenate([rows, late_rows])
+                        assignments = np.concatenate([
+                            assignments,
+                            self._assign(late_rows, centroids, idf, snapshot.vectors_file, vectors)
+                            if centroids is not None else np.full(len(late_rows), -1, dtype=np.int64)
+                        ])
+                    
+                    vectors_file = self._compact(conn, state, rows, assignments)
+                    conn.execute(
+                        "UPDATE index_state SET centroids = ?, trained_rows = ?, generation = generation + 1, "
+                        "vectors_file = ?, training_started_at = NULL WHERE id = 1",
+                        (
+                            centroids.tobytes() if centroids is not None else state['centroids'],
+                            len(rows) if centroids is not None else state['trained_rows'],
+                            vectors_file
+                        )
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            
+            # Processes that read the state just before the commit may still map the previous file
+            for path in self.directory.glob('vectors.*.f32'):
+                if path.name not in (vectors_file, state['vectors_file']):
+                    path.unlink(missing_ok=True)
+            
+            logger.info(
+                f"Trained resume index: {len(rows)} resumes in "
+                f"{len(centroids) if centroids is not None else 0} lists, compacted to {vectors_file} "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+        except Exception as e:
+            logger.error(f"Error training resume index: {str(e)}")
+            with self._connect() as conn:
+                conn.execute("UPDATE index_state SET training_started_at = NULL WHERE id = 1")
+    
+    def _cluster(self, rows: np.ndarray, idf: Optional[np.ndarray], vectors: np.memmap) -> np.ndarray:
+        """Spherical k-means centroids of a sample of the rows"""
+        nlist = int(min(4096, max(16, np.sqrt(len(rows)))))
+        rng = np.random.default_rng()
+        sample_rows = rng.choice(rows, size=min(len(rows), nlist * KMEANS_SAMPLE_PER_LIST), replace=False)
+        sample = self._weigh(vectors[np.sort(sample_rows) - 1], idf)
+        
+        # Vectors and centroids are unit length, similarity is a dot product
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(nlist):
+                members = sample[assignment == list_id]
+                centroids[list_id] = members.sum(axis=0) if len(members) else sample[rng.integers(len(sample))]
+            centroids = normalize_rows(centroids).astype(np.float32)
+        return centroids
+    
+    def _compact(self, conn: sqlite3.Connection, state: sqlite3.Row, rows: np.ndarray, lists: np.ndarray) -> str:
+        """
+        Write the live vectors to a new file and renumber the entries to match
+        
+        Runs inside the write transaction of a training run. `rows` (ascending)
+        must include every live entry. Returns the name of the new file.
+        """
+        live = np.array(
+            [r['row'] for r in conn.execute("SELECT row FROM entries WHERE deleted = 0 ORDER BY row")],
+            dtype=np.int64
+        )
+        # Rows replaced while training ran are dropped along with the older ones
+        positions = np.searchsorted(rows, live)
+        live_lists = lists[positions]
+        
+        vectors_file = f"vectors.{state['generation'] + 1}.f32"
+        with open(self.directory / vectors_file, 'wb') as f:
+            if len(live):
+                source = self._open_vectors(state['vectors_file'], None, int(live[-1]))
+                for start in range(0, len(live), ASSIGN_CHUNK_ROWS):
+                    f.write(np.ascontiguousarray(source[live[start:start + ASSIGN_CHUNK_ROWS] - 1]).tobytes())
+        
+        conn.execute("DELETE FROM entries WHERE deleted = 1")
+        # Ascending order: every entry moves down to a row number already freed
+        conn.executemany(
+            "UPDATE entries SET row = ?, list_id = ? WHERE row = ?",
+            zip(range(1, len(live) + 1), live_lists.tolist(), live.tolist())
+        )
+        return vectors_file
+    
+    def _assign(
+        self,
+        rows: np.ndarray,
+        centroids: np.ndarray,
+        idf: Optional[np.ndarray],
+        vectors_file: str,
+        vectors: Optional[np.memmap]
+    ) -> np.ndarray:
+        """Nearest centroid of each row, computed in chunks to bound memory"""
+        vectors = self._open_vectors(vectors_file, vectors, int(rows.max()))
+        assignments = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), ASSIGN_CHUNK_ROWS):
+            chunk = self._weigh(vectors[rows[start:start + ASSIGN_CHUNK_ROWS] - 1], idf)
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+    
+    def _open_vectors(self, vectors_file: str, vectors: Optional[np.memmap], min_rows: int) -> np.memmap:
+        """`vectors` if it covers `min_rows` rows, else a new memmap of the whole file"""
+        if vectors is None or len(vectors) < min_rows:
+            path = self.directory / vectors_file
+            rows = path.stat().st_size // (self.dim * 4)
+            vectors = np.memmap(path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        return vectors
+    
+    def _refresh(self) -> IndexSnapshot:
+        """Publish and return a snapshot of the live entries that is up to date with the database"""
+        with self._lock, self._connect() as conn:
+            # One read transaction, so the entries match the state
+            conn.execute("BEGIN")
+            state = conn.execute("SELECT * FROM index_state WHERE id = 1").fetchone()
+            
+            current = self._snapshot
+            base = current
+            if state['generation'] != current.generation:
+                # A clustering run renumbered the entries: reload everything
+                base = IndexSnapshot()
+            rows, lists, job_codes, scores = base.rows, base.lists, base.job_codes, base.scores
+            
+            deleted = []
+            if base is current and state['deletion_seq'] != current.deletion_seq:
+                deleted = [
+                    r['row'] for r in conn.execute(
+                        "SELECT row FROM entries WHERE deleted_seq > ?", (current.deletion_seq,)
+                    )
+                ]
+            
+            new = conn.execute(
+                "SELECT row, list_id, job_posting_id, overall_score FROM entries "
+                "WHERE row > ? AND deleted = 0 ORDER BY row",
+                (base.max_row,)
+            ).fetchall()
+            conn.execute("COMMIT")
+            
+            if deleted:
+                # Indexing copies, so earlier snapshots keep their arrays
+                keep = ~np.isin(rows, deleted)
+                rows, lists, job_codes, scores = rows[keep], lists[keep], job_codes[keep], scores[keep]
+            
+            job_code_map = current.job_code_map
+            if new:
+                if any(r['job_posting_id'] not in job_code_map for r in new):
+                    job_code_map = dict(job_code_map)
+                new_job_codes = [
+                    job_code_map.setdefault(r['job_posting_id'], len(job_code_map))
+                    for r in new
+                ]
+                # concatenate copies, so earlier snapshots keep their arrays
+                rows = np.concatenate([rows, np.array([r['row'] for r in new], dtype=np.int64)])
+                lists = np.concatenate([lists, np.array([r['list_id'] for r in new], dtype=np.int32)])
+                job_codes = np.concatenate([job_codes, np.array(new_job_codes, dtype=np.int32)])
+                scores = np.concatenate([
+                    scores,
+                    np.array([np.nan if r['overall_score'] is None else r['overall_score'] for r in new], dtype=np.float32)
+                ])
+            max_row = int(rows[-1]) if len(rows) else 0
+            
+            vectors = current.vectors if base is current else None
+            if max_row:
+                # Mapped before the snapshot is published, so it covers every row in it
+                vectors = self._open_vectors(state['vectors_file'], vectors, max_row)
+            
+            live_rows = state['live_rows']
+            self._snapshot = IndexSnapshot(
+                generation=state['generation'],
+                deletion_seq=state['deletion_seq'],
+                vectors_file=state['vectors_file'],
+                rows=rows,
+                lists=lists,
+                job_codes=job_codes,
+                scores=scores,
+                job_code_map=job_code_map,
+                centroids=(
+                    np.frombuffer(state['centroids'], dtype=np.float32).reshape(-1, self.dim)
+                    if state['centroids'] is not None else None
+                ),
+                idf=self.embedder.idf_weights(
+                    np.frombuffer(state['document_frequency'], dtype=np.int64),
+                    max(1, live_rows)
+                ),
+                live_rows=live_rows,
+                vectors=vectors
+            )
+            return self._snapshot
+    
+    async def search(
+        self,
+        query: Optional[str] = None,
+        like_key: Optional[str] = None,
+        job_posting_id: Optional[str] = None,
+        min_score: Optional[int] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the resumes most similar to a free-text query or to an indexed resume
+        
+        Args:
+            query: Free text (skills, a job description, ...)
+            like_key: entry_key() of an indexed resume to find candidates like
+            job_posting_id: Only return resumes evaluated for this job
+            min_score: Only return resumes with at least this overall_score
+            limit: Number of results
+        
+        Returns:
+            Entry metadata with a `similarity` score, most similar first
+        """
+        return await asyncio.to_thread(self._search, query, like_key, job_posting_id, min_score, limit)
+    
+    def _search(
+        self,
+        query: Optional[str],
+        like_key: Optional[str],
+        job_posting_id: Optional[str],
+        min_score: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        if not like_key and not query:
+            raise ValueError("Either a query or a resume to match is required")
+        query_vector = self.embedder.embed([query])[0] if not like_key else None
+        
+        for _ in range(SEARCH_ATTEMPTS):
+            results = self._search_snapshot(self._refresh(), query_vector, like_key, job_posting_id, min_score, limit)
+            if results is not None:
+                return results
+        raise RuntimeError("The resume index was compacted during every search attempt")
+    
+    def _search_snapshot(
+        self,
+        snapshot: IndexSnapshot,
+        query_vector: Optional[np.ndarray],
+        like_key: Optional[str],
+        job_posting_id: Optional[str],
+        min_score: Optional[int],
+        limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Search one snapshot; None if a compaction made its row numbers stale"""
+        if not len(snapshot.rows):
+            return []
+        vectors = snapshot.vectors
+        
+        exclude_row = None
+        if like_key:
+            with self._connect() as conn:
+                found = conn.execute(
+                    "SELECT e.row, s.generation FROM entries e JOIN index_state s ON s.id = 1 "
+                    "WHERE e.entry_key = ? AND e.deleted = 0",
+                    (like_key,)
+                ).fetchone()
+            if not found:
+                raise KeyError(f"Resume {like_key} is not indexed")
+            if found['generation'] != snapshot.generation:
+                return None
+            exclude_row = found['row']
+            # The resume may have been added after the snapshot was taken
+            query_vector = np.array(self._open_vectors(snapshot.vectors_file, vectors, exclude_row)[exclude_row - 1])
+        
+        query_vector = self._weigh(query_vector.reshape(1, -1), snapshot.idf)[0]
+        
+        candidates = np.ones(len(snapshot.rows), dtype=bool)
+        if job_posting_id is not None:
+            candidates &= snapshot.job_codes == snapshot.job_code_map.get(job_posting_id, -1)
+        if min_score is not None:
+            candidates &= snapshot.scores >= min_score
+        if exclude_row is not None:
+            candidates &= snapshot.rows != exclude_row
+        
+        # Probe the closest lists, unless the filters already leave few candidates
+        if snapshot.centroids is not None and np.count_nonzero(candidates) > limit * 50:
+            probe = np.argsort(-(snapshot.centroids @ query_vector))[:self.nprobe]
+            probed = candidates & np.isin(snapshot.lists, probe)
+            if np.count_nonzero(probed) >= limit:
+                candidates = probed
+        
+        rows = snapshot.rows[candidates]
+        if not len(rows):
+            return []
+        
+        scores = self._weigh(vectors[rows - 1], snapshot.idf) @ query_vector
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return self._fetch_entries([(int(rows[i]), float(scores[i])) for i in top], snapshot.generation)
+    
+    def _fetch_entries(self, ranked: List[Tuple[int, float]], generation: int) -> Optional[List[Dict[str, Any]]]:
+        """Metadata of ranked rows; None if the rows were renumbered since `generation`"""
+        with self._connect() as conn:
+            entries = {
+                r['row']: dict(r)
+                for r in conn.execute(
+                    f"SELECT e.row, {', '.join(f'e.{field}' for field in ENTRY_FIELDS)}, s.generation "
+                    f"FROM entries e JOIN index_state s ON s.id = 1 "
+                    f"WHERE e.row IN ({', '.join('?' for _ in ranked)})",
+                    [row for row, _ in ranked]
+                )
+            }
+        if len(entries) < len(ranked) or any(entry['generation'] != generation for entry in entries.values()):
+            return None
+        
+        results = []
+        for row, score in ranked:
+            entry = entries[row]
+            entry.pop('row')
+            entry.pop('generation')
+            entry['similarity'] = round(score, 4)
+            results.append(entry)
+        return results
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Index size and training state"""
+        snapshot = await asyncio.to_thread(self._refresh)
+        return {
+            'embedder': self.embedder.name,
+            'indexed_resumes': snapshot.live_rows,
+            'lists': len(snapshot.centroids) if snapshot.centroids is not None else 0,
+            'nprobe': self.nprobe
+        }
+
+@lru_cache()
+def get_resume_index() -> ResumeIndexService:
+    """Get the process-wide resume index"""
+    return ResumeIndexService()
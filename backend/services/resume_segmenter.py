@@ -0,0 +1,103 @@
+"""
+Resume Segmenter
+One-pass line index and section map shared by all resume extractors
+
+A ResumeDocument splits and lowercases the text exactly once, records where
+every line starts, and detects section headers (Education, Experience, ...) so
+extractors look up their section instead of rescanning the whole resume.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Checked in this order, so 'academic projects' is a projects header, not education
+SECTION_KEYWORDS: Dict[str, List[str]] = {
+    'projects': ['projects', 'portfolio', 'personal projects', 'academic projects'],
+    'certifications': ['certification', 'certificate', 'license'],
+    'skills': ['skills', 'technical skills', 'core competencies', 'technologies'],
+    'experience': ['experience', 'employment', 'work history', 'professional experience'],
+    'education': ['education', 'academic', 'qualification']
+}
+
+# Headers are short lines such as "TECHNICAL SKILLS:" or "Work History"
+MAX_HEADER_WORDS = 4
+
+_SECTION_PATTERNS = {
+    name: re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    for name, keywords in SECTION_KEYWORDS.items()
+}
+
+class ResumeDocument:
+    """Resume text with a lowercase line index and a header -> line range section map"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        self.lines = text.split('\n')
+        self.lines_lower = self.text_lower.split('\n')
+        
+        # Offset of the first character of each line in text_lower, for offset -> line
+        # lookups (lowercasing can change the length of some non-ASCII lines)
+        self._line_starts = [0]
+        for line in self.lines_lower[:-1]:
+            self._line_starts.append(self._line_starts[-1] + len(line) + 1)
+        
+        self._keyword_patterns: Dict[Tuple[str, ...], re.Pattern] = {}
+        self.sections = self._build_section_map()
+    
+    def _build_section_map(self) -> Dict[str, Tuple[int, int]]:
+        """Map each section name to the (header line, end line) of its first occurrence"""
+        headers: List[Tuple[int, str]] = []
+        found = set()
+        
+        for i, line in enumerate(self.lines_lower):
+            words = line.strip().rstrip(':').split()
+            if not words or len(words) > MAX_HEADER_WORDS:
+                continue
+            for name, pattern in _SECTION_PATTERNS.items():
+                if pattern.search(line):
+                    if name not in found:
+                        headers.append((i, name))
+                        found.add(name)
+                    break
+        
+        # Every section runs until the next detected header
+        sections = {}
+        for index, (start, name) in enumerate(headers):
+            end = headers[index + 1][0] if index + 1 < len(headers) else len(self.lines)
+            sections[name] = (start, end)
+        return sections
+    
+    def line_of(self, offset: int) -> int:
+        """Line number containing a character offset of the text"""
+        return bisect_right(self._line_starts, offset) - 1
+    
+    def first_line_containing(self, keywords: Sequence[str]) -> int:
+        """First line containing any of `keywords` (case-insensitive), or -1"""
+        key = tuple(keywords)
+        pattern = self._keyword_patterns.get(key)
+        if pattern is None:
+            pattern = re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
+            self._keyword_patterns[key] = pattern
+        
+        match = pattern.search(self.text_lower)
+        return self.line_of(match.start()) if match else -1
+    
+    def section_range(self, name: str, max_lines: int) -> Optional[Tuple[int, int]]:
+        """
+        Line range (start, end) of a section, starting at its header line
+        
+        Uses the detected header when there is one and stops at the next
+        section; otherwise falls back to the first line mentioning one of the
+        section's keywords. At most `max_lines` lines are returned.
+        """
+        if name in self.sections:
+            start, end = self.sections[name]
+        else:
+            start = self.first_line_containing(SECTION_KEYWORDS[name])
+            if start < 0:
+                return None
+            end = len(self.lines)
+        
+        return start, min(end, start + max_lines)
@@ -0,0 +1,241 @@
+"""
+Skill Matcher
+Precompiled multi-term matcher driven by a skill taxonomy with aliases
+
+All canonical names and aliases of a taxonomy are compiled into one
+prefix-factored regex, so matching is a single pass over the text no matter how
+many terms the taxonomy holds. Terms only match as whole tokens: 'go' does not
+hit "good" and 'c++' does not hit "c++11".
+
+A taxonomy maps a canonical name to either a list of aliases or an object:
+
+    {
+        "javascript": ["js", "ecmascript"],
+        "go": {"aliases": ["golang"], "ambiguous": true}
+    }
+
+Ambiguous terms (short or common English words) are only matched inside a
+resume's skills section, never in free text.
+"""
+
+import json
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SKILL_TAXONOMY: Dict[str, Any] = {
+    # Programming Languages
+    'python': ['python3'],
+    'java': [],
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'typescript': [],
+    'c++': ['cpp'],
+    'c#': ['csharp', 'c sharp'],
+    'go': {'aliases': ['golang'], 'ambiguous': True},
+    'rust': {'aliases': [], 'ambiguous': True},
+    'ruby': {'aliases': [], 'ambiguous': True},
+    'php': [],
+    'swift': {'aliases': [], 'ambiguous': True},
+    'kotlin': [],
+    'scala': [],
+    'r': {'aliases': [], 'ambiguous': True},
+    'matlab': [],
+    'perl': [],
+    
+    # Web Technologies
+    'html': ['html5'],
+    'css': ['css3'],
+    'react': ['reactjs', 'react.js'],
+    'angular': ['angularjs', 'angular.js'],
+    'vue': ['vuejs', 'vue.js'],
+    'node.js': ['nodejs', 'node js'],
+    'express': {'aliases': ['expressjs', 'express.js'], 'ambiguous': True},
+    'django': [],
+    'flask': {'aliases': [], 'ambiguous': True},
+    'fastapi': [],
+    'spring': {'aliases': ['spring boot', 'springboot'], 'ambiguous': True},
+    'asp.net': ['aspnet', 'asp.net core'],
+    'rails': {'aliases': ['ruby on rails', 'ror'], 'ambiguous': True},
+    
+    # Databases
+    'sql': [],
+    'mysql': [],
+    'postgresql': ['postgres', 'psql'],
+    'mongodb': ['mongo'],
+    'redis': [],
+    'elasticsearch': ['elastic search'],
+    'oracle': [],
+    'cassandra': [],
+    'dynamodb': ['dynamo db'],
+    'firebase': [],
+    'supabase': [],
+    
+    # Cloud & DevOps
+    'aws': ['amazon web services'],
+    'azure': ['microsoft azure'],
+    'gcp': ['google cloud', 'google cloud platform'],
+    'docker': [],
+    'kubernetes': ['k8s'],
+    'jenkins': [],
+    'gitlab': [],
+    'terraform': [],
+    'ansible': [],
+    'ci/cd': ['cicd', 'ci-cd', 'continuous integration'],
+    'linux': [],
+    'bash': ['shell scripting'],
+    'powershell': [],
+    
+    # AI/ML
+    'machine learning': ['ml'],
+    'deep learning': [],
+    'tensorflow': [],
+    'pytorch': ['torch'],
+    'keras': [],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'pandas': [],
+    'numpy': [],
+    'opencv': [],
+    'nlp': ['natural language processing'],
+    'computer vision': [],
+    'langchain': [],
+    'llamaindex': ['llama index', 'llama-index'],
+    'openai': [],
+    'gpt': [],
+    'llm': ['llms', 'large language models'],
+    
+    # Others
+    'git': [],
+    'agile': [],
+    'scrum': [],
+    'rest api': ['rest apis', 'restful api', 'restful apis'],
+    'graphql': [],
+    'microservices': ['microservice'],
+    'blockchain': [],
+    'android': [],
+    'ios': [],
+    'unity': {'aliases': ['unity3d'], 'ambiguous': True},
+    'unreal engine': ['unreal']
+}
+
+DEFAULT_CERTIFICATION_TAXONOMY: Dict[str, Any] = {
+    'AWS': [],
+    'Azure': [],
+    'GCP': [],
+    'CCNA': [],
+    'CCNP': [],
+    'PMP': [],
+    'CISSP': [],
+    'CompTIA': [],
+    'Oracle': [],
+    'Microsoft': [],
+    'Google': [],
+    'Cisco': [],
+    'Scrum Master': [],
+    'Product Owner': [],
+    'ITIL': [],
+    'Six Sigma': []
+}
+
+# Characters that continue a token, so terms never match inside a longer token
+_TOKEN_CHARS = r'\w+#'
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Build a prefix-factored alternation so the regex engine never backtracks across terms"""
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def render(node: Dict[str, Any]) -> str:
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + render(child)
+            for char, child in node.items() if char
+        ]
+        # Deterministic pattern regardless of taxonomy order
+        branches.sort(key=len, reverse=True)
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if optional else group
+    
+    return render(trie)
+
+class TermMatcher:
+    """Single-pass matcher mapping every alias occurrence back to its canonical term"""
+    
+    def __init__(self, taxonomy: Dict[str, Any]):
+        self.canonical: Dict[str, str] = {}
+        self.ambiguous = set()
+        
+        for name, entry in taxonomy.items():
+            if isinstance(entry, dict):
+                aliases = entry.get('aliases', [])
+                if entry.get('ambiguous'):
+                    self.ambiguous.add(name)
+            else:
+                aliases = entry or []
+            
+            for term in [name, *aliases]:
+                self.canonical[self._normalize(term)] = name
+        
+        self.pattern = re.compile(
+            rf'(?<![{_TOKEN_CHARS}])(?:{_trie_pattern(self.canonical)})(?![{_TOKEN_CHARS}])',
+            re.IGNORECASE
+        )
+    
+    @staticmethod
+    def _normalize(term: str) -> str:
+        return ' '.join(term.lower().split())
+    
+    def find_all(self, text: str, include_ambiguous: bool = True) -> List[str]:
+        """Canonical names of all terms in `text`, in order of first occurrence"""
+        found = {}
+        for match in self.pattern.finditer(text):
+            name = self.canonical.get(self._normalize(match.group(0)))
+            if name and (include_ambiguous or name not in self.ambiguous):
+                found.setdefault(name, None)
+        return list(found)
+    
+    def search(self, text: str) -> bool:
+        """True if `text` contains any term"""
+        return self.pattern.search(text) is not None
+    
+    def __len__(self) -> int:
+        return len(self.canonical)
+
+def load_taxonomy(path: Optional[str], default: Dict[str, Any]) -> Dict[str, Any]:
+    """Load a JSON taxonomy file, falling back to `default` when unset or unreadable"""
+    if not path:
+        return default
+    
+    try:
+        with open(Path(path), encoding='utf-8') as f:
+            taxonomy = json.load(f)
+        logger.info(f"Loaded taxonomy with {len(taxonomy)} terms from {path}")
+        return taxonomy
+    except Exception as e:
+        logger.error(f"Error loading taxonomy {path}, using built-in defaults: {str(e)}")
+        return default
+
+@lru_cache()
+def get_skill_matcher() -> TermMatcher:
+    """Get the process-wide skill matcher (compiled once per process)"""
+    settings = get_settings()
+    return TermMatcher(load_taxonomy(settings.skill_taxonomy_path, DEFAULT_SKILL_TAXONOMY))
+
+@lru_cache()
+def get_certification_matcher() -> TermMatcher:
+    """Get the process-wide certification name matcher"""
+    settings = get_settings()
+    return TermMatcher(load_taxonomy(settings.certification_taxonomy_path, DEFAULT_CERTIFICATION_TAXONOMY))
@@ -0,0 +1,152 @@
+"""
+Structured Output
+Parses, repairs and validates JSON replies of the LLM against Pydantic models
+
+Calls that expect JSON ask Azure for it through `response_format`, per
+LLM_RESPONSE_FORMAT:
+- json_object: JSON mode, the reply is a syntactically valid object (default)
+- json_schema: the reply follows the JSON schema of the Pydantic model
+  (needs AZURE_OPENAI_API_VERSION 2024-08-01-preview or later)
+- off: plain text, for deployments without either
+
+Replies are still validated against the model. Damaged JSON (code fences,
+text around the object, trailing commas, a reply cut off at max_tokens) is
+repaired locally; OpenAIService falls back to a short repair call only when
+that is not enough.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+RESPONSE_FORMATS = ('json_object', 'json_schema', 'off')
+
+# Truncated replies are cut back to at most this many earlier element boundaries
+MAX_REPAIR_ATTEMPTS = 20
+
+class StructuredOutputError(ValueError):
+    """An LLM reply that could not be turned into the expected model"""
+    
+    def __init__(self, message: str, raw_text: Optional[str] = None):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+def build_response_format(schema: Type[BaseModel], mode: str) -> Optional[Dict[str, Any]]:
+    """`response_format` request argument for replies matching `schema`"""
+    if mode == 'json_schema':
+        return {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': schema.__name__,
+                'schema': schema.model_json_schema(),
+                # Strict mode rejects optional fields and defaults; the reply is validated anyway
+                'strict': False
+            }
+        }
+    if mode == 'json_object':
+        return {'type': 'json_object'}
+    return None
+
+def _scan_object(text: str) -> Tuple[List[str], List[str], bool, List[Tuple[int, str]]]:
+    """
+    Walk the first JSON object in `text`, dropping trailing commas
+    
+    Returns the cleaned characters, the closers of containers still open at
+    the end, whether the text ended inside a string, and the points the
+    object can be cut at (cleaned length and closers needed there).
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+    
+    for char in text[text.find('{'):]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            out.append(char)
+            cuts.append((len(out), ''.join(reversed(stack))))
+            continue
+        elif char in '}]':
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            # A mismatched closer is taken to mean the one that is due
+            out.append(stack.pop())
+            if not stack:
+                break
+            continue
+        elif char == ',':
+            cuts.append((len(out), ''.join(reversed(stack))))
+        out.append(char)
+    
+    if in_string and escaped:
+        out.pop()
+    return out, stack, in_string, cuts
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    Best-effort parse of a JSON object embedded in, or damaged within, `text`
+    
+    Skips anything before the first '{' and after the object closes, drops
+    trailing commas, and completes a reply that was cut off: an open string
+    is closed, open arrays and objects are closed, and if that is still not
+    valid the object is cut back to the last complete element. Returns None
+    if no object can be recovered.
+    """
+    if not text or '{' not in text:
+        return None
+    
+    out, stack, in_string, cuts = _scan_object(text)
+    candidates = [''.join(out) + ('"' if in_string else '') + ''.join(reversed(stack))]
+    if stack:
+        candidates += [''.join(out[:length]) + closers for length, closers in reversed(cuts[-MAX_REPAIR_ATTEMPTS:])]
+    
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+def parse_structured(text: Optional[str], schema: Type[ModelT]) -> Tuple[ModelT, bool]:
+    """
+    Validate a reply against `schema`, repairing its JSON if needed
+    
+    Returns:
+        The model and whether local repair was needed
+    
+    Raises:
+        StructuredOutputError: with the validation errors, if the reply cannot be used
+    """
+    try:
+        return schema.model_validate_json(text or ''), False
+    except ValidationError as e:
+        error = e
+    
+    repaired = repair_json(text or '')
+    if repaired is not None:
+        try:
+            return schema.model_validate(repaired), True
+        except ValidationError as e:
+            error = e
+    
+    raise StructuredOutputError(f"Reply does not match {schema.__name__}: {str(error)}", raw_text=text)
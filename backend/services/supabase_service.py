@@ -8,6 +8,7 @@ from datetime import datetime
 from supabase import create_client, Client
 from config import get_settings
 from models.job_analysis import AnalysisResult, JobAnalysisDB
+from services.job_context_cache import get_job_context_cache
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +67,9 @@ class SupabaseService:
             if not result.data:
                 raise ValueError(f"No job posting found with ID: {job_id}")
             
+            # Evaluations must not keep scoring against the old analysis
+            get_job_context_cache().invalidate(job_id)
+            
             logger.info(f"Successfully updated job analysis for job ID: {job_id}")
             return result.data[0]
             
@@ -0,0 +1,122 @@
+"""
+Vector Store Service
+On-disk store of resume embeddings, grouped into namespaces
+
+Each namespace (e.g. one shortlist job) holds float32 vectors of a single
+dimension. Vectors are stored as raw bytes in SQLite, so several worker
+processes can write concurrently, and a namespace loads back as one contiguous
+numpy matrix for brute-force cosine scoring.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    metadata TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+class VectorStoreService:
+    """Service for storing and loading embedding vectors"""
+    
+    def __init__(self, db_path: Optional[str] = None):
+        settings = get_settings()
+        
+        self.db_path = Path(db_path or settings.vector_store_db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+    
+    async def upsert(
+        self,
+        namespace: str,
+        key: str,
+        vector: np.ndarray,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Insert or replace one vector"""
+        await asyncio.to_thread(self._upsert, namespace, key, vector, metadata)
+    
+    def _upsert(
+        self,
+        namespace: str,
+        key: str,
+        vector: np.ndarray,
+        metadata: Optional[Dict[str, Any]]
+    ) -> None:
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO vectors (namespace, key, dim, vector, metadata, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, len(vector), vector.tobytes(), json.dumps(metadata or {}), time.time())
+            )
+    
+    async def load(self, namespace: str) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Load every vector of a namespace
+        
+        Returns:
+            (keys, matrix with one row per key, metadata per key)
+        """
+        return await asyncio.to_thread(self._load, namespace)
+    
+    def _load(self, namespace: str) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, dim, vector, metadata FROM vectors WHERE namespace = ? ORDER BY key",
+                (namespace,)
+            ).fetchall()
+        
+        if not rows:
+            return [], np.zeros((0, 0), dtype=np.float32), []
+        
+        dim = rows[0][1]
+        matrix = np.empty((len(rows), dim), dtype=np.float32)
+        for i, (_, row_dim, blob, _) in enumerate(rows):
+            if row_dim != dim:
+                raise ValueError(f"Vector namespace {namespace} mixes dimensions {dim} and {row_dim}")
+            matrix[i] = np.frombuffer(blob, dtype=np.float32)
+        
+        keys = [row[0] for row in rows]
+        metadata = [json.loads(row[3]) if row[3] else {} for row in rows]
+        return keys, matrix, metadata
+    
+    async def delete_namespace(self, namespace: str) -> int:
+        """Drop every vector of a namespace; returns the count"""
+        return await asyncio.to_thread(self._delete_namespace, namespace)
+    
+    def _delete_namespace(self, namespace: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM vectors WHERE namespace = ?", (namespace,)).rowcount
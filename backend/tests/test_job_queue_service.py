@@ -0,0 +1,154 @@
+"""
+Tests for the durable job queue's claim / lease / finish state machine
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.job_queue_service import JobQueueService
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueueService(db_path=str(tmp_path / "jobs.db"))
+    queue.max_attempts = 3
+    queue.lease_seconds = 300
+    return queue
+
+def enqueue(queue, count=1):
+    return queue._enqueue_job('resume_evaluation', [{'n': n} for n in range(count)], 'posting-1', None)
+
+def expire_leases(queue):
+    """Simulate the lease holder dying: push every lease into the past"""
+    expired = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    with queue._connect() as conn:
+        conn.execute("UPDATE job_items SET lease_expires_at = ? WHERE status = 'processing'", (expired,))
+
+def item_row(queue, item_id):
+    with queue._connect() as conn:
+        return dict(conn.execute("SELECT * FROM job_items WHERE id = ?", (item_id,)).fetchone())
+
+def test_claim_leases_pending_items_oldest_first(queue):
+    job_id = enqueue(queue, 3)
+    
+    items = queue._claim_items('worker-a', 2)
+    
+    assert [item['seq'] for item in items] == [0, 1]
+    assert all(item['job_id'] == job_id and item['attempts'] == 1 for item in items)
+    assert not any(item['abandoned'] for item in items)
+    assert items[0]['payload'] == {'n': 0}
+    row = item_row(queue, items[0]['id'])
+    assert row['status'] == 'processing'
+    assert row['locked_by'] == 'worker-a'
+    assert row['lease_expires_at'] > datetime.utcnow().isoformat()
+
+def test_leased_items_are_not_claimed_twice(queue):
+    enqueue(queue, 2)
+    
+    first = queue._claim_items('worker-a', 10)
+    second = queue._claim_items('worker-b', 10)
+    
+    assert len(first) == 2
+    assert second == []
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue):
+    enqueue(queue)
+    [item] = queue._claim_items('worker-a', 1)
+    
+    expire_leases(queue)
+    [reclaimed] = queue._claim_items('worker-b', 1)
+    
+    assert reclaimed['id'] == item['id']
+    assert reclaimed['attempts'] == 2
+    assert item_row(queue, item['id'])['locked_by'] == 'worker-b'
+
+def test_item_is_abandoned_once_expired_leases_reach_the_attempt_cap(queue):
+    job_id = enqueue(queue)
+    for attempt in range(queue.max_attempts):
+        [item] = queue._claim_items(f'worker-{attempt}', 1)
+        assert item['attempts'] == attempt + 1
+        expire_leases(queue)
+    
+    [abandoned] = queue._claim_items('worker-last', 1)
+    
+    assert abandoned['abandoned'] is True
+    assert abandoned['attempts'] == queue.max_attempts
+    row = item_row(queue, abandoned['id'])
+    assert row['status'] == 'failed'
+    assert row['locked_by'] is None
+    assert 'lease expired' in row['last_error']
+    assert queue._claim_items('worker-last', 1) == []
+    assert queue._get_job_status(job_id)['status'] == 'completed_with_errors'
+
+def test_only_the_lease_holder_can_finish_an_item(queue):
+    job_id = enqueue(queue)
+    [item] = queue._claim_items('worker-a', 1)
+    expire_leases(queue)
+    queue._claim_items('worker-b', 1)
+    
+    assert queue._finish_item(item['id'], 'worker-a', 'completed', None, {'score': 1}) is False
+    assert item_row(queue, item['id'])['status'] == 'processing'
+    
+    assert queue._finish_item(item['id'], 'worker-b', 'completed', None, {'score': 2}) is True
+    row = item_row(queue, item['id'])
+    assert row['status'] == 'completed'
+    assert row['result'] == '{"score": 2}'
+    assert row['locked_by'] is None and row['lease_expires_at'] is None
+    
+    # A finished item can't be finished again, even by its last holder
+    assert queue._finish_item(item['id'], 'worker-b', 'failed', 'late', None) is False
+    assert queue._get_job_status(job_id)['status'] == 'completed'
+
+def test_failed_attempt_is_requeued_until_the_attempt_cap(queue):
+    enqueue(queue)
+    
+    for attempt in range(1, queue.max_attempts):
+        [item] = queue._claim_items('worker-a', 1)
+        assert item['attempts'] == attempt
+        assert asyncio.run(queue.fail_item(item['id'], 'worker-a', item['attempts'], 'boom')) is True
+        assert item_row(queue, item['id'])['status'] == 'pending'
+    
+    [item] = queue._claim_items('worker-a', 1)
+    assert asyncio.run(queue.fail_item(item['id'], 'worker-a', item['attempts'], 'boom')) is False
+    row = item_row(queue, item['id'])
+    assert row['status'] == 'failed'
+    assert row['last_error'] == 'boom'
+
+def test_fail_after_losing_the_lease_leaves_the_item_to_its_new_holder(queue):
+    enqueue(queue)
+    queue.max_attempts = 2
+    queue._claim_items('worker-a', 1)
+    expire_leases(queue)
+    [item] = queue._claim_items('worker-b', 1)
+    
+    # worker-a's last attempt fails after worker-b reclaimed the item: it will still run
+    assert asyncio.run(queue.fail_item(item['id'], 'worker-a', queue.max_attempts, 'late')) is True
+    row = item_row(queue, item['id'])
+    assert row['status'] == 'processing'
+    assert row['locked_by'] == 'worker-b'
+
+def test_extend_lease_only_touches_items_the_worker_holds(queue):
+    enqueue(queue)
+    [item] = queue._claim_items('worker-a', 1)
+    expire_leases(queue)
+    queue._claim_items('worker-b', 1)
+    lease_b = item_row(queue, item['id'])['lease_expires_at']
+    
+    queue._extend_lease([item['id']], 'worker-a')
+    assert item_row(queue, item['id'])['lease_expires_at'] == lease_b
+    
+    expire_leases(queue)
+    queue._extend_lease([item['id']], 'worker-b')
+    assert item_row(queue, item['id'])['lease_expires_at'] > datetime.utcnow().isoformat()
+
+def test_retry_failed_items_resets_attempts(queue):
+    job_id = enqueue(queue)
+    queue.max_attempts = 1
+    [item] = queue._claim_items('worker-a', 1)
+    asyncio.run(queue.fail_item(item['id'], 'worker-a', item['attempts'], 'boom'))
+    
+    assert queue._retry_failed_items(job_id) == 1
+    [retried] = queue._claim_items('worker-a', 1)
+    assert retried['id'] == item['id']
+    assert retried['attempts'] == 1
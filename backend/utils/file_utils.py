@@ -0,0 +1,119 @@
+"""
+Temporary file helpers for resume ingestion
+"""
+
+import asyncio
+import base64
+import logging
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import aiofiles
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+def make_temp_resume_path(filename: str, directory: Path = None) -> Path:
+    """Build a unique temp path for a resume file"""
+    temp_dir = directory or Path(tempfile.gettempdir())
+    return temp_dir / f"resume_{datetime.now().timestamp()}_{Path(filename).name}"
+
+async def cleanup_temp_file(file_path: Path):
+    """Clean up temporary files after processing"""
+    try:
+        if file_path.exists():
+            file_path.unlink()
+            logger.debug(f"Cleaned up temp file: {file_path}")
+    except Exception as e:
+        logger.error(f"Error cleaning up temp file: {str(e)}")
+
+async def save_base64_to_temp(base64_content: str, filename: str, directory: Path = None) -> Path:
+    """Save base64 content to temporary file"""
+    try:
+        # Decode base64
+        file_content = base64.b64decode(base64_content)
+        
+        # Create temp file
+        temp_file_path = make_temp_resume_path(filename, directory)
+        
+        async with aiofiles.open(temp_file_path, 'wb') as f:
+            await f.write(file_content)
+        
+        return temp_file_path
+    except Exception as e:
+        logger.error(f"Error saving base64 to temp: {str(e)}")
+        raise
+
+@lru_cache()
+def get_download_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP connection pool used for resume downloads
+    
+    HTTP/2 is used when the optional `h2` package is installed, so many
+    downloads from the same storage host share a few keep-alive connections.
+    """
+    settings = get_settings()
+    
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        logger.info("h2 not installed, resume downloads use HTTP/1.1 (pip install 'httpx[http2]')")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=settings.download_max_concurrent,
+            max_keepalive_connections=settings.download_max_concurrent
+        ),
+        timeout=httpx.Timeout(settings.download_timeout_seconds, connect=10.0)
+    )
+
+@lru_cache()
+def _get_download_semaphore() -> asyncio.Semaphore:
+    return asyncio.Semaphore(get_settings().download_max_concurrent)
+
+async def close_download_client() -> None:
+    """Close the shared download connection pool (call on shutdown)"""
+    if get_download_client.cache_info().currsize:
+        await get_download_client().aclose()
+        get_download_client.cache_clear()
+        _get_download_semaphore.cache_clear()
+
+async def download_resume_from_url(url: str, filename: str, directory: Path = None) -> Path:
+    """
+    Download resume from URL to temporary file
+    
+    Uses the shared connection pool, bounded by DOWNLOAD_MAX_CONCURRENT, and
+    streams the body to disk in chunks instead of buffering it in memory.
+    """
+    settings = get_settings()
+    temp_file_path = make_temp_resume_path(filename, directory)
+    
+    try:
+        async with _get_download_semaphore():
+            async with get_download_client().stream('GET', url) as response:
+                response.raise_for_status()
+                
+                size = 0
+                async with aiofiles.open(temp_file_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                        size += len(chunk)
+                        if size > settings.download_max_bytes:
+                            raise ValueError(f"Resume at {url} exceeds {settings.download_max_bytes} bytes")
+                        await f.write(chunk)
+        
+        return temp_file_path
+    except Exception as e:
+        logger.error(f"Error downloading resume from URL: {str(e)}")
+        # Don't leave partial downloads behind
+        await cleanup_temp_file(temp_file_path)
+        raise
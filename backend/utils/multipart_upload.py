@@ -0,0 +1,212 @@
+"""
+Streaming multipart upload handling for resume batches
+
+Parses a multipart/form-data request body chunk by chunk and writes every file
+part straight to a spool directory as it arrives, so peak memory stays flat no
+matter how many resumes a batch contains. Zip and tar archives among the parts
+are unpacked member by member into the same directory.
+"""
+
+import asyncio
+import logging
+import shutil
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, AsyncIterator, List, Optional
+
+import aiofiles
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:
+    # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = {'.pdf', '.doc', '.docx', '.txt'}
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+# Non-file form fields are small (job_posting_id etc.)
+MAX_FIELD_BYTES = 64 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+
+class MultipartResumeSpooler:
+    """Spools the resume files of a multipart request body to disk"""
+    
+    def __init__(self, directory: Path, max_files: int, max_file_bytes: int):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        
+        self.fields: Dict[str, str] = {}
+        self.files: List[Dict[str, str]] = []
+        # Set once the files are handed to the job queue; workers remove the directory when the job is done
+        self.keep_files = False
+        
+        # Parser callbacks are synchronous; they queue events that are handled
+        # (with async file writes) after each chunk is fed to the parser
+        self._events: List[tuple] = []
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        
+        self._part_name: Optional[str] = None
+        self._part_filename: Optional[str] = None
+        self._part_path: Optional[Path] = None
+        self._part_file = None
+        self._part_size = 0
+        self._field_value = bytearray()
+    
+    async def consume(self, content_type: str, stream: AsyncIterator[bytes]) -> None:
+        """Feed a request body stream through the parser"""
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b'boundary')
+        if not boundary:
+            raise ValueError("Expected a multipart/form-data request with a boundary")
+        
+        parser = multipart.MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished
+        })
+        
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                await self._handle_events()
+            parser.finalize()
+            await self._handle_events()
+        finally:
+            if self._part_file is not None:
+                await self._part_file.close()
+    
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+    
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+    
+    def _on_headers_finished(self) -> None:
+        self._events.append(('begin', self._headers))
+    
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(('data', data[start:end]))
+    
+    def _on_part_end(self) -> None:
+        self._events.append(('end', None))
+    
+    async def _handle_events(self) -> None:
+        events, self._events = self._events, []
+        for event, value in events:
+            if event == 'begin':
+                await self._begin_part(value)
+            elif event == 'data':
+                await self._write_part_data(value)
+            else:
+                await self._end_part()
+    
+    async def _begin_part(self, headers: Dict[bytes, bytes]) -> None:
+        _, options = parse_options_header(headers.get(b'content-disposition', b''))
+        self._part_name = options.get(b'name', b'').decode('utf-8', errors='replace')
+        filename = options.get(b'filename')
+        self._part_filename = Path(filename.decode('utf-8', errors='replace')).name if filename else None
+        self._part_size = 0
+        self._field_value = bytearray()
+        
+        if self._part_filename:
+            self._part_path = self._spool_path(self._part_filename)
+            self._part_file = await aiofiles.open(self._part_path, 'wb')
+    
+    async def _write_part_data(self, data: bytes) -> None:
+        self._part_size += len(data)
+        
+        if self._part_file is None:
+            if self._part_size > MAX_FIELD_BYTES:
+                raise ValueError(f"Form field '{self._part_name}' is too large")
+            self._field_value += data
+            return
+        
+        if self._part_size > self.max_file_bytes and not self._is_archive(self._part_filename):
+            raise ValueError(f"File '{self._part_filename}' exceeds {self.max_file_bytes} bytes")
+        await self._part_file.write(data)
+    
+    async def _end_part(self) -> None:
+        if self._part_file is None:
+            self.fields[self._part_name] = self._field_value.decode('utf-8', errors='replace')
+            return
+        
+        await self._part_file.close()
+        self._part_file = None
+        
+        if self._is_archive(self._part_filename):
+            await asyncio.to_thread(self._extract_archive, self._part_path)
+            self._part_path.unlink(missing_ok=True)
+        elif self._is_resume(self._part_filename):
+            self._add_file(self._part_filename, self._part_path)
+        else:
+            logger.warning(f"Skipping unsupported upload: {self._part_filename}")
+            self._part_path.unlink(missing_ok=True)
+    
+    def _spool_path(self, filename: str) -> Path:
+        # Index prefix keeps names unique and preserves upload order
+        return self.directory / f"{len(self.files):06d}_{Path(filename).name}"
+    
+    def _add_file(self, filename: str, path: Path) -> None:
+        if len(self.files) >= self.max_files:
+            raise ValueError(f"Batch exceeds the maximum of {self.max_files} resumes")
+        self.files.append({'name': filename, 'path': str(path)})
+    
+    @staticmethod
+    def _is_resume(filename: str) -> bool:
+        return Path(filename).suffix.lower() in RESUME_EXTENSIONS
+    
+    @staticmethod
+    def _is_archive(filename: str) -> bool:
+        return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+    
+    def _extract_archive(self, archive_path: Path) -> None:
+        """Unpack resume files from a zip or tar archive, one member at a time"""
+        if zipfile.is_zipfile(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                for member in archive.infolist():
+                    if member.is_dir():
+                        continue
+                    self._extract_member(member.filename, member.file_size, lambda: archive.open(member))
+        elif tarfile.is_tarfile(archive_path):
+            with tarfile.open(archive_path) as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    self._extract_member(member.name, member.size, lambda: archive.extractfile(member))
+        else:
+            raise ValueError(f"Unreadable archive: {archive_path.name}")
+    
+    def _extract_member(self, member_name: str, size: int, open_member) -> None:
+        # Only the base name is used, so archive paths cannot escape the spool dir
+        filename = Path(member_name).name
+        if not self._is_resume(filename) or filename.startswith('.'):
+            return
+        if size > self.max_file_bytes:
+            logger.warning(f"Skipping archived file {member_name}: exceeds {self.max_file_bytes} bytes")
+            return
+        
+        target = self._spool_path(filename)
+        with open_member() as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_BYTES)
+        self._add_file(filename, target)
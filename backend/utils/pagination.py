@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST queries
+
+Pages are ordered by a sort column plus `id` as a tie-breaker, and each page
+continues strictly after the last row of the previous one, so fetching page N
+costs the same as fetching page 1. Rows whose sort column is NULL come last in
+either direction. Cursors are opaque URL-safe strings.
+"""
+
+import base64
+import json
+from typing import Dict, Any, List, Optional
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode cursor values as an opaque URL-safe string"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor(); raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, dict) or 'v' not in values or 'id' not in values:
+        raise ValueError("Invalid cursor")
+    return values
+
+def _quote(value: Any) -> str:
+    # Quoted values may contain PostgREST separators (',', '.', ':', ...)
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+def apply_keyset(query, sort_by: str, descending: bool, cursor: Optional[Dict[str, Any]]):
+    """
+    Order a query by (sort_by NULLS LAST, id) and continue after `cursor`
+    
+    Rows whose sort column is NULL follow all others, ordered by id alone.
+    """
+    query = query.order(sort_by, desc=descending, nullsfirst=False)\
+        .order('id', desc=descending)
+    
+    if cursor:
+        op = 'lt' if descending else 'gt'
+        if cursor['v'] is None:
+            # Already in the NULL tail
+            query = query.is_(sort_by, 'null').filter('id', op, cursor['id'])
+        else:
+            value, last_id = _quote(cursor['v']), _quote(cursor['id'])
+            query = query.or_(
+                f"{sort_by}.{op}.{value},and({sort_by}.eq.{value},id.{op}.{last_id}),{sort_by}.is.null"
+            )
+    return query
+
+def next_cursor(rows: List[Dict[str, Any]], sort_by: str, limit: int, **extra: Any) -> Optional[str]:
+    """Cursor for the page after `rows`, or None if this was the last page"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor({'v': last[sort_by], 'id': last['id'], **extra})
@@ -0,0 +1,447 @@
+"""
+Background worker for durable batch jobs
+
+Run next to the API server to process queued jobs:
+    python worker.py                  # one process per CPU core
+    python worker.py --processes 4 --concurrency 10
+
+Workers can be started, stopped and redeployed at any time; unfinished items
+are picked up again from the job queue checkpoints.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from dotenv import load_dotenv
+
+# Load environment variables before settings are read
+load_dotenv()
+
+from config import get_settings
+from services.job_queue_service import JobQueueService
+from services.candidate_name_service import CandidateNameService
+from services.resume_evaluation_service import ResumeEvaluationService
+from services.result_writer_service import close_result_writer
+from services.model_router import get_model_router
+from services.resume_extractor import shutdown_parse_executor, warm_parse_executor
+from utils.file_utils import cleanup_temp_file, close_download_client, download_resume_from_url
+from utils.logger import setup_logging
+
+logger = logging.getLogger("worker")
+
+# Seconds to wait before polling an empty queue again
+POLL_INTERVAL_SECONDS = 2.0
+
+# Seconds between sweeps of expired spool directories
+SPOOL_SWEEP_INTERVAL_SECONDS = 3600
+
+class JobWorker:
+    """Claims job items from the queue and runs them with bounded concurrency"""
+    
+    def __init__(self, worker_id: str, concurrency: int):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.queue = JobQueueService()
+        self.eval_service = ResumeEvaluationService()
+        self.name_service = CandidateNameService(
+            self.eval_service.supabase_service,
+            self.eval_service.openai_service
+        )
+        self._stopping: Optional[asyncio.Event] = None
+        
+        # job_type -> coroutine handling one item
+        self.handlers = {
+            'resume_evaluation': self.handle_resume_evaluation,
+            'resume_shortlist': self.handle_resume_shortlist,
+            'candidate_name_fix': self.handle_candidate_name_fix
+        }
+        
+        # job_type -> coroutine run once, by one worker, after the job's last item
+        self.finalizers = {
+            'resume_evaluation': self.finalize_resume_evaluation,
+            'resume_shortlist': self.finalize_resume_shortlist
+        }
+        
+        # job_type -> coroutine run once for an item that has permanently failed
+        self.failure_handlers = {
+            'resume_evaluation': self.record_resume_evaluation_failure
+        }
+    
+    def stop(self):
+        """Stop claiming new items; in-flight items are allowed to finish"""
+        if self._stopping and not self._stopping.is_set():
+            logger.info(f"Worker {self.worker_id} stopping after in-flight items")
+            self._stopping.set()
+    
+    async def run(self):
+        """Main loop: keep up to `concurrency` items in flight until stopped"""
+        self._stopping = asyncio.Event()
+        in_flight: Dict[asyncio.Task, Dict[str, Any]] = {}
+        lease_refresh_interval = max(1.0, self.queue.lease_seconds / 3)
+        loop = asyncio.get_running_loop()
+        last_lease_refresh = loop.time()
+        last_spool_sweep = None
+        
+        logger.info(f"Worker {self.worker_id} started (concurrency={self.concurrency})")
+        
+        while not self._stopping.is_set() or in_flight:
+            if last_spool_sweep is None or loop.time() - last_spool_sweep >= SPOOL_SWEEP_INTERVAL_SECONDS:
+                await self.sweep_spool_dirs()
+                last_spool_sweep = loop.time()
+            
+            free_slots = self.concurrency - len(in_flight)
+            if free_slots > 0 and not self._stopping.is_set():
+                try:
+                    items = await self.queue.claim_items(self.worker_id, free_slots)
+                except Exception as e:
+                    logger.error(f"Error claiming job items: {str(e)}")
+                    items = []
+                
+                for item in items:
+                    task = asyncio.create_task(self.process_item(item))
+                    in_flight[task] = item
+            
+            if not in_flight:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            done, _ = await asyncio.wait(
+                in_flight.keys(),
+                timeout=POLL_INTERVAL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                in_flight.pop(task)
+            
+            # Heartbeat so long-running items are not reclaimed by other workers
+            if in_flight and loop.time() - last_lease_refresh >= lease_refresh_interval:
+                await self.queue.extend_lease([item['id'] for item in in_flight.values()], self.worker_id)
+                last_lease_refresh = loop.time()
+        
+        logger.info(f"Worker {self.worker_id} stopped")
+    
+    async def process_item(self, item: Dict[str, Any]):
+        """Run one item through its handler and checkpoint the outcome"""
+        if item['abandoned']:
+            # Already marked failed by claim_items: its worker died on every attempt
+            logger.error(
+                f"Job {item['job_id']} item {item['seq']} failed (attempt {item['attempts']}, giving up): "
+                f"worker lease expired on every attempt"
+            )
+            await self.record_item_failure(item, "Worker lease expired on every attempt")
+            await self.maybe_finalize_job(item)
+            return
+        
+        handler = self.handlers.get(item['job_type'])
+        
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job type '{item['job_type']}'")
+            
+            result = await handler(item)
+            if not await self.queue.complete_item(item['id'], self.worker_id, result):
+                logger.warning(f"Job {item['job_id']} item {item['seq']} was reclaimed by another worker; discarding this result")
+                return
+        
+        except Exception as e:
+            retried = await self.queue.fail_item(item['id'], self.worker_id, item['attempts'], str(e))
+            logger.error(
+                f"Job {item['job_id']} item {item['seq']} failed (attempt {item['attempts']}, "
+                f"{'will retry' if retried else 'giving up'}): {str(e)}"
+            )
+            if retried:
+                return
+            await self.record_item_failure(item, str(e))
+        
+        await self.maybe_finalize_job(item)
+    
+    async def record_item_failure(self, item: Dict[str, Any], error: str):
+        """Run the job type's failure handler for an item that will not be retried"""
+        failure_handler = self.failure_handlers.get(item['job_type'])
+        if failure_handler is None:
+            return
+        
+        try:
+            await failure_handler(item, error)
+        except Exception as e:
+            logger.error(f"Recording the failure of job {item['job_id']} item {item['seq']} failed: {str(e)}")
+    
+    async def maybe_finalize_job(self, item: Dict[str, Any]):
+        """Run the job type's finalizer if this was the job's last outstanding item"""
+        finalizer = self.finalizers.get(item['job_type'])
+        if finalizer is None:
+            return
+        
+        try:
+            status = await self.queue.get_job_status(item['job_id'])
+            if not status or status['pending'] + status['processing'] > 0:
+                return
+            if not await self.queue.claim_finalization(item['job_id'], self.worker_id):
+                return
+        except Exception as e:
+            logger.error(f"Error checking job {item['job_id']} for finalization: {str(e)}")
+            return
+        
+        try:
+            await finalizer(status)
+        except Exception as e:
+            logger.error(f"Finalizing job {item['job_id']} failed: {str(e)}")
+            # Let a retry of the job's failed items trigger the finalizer again
+            await self.queue.release_finalization(item['job_id'])
+    
+    async def sweep_spool_dirs(self):
+        """
+        Remove expired spool directories
+        
+        Directories untouched for JOB_SPOOL_RETENTION_HOURS that no unfinished
+        job uses are removed: those of jobs left with failed items, and any a
+        failed upload left behind.
+        """
+        try:
+            active = {Path(spool_dir).resolve() for spool_dir in await self.queue.active_spool_dirs()}
+            expired = await asyncio.to_thread(self._expired_spool_dirs, active)
+            for path in expired:
+                await asyncio.to_thread(shutil.rmtree, path, True)
+        except Exception as e:
+            logger.error(f"Error sweeping spool directories: {str(e)}")
+            return
+        
+        if expired:
+            logger.info(f"Removed {len(expired)} expired spool directories")
+    
+    @staticmethod
+    def _expired_spool_dirs(active: Set[Path]) -> List[Path]:
+        settings = get_settings()
+        spool_root = Path(settings.job_spool_dir)
+        if not spool_root.is_dir():
+            return []
+        
+        cutoff = time.time() - settings.job_spool_retention_hours * 3600
+        return [
+            path for path in spool_root.iterdir()
+            if path.is_dir() and path.stat().st_mtime < cutoff and path.resolve() not in active
+        ]
+    
+    async def handle_resume_evaluation(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate one resume from a spooled file or a URL"""
+        payload = item['payload']
+        spooled_path = payload.get('path')
+        
+        if spooled_path:
+            file_path = Path(spooled_path)
+            if not file_path.exists():
+                raise FileNotFoundError(f"Spooled resume file missing: {spooled_path}")
+        elif payload.get('url'):
+            file_path = await download_resume_from_url(payload['url'], payload['name'])
+        else:
+            raise ValueError("Resume payload has neither 'path' nor 'url'")
+        
+        try:
+            result = await self.eval_service.evaluate_resume(
+                job_posting_id=item['job_posting_id'],
+                resume_file_path=str(file_path),
+                resume_file_name=payload['name'],
+                resume_file_url=payload.get('url'),
+                # Only checkpoint the item once its row is actually in the database
+                wait_for_store=True,
+                extra_metadata={'retrieval': payload['retrieval']} if payload.get('retrieval') else None,
+                # One failed row once the retries are used up, not one per attempt
+                store_failure=False
+            )
+        except Exception:
+            # Spooled files are kept so retries can re-read them
+            if not spooled_path:
+                await cleanup_temp_file(file_path)
+            raise
+        
+        await cleanup_temp_file(file_path)
+        
+        return {
+            'overall_score': result.get('overall_score'),
+            'recommendation': result.get('recommendation')
+        }
+    
+    async def record_resume_evaluation_failure(self, item: Dict[str, Any], error: str):
+        """Store the single failed resume_results row of a resume that used up its attempts"""
+        payload = item['payload']
+        stored = await self.eval_service.store_failed_evaluation(
+            item['job_posting_id'],
+            payload['name'],
+            payload.get('url'),
+            error
+        )
+        if not await stored:
+            raise RuntimeError("result writer could not store the row")
+    
+    async def handle_resume_shortlist(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Stage 1 of a shortlist: parse and embed one spooled resume"""
+        payload = item['payload']
+        file_path = Path(payload['path'])
+        if not file_path.exists():
+            raise FileNotFoundError(f"Spooled resume file missing: {payload['path']}")
+        
+        return await self.eval_service.index_resume_for_shortlist(
+            shortlist_id=item['job_id'],
+            key=f"{item['seq']:06d}",
+            resume_file_path=str(file_path),
+            metadata=payload
+        )
+    
+    async def handle_candidate_name_fix(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-extract the candidate names of one batch of resume_results rows"""
+        return await self.name_service.fix_batch(item['payload']['ids'])
+    
+    async def finalize_resume_evaluation(self, status: Dict[str, Any]):
+        """Remove the job's spool directory once every resume in it has been evaluated"""
+        spool_dir = status['metadata'].get('spool_dir')
+        if not spool_dir:
+            return
+        
+        if status['failed']:
+            # Keep the files for a retry of the failed items; the spool sweep removes them eventually
+            await self.queue.release_finalization(status['job_id'])
+            return
+        
+        await asyncio.to_thread(shutil.rmtree, spool_dir, True)
+        logger.info(f"Removed spool directory of job {status['job_id']}")
+    
+    async def finalize_resume_shortlist(self, status: Dict[str, Any]):
+        """
+        Stage 2 of a shortlist: queue the top-K resumes for full LLM evaluation
+        
+        Resumes outside the top-K are not evaluated; their spooled files are
+        removed and their vectors dropped with the rest of the shortlist.
+        """
+        shortlist_id = status['job_id']
+        metadata = status['metadata']
+        top_k = metadata.get('top_k') or get_settings().shortlist_top_k
+        
+        ranked = await self.eval_service.select_shortlist(shortlist_id, status['job_posting_id'], top_k)
+        
+        items = [
+            {
+                'name': entry['name'],
+                'path': entry['path'],
+                'url': entry.get('url'),
+                'retrieval': {
+                    'shortlist_job_id': shortlist_id,
+                    'score': entry['retrieval_score'],
+                    'rank': entry['retrieval_rank'],
+                    'pool_size': len(ranked)
+                }
+            }
+            for entry in ranked if entry['shortlisted']
+        ]
+        
+        evaluation_job_id = None
+        if items:
+            evaluation_job_id = await self.queue.enqueue_job(
+                job_type='resume_evaluation',
+                items=items,
+                job_posting_id=status['job_posting_id'],
+                metadata={'spool_dir': metadata.get('spool_dir'), 'shortlist_job_id': shortlist_id}
+            )
+        
+        await self.queue.update_job_metadata(shortlist_id, {
+            'evaluation_job_id': evaluation_job_id,
+            'indexed': len(ranked),
+            'shortlisted': len(items)
+        })
+        
+        if items:
+            for entry in ranked:
+                if not entry['shortlisted']:
+                    await cleanup_temp_file(Path(entry['path']))
+        elif metadata.get('spool_dir'):
+            # No evaluation job will clean up after this shortlist
+            await asyncio.to_thread(shutil.rmtree, metadata['spool_dir'], True)
+        await self.eval_service.vector_store.delete_namespace(
+            self.eval_service.shortlist_namespace(shortlist_id)
+        )
+        
+        logger.info(
+            f"Shortlist {shortlist_id}: {len(items)} of {len(ranked)} resumes queued for evaluation"
+            + (f" as job {evaluation_job_id}" if evaluation_job_id else "")
+        )
+
+def run_worker_process(index: int, concurrency: int, parse_workers: int, quota_share: float = 1.0):
+    """Entry point of a single worker process"""
+    os.makedirs("logs", exist_ok=True)
+    setup_logging()
+    get_model_router().set_share(quota_share)
+    
+    worker = JobWorker(f"{socket.gethostname()}-{os.getpid()}-{index}", concurrency)
+    
+    async def main():
+        await warm_parse_executor(parse_workers)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:
+                # Signal handlers are not available on Windows event loops
+                pass
+        await worker.run()
+        await close_result_writer()
+        await close_download_client()
+        shutdown_parse_executor()
+    
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    settings = get_settings()
+    
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=settings.job_worker_processes,
+                        help="Number of worker processes (default: JOB_WORKER_PROCESSES or CPU count)")
+    parser.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency,
+                        help="Concurrent items per process (default: JOB_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    
+    # Split the parse pool budget across worker processes so they don't oversubscribe the cores
+    parse_workers = settings.parse_executor_workers
+    if parse_workers > 0:
+        parse_workers = max(1, parse_workers // max(1, args.processes))
+    
+    # Likewise the Azure OpenAI quota left over by the API process, so all processes
+    # together stay within it
+    if not 0 < settings.llm_api_quota_share < 1:
+        parser.error("LLM_API_QUOTA_SHARE must be between 0 and 1")
+    quota_share = (1.0 - settings.llm_api_quota_share) / max(1, args.processes)
+    
+    if args.processes <= 1:
+        run_worker_process(0, args.concurrency, parse_workers, quota_share)
+    else:
+        processes = [
+            multiprocessing.Process(target=run_worker_process, args=(i, args.concurrency, parse_workers, quota_share))
+            for i in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        
+        def forward_signal(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+        
+        signal.signal(signal.SIGTERM, forward_signal)
+        
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # Children receive SIGINT from the terminal and drain on their own
+            for process in processes:
+                process.join()
@@ -32,13 +32,34 @@ export function FixNamesButton({ jobId }: FixNamesButtonProps) {
       
       const result = await response.json()
       
-      if (result.success) {
-        toast.success(`✅ Fixed ${result.fixed_count} candidate names using AI`)
-        // Refresh the page to show updated names
-        router.refresh()
-      } else {
+      if (!result.success) {
         toast.error('Failed to fix candidate names')
+        return
+      }
+      
+      if (!result.job_id) {
+        toast.success('✅ All candidate names look fine')
+        return
+      }
+      
+      // Names are fixed by a background job; wait for it to finish
+      let status
+      do {
+        await new Promise(resolve => setTimeout(resolve, 2000))
+        const statusResponse = await fetch(`${apiUrl}/jobs/${result.job_id}`)
+        if (!statusResponse.ok) {
+          throw new Error('Failed to fetch job status')
+        }
+        status = await statusResponse.json()
+      } while (status.status === 'queued' || status.status === 'processing')
+      
+      if (status.status === 'completed') {
+        toast.success(`✅ Re-extracted ${result.queued_count} candidate names using AI`)
+      } else {
+        toast.warning('Some candidate names could not be fixed')
       }
+      // Refresh the page to show updated names
+      router.refresh()
     } catch (error) {
       console.error('Error fixing names:', error)
       toast.error('Failed to fix candidate names')